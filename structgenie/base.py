@@ -4,7 +4,7 @@ YAML format was chosen because it is easy to read and write for humans and machi
 
 """
 from abc import ABC, abstractmethod
-from typing import Union, Any, Optional, Tuple
+from typing import Union, Any, Optional, Tuple, Iterator, AsyncIterator
 
 from structgenie.pydantic_v1 import BaseModel
 
@@ -180,9 +180,22 @@ class BaseValidator(ABC):
         pass
 
 
+def sum_metrics(metrics_list: list[dict]) -> dict:
+    """Sum token usage and execution time of several generations."""
+    metrics_list = [metrics for metrics in metrics_list if metrics]
+    if not metrics_list:
+        return {}
+    return {
+        **metrics_list[0],
+        "token_usage": sum(metrics.get("token_usage", 0) for metrics in metrics_list),
+        "execution_time": sum(metrics.get("execution_time", 0) for metrics in metrics_list),
+    }
+
+
 class BaseGenerationDriver(ABC):
 
     max_retries: int = 4
+    stream_metrics: Optional[dict] = None
 
     @classmethod
     def prompt_mode(cls):
@@ -220,6 +233,39 @@ class BaseGenerationDriver(ABC):
         """
         pass
 
+    def sample(self, n: int, memory: list[dict] = None, **kwargs) -> Tuple[list[str], dict]:
+        """Generate n samples for the same prompt.
+
+        Drivers without support for several samples per request generate the samples one after another.
+
+        Returns:
+            Tuple[list[str], dict]: The generated texts and the summed performance metrics.
+        """
+        results = [self.predict_and_measure(memory=memory, **kwargs) for _ in range(n)]
+        return [text for text, _ in results], sum_metrics([metrics for _, metrics in results])
+
+    async def asample(self, n: int, memory: list[dict] = None, **kwargs) -> Tuple[list[str], dict]:
+        """Generate n samples for the same prompt. (async)"""
+        import asyncio
+        results = await asyncio.gather(
+            *[self.predict_and_measure_async(memory=memory, **kwargs) for _ in range(n)]
+        )
+        return [text for text, _ in results], sum_metrics([metrics for _, metrics in results])
+
+    def stream(self, memory: list[dict] = None, **kwargs) -> Iterator[str]:
+        """Stream the generated text in chunks.
+
+        Drivers without streaming support yield the full text as a single chunk. The performance metrics of the
+        generation are set as `stream_metrics` once the stream is exhausted.
+        """
+        text, self.stream_metrics = self.predict_and_measure(memory=memory, **kwargs)
+        yield text
+
+    async def astream(self, memory: list[dict] = None, **kwargs) -> AsyncIterator[str]:
+        """Stream the generated text in chunks. (async)"""
+        text, self.stream_metrics = await self.predict_and_measure_async(memory=memory, **kwargs)
+        yield text
+
     @classmethod
     @abstractmethod
     def load_driver(cls, prompt: Union[str, Any], **kwargs):
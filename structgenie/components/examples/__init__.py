@@ -1,5 +1,7 @@
 from .shuffle_selector import ExampleSelector
+from .similarity_selector import SimilarityExampleSelector
 
 __all__ = [
-    "ExampleSelector"
+    "ExampleSelector",
+    "SimilarityExampleSelector",
 ]
@@ -1,7 +1,7 @@
-from typing import Annotated
+from typing import Annotated, Iterable
 
 from structgenie.base import BaseExample
-from structgenie.pydantic_v1 import validator
+from structgenie.pydantic_v1 import PrivateAttr, validator
 from structgenie.utils.parsing import dump_to_yaml_string, parse_yaml_string, get_type_dict_from_object
 
 
@@ -21,6 +21,10 @@ class Example(BaseExample):
     input: dict
     output: dict
     _template: str = "{input}---\n{output}"
+    _token_counts: dict = PrivateAttr(default_factory=dict)  # (template, encoding) -> token count
+
+    class Config:
+        allow_mutation = False
 
     def __str__(self):
         return self.to_string()
@@ -81,8 +85,11 @@ class Example(BaseExample):
     @property
     def token_count(self) -> int:
         """Return the total number of tokens in the input and output."""
-        from structgenie.utils.helper import count_tokens
-        return count_tokens(str(self))
+        return self.count_tokens()
+
+    def count_tokens(self, template: str = None, model: str = None) -> int:
+        """Return the number of tokens of the example rendered with the template, cached per template and encoding."""
+        return count_example_tokens([self], template=template, model=model)[0]
 
     @property
     def input_keys(self):
@@ -95,3 +102,17 @@ class Example(BaseExample):
     @property
     def input_types(self):
         return get_type_dict_from_object(self.input)
+
+
+def count_example_tokens(examples: Iterable[Example], template: str = None, model: str = None) -> list[int]:
+    """Return the token counts of examples, encoding the examples without cached count in a single batch."""
+    from structgenie.utils.tokenizer import tokenizer_registry
+
+    examples = list(examples)
+    key = (template, tokenizer_registry.encoding_name(model))
+    missing = [example for example in examples if key not in example._token_counts]
+    if missing:
+        texts = [example.to_string(template=template) for example in missing]
+        for example, count in zip(missing, tokenizer_registry.count_batch(texts, model=model)):
+            example._token_counts[key] = count
+    return [example._token_counts[key] for example in examples]
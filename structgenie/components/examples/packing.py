@@ -0,0 +1,70 @@
+"""Select items by their token lengths within a token budget.
+
+Strategies:
+    - greedy: take items in order until the first one exceeding the budget.
+    - first_fit: take every item in order which still fits into the budget.
+    - knapsack: take the subset of items filling the budget best, earlier items are preferred on equal fill.
+
+All strategies return the positions of the selected items in order.
+"""
+
+
+def pack_greedy(lengths: list[int], budget: int) -> list[int]:
+    selected = []
+    used = 0
+    for position, length in enumerate(lengths):
+        if used + length > budget:
+            break
+        selected.append(position)
+        used += length
+    return selected
+
+
+def pack_first_fit(lengths: list[int], budget: int) -> list[int]:
+    selected = []
+    used = 0
+    for position, length in enumerate(lengths):
+        if used + length <= budget:
+            selected.append(position)
+            used += length
+            if used == budget:
+                break
+    return selected
+
+
+def pack_knapsack(lengths: list[int], budget: int) -> list[int]:
+    if budget < 0:
+        return []
+    # bit i of a state is set if a subset of the previous items has i tokens
+    mask = (1 << (budget + 1)) - 1
+    reachable = 1
+    states = []
+    for length in lengths:
+        states.append(reachable)
+        if length <= budget:
+            reachable = (reachable | (reachable << length)) & mask
+
+    target = reachable.bit_length() - 1
+    selected = []
+    for position in range(len(lengths) - 1, -1, -1):
+        if target == 0:
+            break
+        # skip the item if the previous items reach the target without it
+        if not (states[position] >> target) & 1:
+            selected.append(position)
+            target -= lengths[position]
+    return selected[::-1]
+
+
+PACKING_STRATEGIES = {
+    "greedy": pack_greedy,
+    "first_fit": pack_first_fit,
+    "knapsack": pack_knapsack,
+}
+
+
+def pack(lengths: list[int], budget: int, strategy: str = "first_fit") -> list[int]:
+    """Return the positions of the items selected within the budget by the strategy."""
+    if strategy not in PACKING_STRATEGIES:
+        raise ValueError(f"Unknown packing strategy '{strategy}', choose from {list(PACKING_STRATEGIES)}")
+    return PACKING_STRATEGIES[strategy](lengths, budget)
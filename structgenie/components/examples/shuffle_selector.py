@@ -1,8 +1,10 @@
 import random
-from typing import Union
+from typing import Any, ClassVar, Optional, Union
 
 from structgenie.base import BaseExampleSelector
-from structgenie.components.examples.base import Example
+from structgenie.components.examples.base import Example, count_example_tokens
+from structgenie.components.examples.packing import pack
+from structgenie.pydantic_v1 import PrivateAttr
 from structgenie.components.examples.load import (
     load_examples_from_string,
     load_examples_from_list,
@@ -14,12 +16,33 @@ class ExampleSelector(BaseExampleSelector):
     """Example selector class to select examples from a pool of examples.
 
     Defining different loading methods for examples as from file, from string, from list.
+
+    The examples are shuffled and packed into the token budget of the prompt by the packing strategy, see
+    `structgenie.components.examples.packing`. Token lengths of the examples are counted once. Filtering by
+    input values uses inverted indexes (input key -> value -> example positions), built lazily for the keys
+    filtered by and extended for added examples.
+
+    Attributes:
+        strategy (str): Packing strategy, one of 'first_fit', 'knapsack' or 'greedy'. Defaults to 'first_fit'.
+        seed (int, optional): Seed of the shuffle, the same pool is shuffled the same way on every call.
+            None for a new order on every call, the examples are then rendered per prompt instead of once at
+            compile time. Defaults to 0.
     """
 
     example_template: str = "{input}\n---\n{output}"
     example_splitter: str = "===\n"
 
     examples: list[Example]
+    strategy: str = "first_fit"
+    seed: Optional[int] = 0
+
+    # selection depends on the inputs, examples are selected per prompt instead of once at compile time
+    input_dependent: ClassVar[bool] = False
+
+    _lengths: list[int] = PrivateAttr(default_factory=list)
+    _lengths_token: tuple = PrivateAttr(default=None)
+    _filter_index: dict = PrivateAttr(default_factory=dict)  # key -> KeyIndex
+    _filter_index_token: int = PrivateAttr(default=None)
 
     @classmethod
     def load_examples(cls, examples: Union[str, list[Union[Example, str, dict]]]):
@@ -54,6 +77,8 @@ class ExampleSelector(BaseExampleSelector):
     def add_example(self, example: Example):
         """Add example to example pool."""
         self.examples.append(example)
+        for key_index in self._filter_index.values():
+            key_index.update(self.examples)
 
     def to_prompt(self, max_token: int = 2000, return_all: bool = False, **kwargs) -> str:
         """Return a prompt string with examples filtered by kwargs.
@@ -66,27 +91,64 @@ class ExampleSelector(BaseExampleSelector):
         """
         if return_all:
             return self._examples_to_string(self.examples)
+        return self._examples_to_string(self.select(max_token, **kwargs))
 
-        example_pool = self.filter_examples(**kwargs) if kwargs else self.examples.copy()
-        if len(example_pool) == 0:
-            return ""
-
-        random.shuffle(example_pool.copy())
+    def select(self, max_token: int = 2000, **kwargs) -> list[Example]:
+        """Select examples filtered by kwargs within the token budget.
 
-        token_count = 0
-        examples = []
-        while len(example_pool) > 0:
-            next_example = example_pool.pop(0)
-            if token_count + next_example.token_count > max_token:
-                break
-            examples.append(next_example)
-            token_count += next_example.token_count
-
-        return self._examples_to_string(examples)
+        Args:
+            max_token (int, optional): Max token length of the examples. Defaults to 2000.
+            kwargs: Keyword arguments to filter examples by.
+        """
+        pool = self._filter_indices(**kwargs) if kwargs else list(range(len(self.examples)))
+        if not pool:
+            return []
+
+        rng = random.Random(self.seed) if self.seed is not None else random
+        rng.shuffle(pool)
+
+        lengths = self.token_lengths()
+        selected = pack([lengths[index] for index in pool], max_token, self.strategy)
+        return [self.examples[pool[position]] for position in selected]
+
+    def token_lengths(self) -> list[int]:
+        """Return the token lengths of the examples, counted once and extended for added examples."""
+        token = (id(self.examples), self.example_template)
+        if token != self._lengths_token or len(self._lengths) > len(self.examples):
+            self._lengths = []
+            self._lengths_token = token
+        if len(self._lengths) < len(self.examples):
+            self._lengths.extend(
+                count_example_tokens(self.examples[len(self._lengths):], template=self.example_template)
+            )
+        return self._lengths
 
     def filter_examples(self, **kwargs) -> list[Example]:
         """Filter examples based on input kwargs."""
-        return [example for example in self.examples if example.filter(**kwargs)]
+        return [self.examples[index] for index in self._filter_indices(**kwargs)]
+
+    def _filter_indices(self, **kwargs) -> list[int]:
+        """Return the positions of the examples matching all input values, in order."""
+        if self._filter_index_token != id(self.examples):
+            self._filter_index = {}
+            self._filter_index_token = id(self.examples)
+
+        matches = []
+        for key, value in kwargs.items():
+            key_index = self._filter_index.get(key)
+            if key_index is None or key_index.size > len(self.examples):
+                key_index = self._filter_index[key] = KeyIndex(key)
+            key_index.update(self.examples)
+            matches.append(key_index.lookup(value, self.examples))
+
+        # intersect the smallest sets first
+        matches.sort(key=len)
+        positions = set(matches[0]) if matches else set(range(len(self.examples)))
+        for match in matches[1:]:
+            if not positions:
+                break
+            positions.intersection_update(match)
+        return sorted(positions)
 
     def _examples_to_string(self, examples: list[Example]) -> str:
         """Convert list of examples to string."""
@@ -98,5 +160,40 @@ class ExampleSelector(BaseExampleSelector):
     def input_keys(self):
         return self.examples[0].input_keys
 
+    @property
+    def static(self) -> bool:
+        """Whether the same examples are selected on every call, so they can be rendered once at compile time."""
+        return self.seed is not None and not self.input_dependent
+
     def __len__(self):
         return len(self.examples)
+
+
+class KeyIndex:
+    """Inverted index of the values of an input key to the positions of the examples.
+
+    Unhashable values, e.g. lists, are not indexed and compared one by one.
+    """
+
+    def __init__(self, key: str):
+        self.key = key
+        self.size = 0
+        self._positions: dict = {}  # value -> positions
+        self._unhashable: list[int] = []
+
+    def update(self, examples: list[Example]):
+        """Index the examples added since the last update."""
+        for position in range(self.size, len(examples)):
+            value = examples[position].input.get(self.key)
+            try:
+                self._positions.setdefault(value, []).append(position)
+            except TypeError:
+                self._unhashable.append(position)
+        self.size = len(examples)
+
+    def lookup(self, value: Any, examples: list[Example]) -> list[int]:
+        """Return the positions of the examples with the value for the key."""
+        try:
+            return self._positions.get(value, [])
+        except TypeError:
+            return [position for position in self._unhashable if examples[position].input.get(self.key) == value]
@@ -0,0 +1,114 @@
+import hashlib
+import os
+from typing import ClassVar, Optional
+
+from structgenie.components.examples.base import Example
+from structgenie.components.examples.packing import pack
+from structgenie.components.examples.shuffle_selector import ExampleSelector
+from structgenie.components.examples.vector_index import DEFAULT_N_FEATURES, DEFAULT_NGRAM_SIZE, SimilarityIndex
+from structgenie.pydantic_v1 import PrivateAttr
+from structgenie.utils.parsing.inputs import value_to_string
+
+
+class SimilarityExampleSelector(ExampleSelector):
+    """Example selector selecting the examples most similar to the inputs.
+
+    The inputs of the examples are indexed as hashed n-gram TF-IDF vectors in memory, see
+    `structgenie.components.examples.vector_index`, no embedding API is needed. The k most similar examples
+    are packed into the token budget of the prompt. Requires numpy.
+
+    Usage:
+        selector = SimilarityExampleSelector.from_file("examples.txt")
+        prompt = selector.to_prompt(max_token=1000, title="Dune", author="Frank Herbert")
+
+    Attributes:
+        k (int): Number of most similar examples considered for the prompt. Defaults to 4.
+        index_path (str, optional): Path of the persisted index. The index is loaded from the path if it
+            matches the examples, otherwise it is built and saved to the path.
+        n_features (int): Number of hashed features of the index. Defaults to 1024.
+        ngram_size (int): Size of the character n-grams of the index. Defaults to 3.
+    """
+
+    k: int = 4
+    index_path: Optional[str] = None
+    n_features: int = DEFAULT_N_FEATURES
+    ngram_size: int = DEFAULT_NGRAM_SIZE
+
+    _index: Optional[SimilarityIndex] = PrivateAttr(default=None)
+    _index_token: Optional[int] = PrivateAttr(default=None)
+
+    input_dependent: ClassVar[bool] = True
+
+    def add_example(self, example: Example):
+        """Add example to example pool and index."""
+        super().add_example(example)
+        if self._index is not None:
+            self._update_index()
+
+    def select(self, max_token: int = 2000, **kwargs) -> list[Example]:
+        """Select the k examples most similar to the inputs within the token budget.
+
+        Args:
+            max_token (int, optional): Max token length of the examples. Defaults to 2000.
+            kwargs: The inputs to compare the examples with.
+        """
+        if not self.examples:
+            return []
+        if not kwargs:
+            return super().select(max_token)
+
+        inputs = {key: kwargs[key] for key in self.input_keys if key in kwargs} or kwargs
+        nearest = [position for position, _ in self.index.top_k(self._input_text(inputs), self.k)]
+        lengths = self.token_lengths()
+        selected = pack([lengths[position] for position in nearest], max_token, self.strategy)
+        return [self.examples[nearest[position]] for position in selected]
+
+    # === Index ===
+
+    @property
+    def index(self) -> SimilarityIndex:
+        """The index of the example inputs, built or loaded on first use and extended for added examples."""
+        if self._index is None or self._index_token != id(self.examples) or len(self._index) > len(self.examples):
+            self._index = self._load_index() or self._build_index()
+            self._index_token = id(self.examples)
+        self._update_index()
+        return self._index
+
+    def save_index(self, path: Optional[str] = None):
+        """Save the index, to the index_path by default."""
+        path = path or self.index_path
+        if not path:
+            raise ValueError("No path given to save the index to.")
+        self.index.save(path, fingerprint=self._fingerprint())
+
+    def _build_index(self) -> SimilarityIndex:
+        index = SimilarityIndex(n_features=self.n_features, ngram_size=self.ngram_size)
+        index.add_batch([self._input_text(example.input) for example in self.examples])
+        if self.index_path:
+            index.save(self.index_path, fingerprint=self._fingerprint())
+        return index
+
+    def _load_index(self) -> Optional[SimilarityIndex]:
+        if not self.index_path or not os.path.exists(self.index_path):
+            return None
+        index, fingerprint = SimilarityIndex.load(self.index_path)
+        if (fingerprint != self._fingerprint(len(index))
+                or index.n_features != self.n_features or index.ngram_size != self.ngram_size):
+            return None
+        return index
+
+    def _update_index(self):
+        if len(self._index) < len(self.examples):
+            self._index.add_batch([self._input_text(example.input) for example in self.examples[len(self._index):]])
+
+    def _fingerprint(self, size: int = None) -> str:
+        """Fingerprint of the inputs of the first size examples."""
+        digest = hashlib.sha1()
+        for example in self.examples[:size]:
+            digest.update(self._input_text(example.input).encode("utf-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    @staticmethod
+    def _input_text(inputs: dict) -> str:
+        return "\n".join(f"{key}: {value_to_string(value)}" for key, value in inputs.items())
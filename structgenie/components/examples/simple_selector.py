@@ -1,7 +1,7 @@
 from typing import Union
 
 from structgenie.base import BaseExampleSelector
-from structgenie.components.examples.base import Example
+from structgenie.components.examples.base import Example, count_example_tokens
 from structgenie.components.examples.load import (
     load_examples_from_string,
     load_examples_from_list,
@@ -72,12 +72,11 @@ class ExampleSelector(BaseExampleSelector):
 
         token_count = 0
         examples = []
-        while len(example_pool) > 0:
-            next_example = example_pool.pop(0)
-            if token_count + next_example.token_count > max_token:
+        for next_example, next_token_count in zip(example_pool, count_example_tokens(example_pool)):
+            if token_count + next_token_count > max_token:
                 break
             examples.append(next_example)
-            token_count += next_example.token_count
+            token_count += next_token_count
 
         return self._examples_to_string(examples)
 
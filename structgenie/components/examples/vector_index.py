@@ -0,0 +1,145 @@
+"""In-memory vector index over hashed n-gram TF-IDF vectors of texts.
+
+Texts are split into words and character n-grams, which are hashed into a fixed number of features, so the index
+needs no vocabulary and texts can be added incrementally. Term frequencies are stored per text, inverse document
+frequencies are applied at query time, so the weights of earlier texts stay correct when texts are added.
+Nearest texts are found by cosine similarity with a single matrix-vector product.
+"""
+import re
+import zlib
+from typing import Optional
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, only required for similarity selection
+    np = None
+
+DEFAULT_N_FEATURES = 1024
+DEFAULT_NGRAM_SIZE = 3
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+def _require_numpy():
+    if np is None:
+        raise ImportError("To use the similarity index, you need to install numpy.")
+
+
+def text_features(text: str, ngram_size: int = DEFAULT_NGRAM_SIZE) -> list[str]:
+    """Return the words and character n-grams of the words of a text."""
+    features = []
+    for word in _WORD_PATTERN.findall(text.lower()):
+        features.append(word)
+        padded = f" {word} "
+        features.extend(padded[i:i + ngram_size] for i in range(len(padded) - ngram_size + 1))
+    return features
+
+
+class SimilarityIndex:
+    """Index of hashed n-gram TF-IDF vectors.
+
+    Args:
+        n_features (int, optional): Number of hashed features. Defaults to 1024.
+        ngram_size (int, optional): Size of the character n-grams. Defaults to 3.
+    """
+
+    def __init__(self, n_features: int = DEFAULT_N_FEATURES, ngram_size: int = DEFAULT_NGRAM_SIZE):
+        _require_numpy()
+        self.n_features = n_features
+        self.ngram_size = ngram_size
+        self._tf = np.zeros((0, n_features), dtype=np.float32)
+        self._df = np.zeros(n_features, dtype=np.float32)
+        self._size = 0
+        self._weights = None  # idf weights and row norms, reset when texts are added
+
+    def __len__(self):
+        return self._size
+
+    # === Vectorize ===
+
+    def vectorize(self, text: str) -> "np.ndarray":
+        """Return the log scaled hashed term frequencies of a text."""
+        vector = np.zeros(self.n_features, dtype=np.float32)
+        for feature in text_features(text, self.ngram_size):
+            vector[zlib.crc32(feature.encode("utf-8")) % self.n_features] += 1
+        return np.log1p(vector, out=vector)
+
+    # === Update ===
+
+    def add(self, text: str):
+        self.add_batch([text])
+
+    def add_batch(self, texts: list[str]):
+        """Add texts to the index, rows are kept in order of addition."""
+        if not texts:
+            return
+        rows = np.stack([self.vectorize(text) for text in texts])
+        needed = self._size + len(rows)
+        if needed > len(self._tf):
+            # grow the matrix geometrically, so adding single texts is amortized constant time
+            grown = np.zeros((max(needed, 2 * len(self._tf)), self.n_features), dtype=np.float32)
+            grown[:self._size] = self._tf[:self._size]
+            self._tf = grown
+        self._tf[self._size:needed] = rows
+        self._df += (rows > 0).sum(axis=0)
+        self._size = needed
+        self._weights = None
+
+    # === Query ===
+
+    def _get_weights(self) -> tuple["np.ndarray", "np.ndarray"]:
+        if self._weights is None:
+            idf = np.log((1 + self._size) / (1 + self._df)) + 1
+            norms = np.sqrt((self._tf[:self._size] ** 2) @ (idf ** 2))
+            norms[norms == 0] = 1
+            self._weights = (idf.astype(np.float32), norms.astype(np.float32))
+        return self._weights
+
+    def scores(self, text: str) -> "np.ndarray":
+        """Return the cosine similarity of the text to each indexed text."""
+        if not self._size:
+            return np.zeros(0, dtype=np.float32)
+        idf, norms = self._get_weights()
+        query = self.vectorize(text) * idf
+        query_norm = np.linalg.norm(query) or 1
+        # tf rows weighted by idf once more, as both the rows and the query are tf-idf vectors, only the
+        # few features of the query are multiplied
+        features = np.flatnonzero(query)
+        return (self._tf[:self._size, features] @ (query[features] * idf[features])) / (norms * query_norm)
+
+    def top_k(self, text: str, k: int) -> list[tuple[int, float]]:
+        """Return the positions and scores of the k most similar texts, most similar first."""
+        scores = self.scores(text)
+        if not len(scores) or k <= 0:
+            return []
+        k = min(k, len(scores))
+        candidates = np.argpartition(-scores, k - 1)[:k]
+        # stable order: higher score first, earlier text first on equal scores
+        ordered = sorted(candidates.tolist(), key=lambda position: (-scores[position], position))
+        return [(position, float(scores[position])) for position in ordered]
+
+    # === Persistence ===
+
+    def save(self, path: str, fingerprint: Optional[str] = None):
+        """Save the index to a numpy .npz file, the fingerprint identifies the indexed texts."""
+        with open(path, "wb") as file:
+            np.savez(
+                file,
+                tf=self._tf[:self._size],
+                df=self._df,
+                n_features=self.n_features,
+                ngram_size=self.ngram_size,
+                fingerprint=fingerprint or "",
+            )
+
+    @classmethod
+    def load(cls, path: str) -> tuple["SimilarityIndex", str]:
+        """Load an index saved with `save`, returns the index and its fingerprint."""
+        _require_numpy()
+        with np.load(path) as data:
+            index = cls(n_features=int(data["n_features"]), ngram_size=int(data["ngram_size"]))
+            index._tf = data["tf"].astype(np.float32)
+            index._df = data["df"].astype(np.float32)
+            index._size = len(index._tf)
+            fingerprint = str(data["fingerprint"])
+        return index, fingerprint
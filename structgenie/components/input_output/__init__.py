@@ -4,7 +4,8 @@ from structgenie.components.input_output.input_schema import load_input_schema,
     parse_schema_from_template
 from structgenie.components.input_output.load import load_output_model, init_output_model, init_input_model, \
     load_input_model
-from structgenie.components.input_output.output_schema import build_output_schema
+from structgenie.components.input_output.output_schema import build_output_schema, schema_placeholders, \
+    output_model_fingerprint
 
 __all__ = [
     "OutputModel",
@@ -14,5 +15,7 @@ __all__ = [
     "init_input_model",
     "load_input_model",
     "parse_schema_from_template",
-    "build_output_schema"
+    "build_output_schema",
+    "schema_placeholders",
+    "output_model_fingerprint",
 ]
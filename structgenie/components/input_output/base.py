@@ -1,5 +1,9 @@
+import copy
 from abc import abstractmethod
 from enum import Enum
+from typing import Optional
+
+from structgenie.pydantic_v1 import PrivateAttr
 
 from structgenie.base import BaseExampleSelector, BaseIOModel
 from structgenie.components.input_output.line import IOLine
@@ -13,8 +17,20 @@ class IOFormatType(str, Enum):
 
 
 class IOModel(BaseIOModel):
+    """Model of the input or output lines.
+
+    Lookups by key use an index of the lines and nested lookups a tree of the dotted keys, `as_dict` and the
+    nested views are cached. Caches are rebuilt when lines are replaced, added or removed and when fields of a
+    line are assigned. The cached dicts are shared, treat them as read-only and call `invalidate_cache` after
+    changing a mutable field of a line in place, e.g. appending to its options.
+    """
     lines: list[IOLine]
 
+    _cache_token: Optional[tuple] = PrivateAttr(default=None)
+    _index: dict = PrivateAttr(default_factory=dict)
+    _descendants: dict = PrivateAttr(default_factory=dict)
+    _cache: dict = PrivateAttr(default_factory=dict)
+
     # === class methods ===
 
     @classmethod
@@ -38,7 +54,10 @@ class IOModel(BaseIOModel):
 
     @property
     def as_dict(self):
-        return {attribute.key: attribute.value for attribute in self.lines}
+        cache = self._get_cache()
+        if "as_dict" not in cache:
+            cache["as_dict"] = {attribute.key: attribute.value for attribute in self.lines}
+        return cache["as_dict"]
 
     def to_string(self, format_type: IOFormatType, custom_input_template: str = None):
 
@@ -54,7 +73,10 @@ class IOModel(BaseIOModel):
         raise ValueError(f"Invalid format type: {format}")
 
     def keys(self) -> list[str]:
-        return [attribute.key for attribute in self.lines]
+        cache = self._get_cache()
+        if "keys" not in cache:
+            cache["keys"] = [attribute.key for attribute in self.lines]
+        return list(cache["keys"])
 
     def values(self) -> list[str]:
         return [attribute.value for attribute in self.lines]
@@ -66,30 +88,36 @@ class IOModel(BaseIOModel):
     # === getters ===
 
     def get(self, key):
-        return next((attribute for attribute in self.lines if attribute.key == key), None)
+        self._get_cache()
+        return self._index.get(key)
 
     def get_nested_dict(self, key: str, full_key: bool = True, **kwargs) -> dict:
         """Get nested attributes and replace key with value it kwargs are provided"""
+        cache_key = ("nested_dict", key, full_key)
+        cache = self._get_cache()
+        if not kwargs and cache_key in cache:
+            return cache[cache_key]
 
-        data = {
-            attribute.key: attribute.value for attribute in self.lines
-            if attribute.key.startswith(key)
-        }
-
-        info = data.pop(key)
-        data["_info"] = {"key": key, **info}
+        as_dict = self.as_dict
+        data = {attribute.key: as_dict[attribute.key] for attribute in self.get_nested_attr(key, exclude_parent=True)}
+        data["_info"] = {"key": key, **as_dict[key]}
 
         if kwargs:
-            data = replace_placeholder_in_dict(data, **kwargs)
+            # the line dicts are shared with the cached as_dict, replace on copies
+            data = replace_placeholder_in_dict(copy.deepcopy(data), **kwargs)
 
-        if full_key:
-            return data
-        return {k.replace(f"{key}.", ""): v for k, v in data.items()}
+        if not full_key:
+            data = {k.replace(f"{key}.", ""): v for k, v in data.items()}
+        if not kwargs:
+            cache[cache_key] = data
+        return data
 
     def get_nested_attr(self, key: str, exclude_parent: bool = False):
-        if exclude_parent:
-            return [attribute for attribute in self.lines if attribute.key.startswith(f"{key}.")]
-        return [attribute for attribute in self.lines if attribute.key.startswith(key)]
+        self._get_cache()
+        nested = self._descendants.get(key, [])
+        if exclude_parent or key not in self._index:
+            return list(nested)
+        return [self._index[key]] + nested
 
     def get_default(self, key: str, **kwargs):
         attr = self.get(key)
@@ -106,3 +134,30 @@ class IOModel(BaseIOModel):
 
     def __len__(self):
         return len(self.lines)
+
+    # === cache ===
+
+    def invalidate_cache(self):
+        """Drop the index and cached views, e.g. after changing a line in place."""
+        self._cache_token = None
+
+    def version_token(self) -> tuple:
+        """Versions of the lines, changes when a line is added, replaced or a field of a line is assigned."""
+        return tuple(getattr(attribute, "version", id(attribute)) for attribute in self.lines)
+
+    def _get_cache(self) -> dict:
+        """Return the cache, rebuilding the index and the key tree if the lines changed."""
+        token = self.version_token()
+        if token != self._cache_token:
+            index = {}
+            descendants = {}
+            for attribute in self.lines:
+                index.setdefault(attribute.key, attribute)
+                parts = attribute.key.split(".")
+                for i in range(1, len(parts)):
+                    descendants.setdefault(".".join(parts[:i]), []).append(attribute)
+            self._index = index
+            self._descendants = descendants
+            self._cache = {}
+            self._cache_token = token
+        return self._cache
@@ -1,6 +1,7 @@
+import itertools
 from typing import Optional, Union
 
-from structgenie.pydantic_v1 import validator, root_validator
+from structgenie.pydantic_v1 import PrivateAttr, validator, root_validator
 
 from structgenie.base import BaseIOLine
 from structgenie.utils.parsing import parse_type_from_string
@@ -27,6 +28,9 @@ TYPE_NOTATION_TEMPLATE = "{prompt_key}: <{type}{kwargs}>"
 
 HIDDEN_TYPES = ["image", "file"]
 
+# versions of lines are unique over all lines, so a tuple of versions identifies the lines and their state
+_line_versions = itertools.count()
+
 class IOLine(BaseIOLine):
     """Represents an input or output line in the final prompt/output."""
     key: str
@@ -41,6 +45,18 @@ class IOLine(BaseIOLine):
     hidden: bool = False
     description: Optional[str] = None
 
+    _version: int = PrivateAttr(default_factory=lambda: next(_line_versions))
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name in self.__fields__:
+            object.__setattr__(self, "_version", next(_line_versions))
+
+    @property
+    def version(self) -> int:
+        """Version of the line, changes when a field is assigned."""
+        return self._version
+
     # === validators ===
 
     @root_validator(pre=True)
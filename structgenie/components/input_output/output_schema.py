@@ -1,3 +1,6 @@
+import hashlib
+import json
+import re
 from typing import Union
 
 from structgenie.base import BaseIOModel, BaseIOLine
@@ -76,6 +79,30 @@ def build_output_schema(
     return output
 
 
+def schema_placeholders(output_model: BaseIOModel) -> tuple[str, ...]:
+    """Return the input placeholders the output schema of the output model depends on.
+
+    Placeholders in keys, rules, defaults and options are replaced by build_output_schema with the input values,
+    all other inputs have no effect on the built schema.
+    """
+    placeholders = []
+    for attr in output_model.lines:
+        values = [attr.key, attr.rule, attr.default] + list(attr.options or [])
+        for value in values:
+            if not isinstance(value, str):
+                continue
+            for placeholder in re.findall(r"{(.*?)}", value, re.DOTALL):
+                if placeholder not in placeholders:
+                    placeholders.append(placeholder)
+    return tuple(placeholders)
+
+
+def output_model_fingerprint(output_model: BaseIOModel) -> str:
+    """Hash the lines of an output model, equal models have equal fingerprints."""
+    lines = [line.dict() for line in output_model.lines]
+    return hashlib.sha1(json.dumps(lines, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
 def _replace_dict_from_inputs(inputs: dict, replace_dict: dict = None) -> dict:
     replace_dict = replace_dict or {}
     replace_dict.update({f"{{{k}}}": v for k, v in inputs.items()})
@@ -85,13 +112,11 @@ def _replace_dict_from_inputs(inputs: dict, replace_dict: dict = None) -> dict:
 def _output_item_value(attr: BaseIOLine, replace_dict: dict = None) -> str:
     string = f"<{attr.type}"
     if attr.options:
-        if None in attr.options:
-            attr.options.remove(None)
-            attr.options.append("None")
+        options = [option for option in attr.options if option is not None]
+        if len(options) < len(attr.options):
+            options.append("None")
         if attr.type == "str":
-            options = [f"'{x.strip()}'" for x in attr.options]
-        else:
-            options = attr.options
+            options = [f"'{x.strip()}'" for x in options]
         string += f", options=[{', '.join(options)}]"
         if attr.multiple_select:
             string += ", multiple_select=True"
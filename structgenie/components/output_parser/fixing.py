@@ -1,7 +1,8 @@
 import re
 
-from structgenie.components.input_output import OutputModel
+from structgenie.components.input_output import OutputModel, output_model_fingerprint
 from structgenie.errors import ParsingPartialError, ParsingFixingError, MultilineParsingError
+from structgenie.utils.cache import LRUCache
 from structgenie.utils.parsing import parse_multi_line_string, format_as_key, parse_yaml_string
 
 
@@ -53,17 +54,46 @@ def fix_split_output(text: str, output_model: OutputModel) -> dict:
     return output
 
 
-# TODO: add logic for passing run_metrics to calling engine
-def llm_output_fixing_partial(error_msg: str, key: str, output_model: OutputModel, debug: bool = False) -> dict:
-    from structgenie.engine import StructEngine
-
-    partial_output_model = OutputModel(lines=[
-        line for line in output_model.lines if line.key == key or line.key.startswith(f"{key}.")
+def partial_output_model(output_model: OutputModel, keys: list[str]) -> OutputModel:
+    """Build an output model with the top level keys and their nested keys only."""
+    return OutputModel(lines=[
+        line for line in output_model.lines
+        if any(line.key == key or line.key.startswith(f"{key}.") for key in keys)
     ])
 
-    engine = StructEngine.from_defaults("fix_partial_parsing", output_model=partial_output_model, debug=debug)
-    engine.fix_parsing_by_llm = False
-    engine.return_metrics = True
+
+FIXING_ENGINES_CACHE_SIZE = 64
+_fixing_engines = LRUCache(max_size=FIXING_ENGINES_CACHE_SIZE)
+
+
+def load_fixing_engine(template_name: str, output_model: OutputModel, engine_cls: type = None, debug: bool = False):
+    """Load a compiled fixing engine from the default template for the output model.
+
+    Engines are cached per (template, engine class, output model fingerprint, debug). Cached engines are shared
+    by concurrent fixing runs, which is safe as long as runs do not keep state on the engine: the run state is
+    kept in a RunContext, output parsers are created per run and validators keep their state per validate call.
+    """
+    if engine_cls is None:
+        from structgenie.engine import StructEngine
+        engine_cls = StructEngine
+
+    key = (template_name, engine_cls, output_model_fingerprint(output_model), debug)
+    engine = _fixing_engines.get(key)
+    if engine is None:
+        engine = engine_cls.from_defaults(
+            template_name,
+            output_model=output_model,
+            debug=debug,
+            fix_parsing_by_llm=False,
+            return_metrics=True,
+        )
+        _fixing_engines.set(key, engine)
+    return engine
+
+
+# TODO: add logic for passing run_metrics to calling engine
+def llm_output_fixing_partial(error_msg: str, key: str, output_model: OutputModel, debug: bool = False) -> dict:
+    engine = load_fixing_engine("fix_partial_parsing", partial_output_model(output_model, [key]), debug=debug)
     try:
         return engine.run(inputs=dict(error_str=error_msg))
     except Exception as e:
@@ -71,13 +101,36 @@ def llm_output_fixing_partial(error_msg: str, key: str, output_model: OutputMode
 
 
 def llm_output_fixing(text: str, output_model: OutputModel, debug: bool = False) -> dict:
-    from structgenie.engine import StructEngine
+    fixing_engine = load_fixing_engine("fix_parsing_error", output_model, debug=debug)
+    try:
+        return fixing_engine.run(inputs=dict(last_output=text))
+    except Exception as e:
+        raise ParsingFixingError(f"Error while fixing parsing by llm error: {e}")
+
 
-    fixing_engine = StructEngine.from_defaults("fix_parsing_error", output_model=output_model, debug=debug)
-    fixing_engine.fix_parsing_by_llm = False
-    fixing_engine.return_metrics = True
+async def allm_output_fixing_partial(
+        error_msg: str,
+        key: str,
+        output_model: OutputModel,
+        debug: bool = False) -> dict:
+    """Fix a partial parsing error with an async engine, see llm_output_fixing_partial."""
+    from structgenie.engine.async_engine import AsyncEngine
 
+    engine = load_fixing_engine(
+        "fix_partial_parsing", partial_output_model(output_model, [key]), engine_cls=AsyncEngine, debug=debug
+    )
     try:
-        return fixing_engine.run(inputs=dict(last_output=text))
+        return await engine.run(inputs=dict(error_str=error_msg))
+    except Exception as e:
+        raise ParsingFixingError(f"Error while fixing partial parsing error for key '{key}'. Error: {e}")
+
+
+async def allm_output_fixing(text: str, output_model: OutputModel, debug: bool = False) -> dict:
+    """Fix a parsing error with an async engine, see llm_output_fixing."""
+    from structgenie.engine.async_engine import AsyncEngine
+
+    fixing_engine = load_fixing_engine("fix_parsing_error", output_model, engine_cls=AsyncEngine, debug=debug)
+    try:
+        return await fixing_engine.run(inputs=dict(last_output=text))
     except Exception as e:
         raise ParsingFixingError(f"Error while fixing parsing by llm error: {e}")
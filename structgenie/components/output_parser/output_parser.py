@@ -1,27 +1,42 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+
 from structgenie.components.input_output import OutputModel
 from structgenie.components.output_parser.fixing import fix_multiline_output, fix_split_output, \
-    llm_output_fixing_partial, llm_output_fixing
+    llm_output_fixing_partial, llm_output_fixing, allm_output_fixing_partial, allm_output_fixing
 from structgenie.errors import ParsingPartialError, MultilineParsingError, YamlParsingError
 from structgenie.utils.operator.default import parse_default
 from structgenie.utils.parsing import parse_yaml_string, format_as_key
 
+DEFAULT_MAX_FIX_CONCURRENCY = 4
+
 
 class OutputParser:
     """Parse generation output according to the output model into a dict structure."""
 
     def __init__(self, output_model: OutputModel, fix_by_llm: bool = True, fix_partial_by_llm: bool = True,
-                 debug: bool = False):
+                 debug: bool = False, max_fix_concurrency: int = DEFAULT_MAX_FIX_CONCURRENCY):
+        if max_fix_concurrency < 1:
+            raise ValueError(f"max_fix_concurrency must be at least 1, got {max_fix_concurrency}")
         self.output_model = output_model
         self.error_log = []
         self.run_metrics = []
 
         self.fix_by_llm = fix_by_llm
         self.fix_partial_by_llm = fix_partial_by_llm
+        self.max_fix_concurrency = max_fix_concurrency
         self.debug = debug
 
     def parse(self, text: str, inputs: dict) -> tuple[dict, list, list]:
-
         output = self.parse_to_dict(text)
+        return self._finish_parsing(output, inputs)
+
+    async def aparse(self, text: str, inputs: dict) -> tuple[dict, list, list]:
+        """Parse the generation output like parse, running LLM fixing with async engines."""
+        output = await self.aparse_to_dict(text)
+        return self._finish_parsing(output, inputs)
+
+    def _finish_parsing(self, output: dict, inputs: dict) -> tuple[dict, list, list]:
         output = self._prefix_output(output)
         output = self._parse_defaults(output, inputs)
 
@@ -48,6 +63,17 @@ class OutputParser:
             except Exception as e:
                 self.error_log.append(YamlParsingError(str(e)))
 
+    async def aparse_to_dict(self, text: str) -> dict:
+        """Parse the generation text output into a dict structure. (async)"""
+        try:
+            return parse_yaml_string(text)
+        except Exception as e:
+            self._debug("Yaml parsing error", str(e))
+            try:
+                return await self.afixing_parser(text)
+            except Exception as e:
+                self.error_log.append(YamlParsingError(str(e)))
+
     def fixing_parser(self, text: str) -> dict:
         try:
             return self._fixing_parser(text)
@@ -59,15 +85,40 @@ class OutputParser:
                 self.run_metrics.append(run_metrics)
                 return output
 
+    async def afixing_parser(self, text: str) -> dict:
+        try:
+            return await self._afixing_parser(text)
+        except Exception as e:
+            self._debug("Fixing failed", str(e))
+            if self.fix_by_llm:
+                self._debug("Fixing failed", "Try LLM parsing")
+                output, run_metrics = await allm_output_fixing(text, self.output_model, debug=self.debug)
+                self.run_metrics.append(run_metrics)
+                return output
+
     def _fixing_parser(self, text: str) -> dict:
         """Run fixing logic to fix parsing error."""
+        output, partial_errors = self._split_parsing(text)
+        if partial_errors:
+            self._merge_partial_fixes(output, partial_errors, self._fix_partial_by_llm(partial_errors))
+        return output
+
+    async def _afixing_parser(self, text: str) -> dict:
+        """Run fixing logic to fix parsing error. (async)"""
+        output, partial_errors = self._split_parsing(text)
+        if partial_errors:
+            self._merge_partial_fixes(output, partial_errors, await self._afix_partial_by_llm(partial_errors))
+        return output
+
+    def _split_parsing(self, text: str) -> tuple[dict, list[tuple[str, ParsingPartialError]]]:
+        """Parse multiline or split output and return the keys which need to be fixed by llm."""
 
         if any(line.multiline for line in self.output_model.lines):
             self._debug(
                 "Multiline", "Try Multiline parsing"
             )
             try:
-                return fix_multiline_output(text, self.output_model)
+                return fix_multiline_output(text, self.output_model), []
             except MultilineParsingError as e:
                 self._debug(
                     "Multiline", str(e)
@@ -80,26 +131,74 @@ class OutputParser:
             "Try Split Partial parsing"
         )
 
-        if any(isinstance(value, ParsingPartialError) for value in output.values()):
-            for key, value in output.items():
-                if isinstance(value, ParsingPartialError):
-                    self._debug(
-                        "Split Partial Parsing",
-                        f"ParsingPartialError for '{format_as_key(key)}'"
-                    )
-                    self.error_log.append(value)
-                    if self.fix_partial_by_llm:
-                        self._debug(
-                            "Split Partial Parsing",
-                            f"Try LLM Partial parsing for '{format_as_key(key)}'"
-                        )
-                        _value, _run_metrics = llm_output_fixing_partial(str(value), key, self.output_model,
-                                                                         debug=self.debug)
-                        self.run_metrics.append(_run_metrics)
-                        output[key] = _value[key]
-                    else:
-                        raise ParsingPartialError(f"Error while parsing output for key '{format_as_key(key)}'.")
-        return output
+        partial_errors = [(key, value) for key, value in output.items() if isinstance(value, ParsingPartialError)]
+        for key, value in partial_errors:
+            self._debug(
+                "Split Partial Parsing",
+                f"ParsingPartialError for '{format_as_key(key)}'"
+            )
+            self.error_log.append(value)
+
+        if partial_errors and not self.fix_partial_by_llm:
+            key = partial_errors[0][0]
+            raise ParsingPartialError(f"Error while parsing output for key '{format_as_key(key)}'.")
+
+        return output, partial_errors
+
+    def _merge_partial_fixes(self, output: dict, partial_errors: list, results: list):
+        """Merge the fixed values in key order, independent of the order the fixes finish."""
+        for (key, _), (_value, _run_metrics) in zip(partial_errors, results):
+            self.run_metrics.append(_run_metrics)
+            output[key] = _value[key]
+
+    def _fix_partial_by_llm(self, partial_errors: list[tuple[str, ParsingPartialError]]) -> list:
+        """Fix the partial parsing errors by llm, running up to max_fix_concurrency fixes at the same time.
+
+        If a fix fails, the fixes not started yet are cancelled.
+        """
+
+        def _fix(item: tuple[str, ParsingPartialError]):
+            key, error = item
+            self._debug(
+                "Split Partial Parsing",
+                f"Try LLM Partial parsing for '{format_as_key(key)}'"
+            )
+            return llm_output_fixing_partial(str(error), key, self.output_model, debug=self.debug)
+
+        max_workers = min(self.max_fix_concurrency, len(partial_errors))
+        if max_workers <= 1:
+            return [_fix(item) for item in partial_errors]
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = [executor.submit(_fix, item) for item in partial_errors]
+            try:
+                return [future.result() for future in futures]
+            finally:
+                for future in futures:
+                    future.cancel()
+
+    async def _afix_partial_by_llm(self, partial_errors: list[tuple[str, ParsingPartialError]]) -> list:
+        """Fix the partial parsing errors by llm, running up to max_fix_concurrency fixes at the same time. (async)
+
+        If a fix fails, the other fixes are cancelled.
+        """
+        semaphore = asyncio.Semaphore(self.max_fix_concurrency)
+
+        async def _fix(item: tuple[str, ParsingPartialError]):
+            key, error = item
+            async with semaphore:
+                self._debug(
+                    "Split Partial Parsing",
+                    f"Try LLM Partial parsing for '{format_as_key(key)}'"
+                )
+                return await allm_output_fixing_partial(str(error), key, self.output_model, debug=self.debug)
+
+        tasks = [asyncio.ensure_future(_fix(item)) for item in partial_errors]
+        try:
+            return list(await asyncio.gather(*tasks))
+        finally:
+            for task in tasks:
+                task.cancel()
 
     def _prefix_output(self, output: any) -> dict:
         """Prefix the output with the output prefix if defined."""
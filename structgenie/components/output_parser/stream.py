@@ -0,0 +1,79 @@
+import re
+
+from structgenie.components.input_output import OutputModel
+from structgenie.components.output_parser.fixing import fix_split_output
+from structgenie.errors import ParsingPartialError
+from structgenie.utils.parsing import format_as_key
+
+
+class StreamingOutputParser:
+    """Incrementally parse a streamed generation output into top level keys of the output model.
+
+    A top level key is complete as soon as the next top level key starts. Completed keys are parsed like
+    in the split partial parsing of the OutputParser, keys failing to parse are left to the final parse of
+    the full text.
+
+    Usage:
+        parser = StreamingOutputParser(output_model)
+        for chunk in driver.stream(**inputs):
+            completed = parser.feed(chunk)
+        completed = parser.close()
+    """
+
+    def __init__(self, output_model: OutputModel):
+        self.output_model = output_model
+        self.text = ""
+        self.completed = {}
+
+        self._top_level_keys = {
+            format_as_key(line.key): line.key for line in output_model.lines if "." not in line.key
+        }
+        self._key_pattern = re.compile(
+            r"^({}):".format("|".join(re.escape(key) for key in self._top_level_keys)), re.MULTILINE
+        ) if self._top_level_keys else None
+
+        self._line_start = 0  # start of the first line not scanned for a key yet
+        self._current = None  # (key, start) of the key which value is streamed
+
+    def feed(self, chunk: str) -> dict:
+        """Add a chunk of the generation and return the top level keys completed by it."""
+        self.text += chunk
+        last_newline = self.text.rfind("\n")
+        if last_newline < self._line_start:
+            return {}
+
+        completed = {}
+        scan_end = last_newline + 1
+        for match in self._iter_keys(self._line_start, scan_end):
+            if self._current:
+                completed.update(self._parse_segment(self._current[1], match.start()))
+            self._current = (self._top_level_keys[match.group(1)], match.start())
+        self._line_start = scan_end
+        return completed
+
+    def close(self) -> dict:
+        """Finish the stream and return the remaining completed keys."""
+        completed = {}
+        for match in self._iter_keys(self._line_start, len(self.text)):
+            if self._current:
+                completed.update(self._parse_segment(self._current[1], match.start()))
+            self._current = (self._top_level_keys[match.group(1)], match.start())
+        if self._current:
+            completed.update(self._parse_segment(self._current[1], len(self.text)))
+        self._current = None
+        self._line_start = len(self.text)
+        return completed
+
+    def _iter_keys(self, start: int, end: int):
+        if self._key_pattern is None:
+            return iter(())
+        return self._key_pattern.finditer(self.text, start, end)
+
+    def _parse_segment(self, start: int, end: int) -> dict:
+        segment = self.text[start:end].strip().rstrip("`").rstrip()
+        parsed = {
+            key: value for key, value in fix_split_output(segment, self.output_model).items()
+            if not isinstance(value, ParsingPartialError) and key not in self.completed
+        }
+        self.completed.update(parsed)
+        return parsed
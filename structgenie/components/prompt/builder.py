@@ -1,8 +1,14 @@
+import json
 from typing import Union
 
 from structgenie.base import BasePromptBuilder, BaseIOModel
 from structgenie.components.examples.shuffle_selector import ExampleSelector
-from structgenie.components.input_output import init_input_model, init_output_model, build_output_schema
+from structgenie.components.input_output import (
+    init_input_model,
+    init_output_model,
+    build_output_schema,
+    schema_placeholders
+)
 from structgenie.components.prompt._templates import (
     DEFAULT_TEMPLATE,
     DEFAULT_SCHEMA_TEMPLATE,
@@ -10,8 +16,12 @@ from structgenie.components.prompt._templates import (
     ERROR_TEMPLATE,
     CHAT_TEMPLATE, CHAT_TEMPLATE_ON_ERROR
 )
+from structgenie.components.prompt.plan import PromptPlan
+from structgenie.utils.cache import LRUCache
 from structgenie.utils.parsing import replace_placeholder, parse_section_placeholder, dump_to_yaml_string
 
+FORMAT_CACHE_SIZE = 128
+
 
 class PromptBuilder(BasePromptBuilder):
     """Prompt Builder class"""
@@ -36,6 +46,11 @@ class PromptBuilder(BasePromptBuilder):
         self._set_remarks_tags = kwargs.get("set_remarks_tags", True)
         self.chat_mode = kwargs.get("chat_mode", False)
 
+        # rendered format instructions per values of the placeholders they depend on
+        self._format_cache = LRUCache(max_size=FORMAT_CACHE_SIZE)
+        self._format_cache_token = None
+        self._format_placeholders = ()
+
         self._init_templates(**kwargs)
 
     def _init_templates(self, **kwargs):
@@ -77,12 +92,84 @@ class PromptBuilder(BasePromptBuilder):
         else:
             template = self.prompt_template
         template = self._prep_instruction(template)
-        template = self._prep_examples(template)
+        template = self._prep_examples(template, **(kwargs if self.input_dependent_examples else {}))
         template = self._prep_format_instructions(template, **kwargs)
         template = self._prep_remarks(template, error, remarks, last_output)
         # template = self._prep_inputs(template)
         return template
 
+    def compile(self, chat_mode: bool = False) -> PromptPlan:
+        """Compile the input independent sections of the prompt into a PromptPlan.
+
+        Changes to the builder after compiling are not reflected in the returned plan.
+        """
+        if chat_mode:
+            self.chat_mode = True
+
+        if self.chat_mode:
+            templates = [self.chat_template, self.chat_template_on_error]
+        else:
+            templates = [self.prompt_template, self.prompt_template]
+
+        static_format = not self.format_placeholders
+        static_examples = self.static_examples
+        compiled = []
+        for template in templates:
+            template = self._prep_instruction(template)
+            if static_examples:
+                template = self._prep_examples(template)
+            if static_format:
+                template = self._prep_format_instructions(template)
+            compiled.append(template)
+
+        return PromptPlan(
+            builder=self,
+            chat_mode=self.chat_mode,
+            template=compiled[0],
+            template_on_error=compiled[1],
+            static_format=static_format,
+            static_examples=static_examples
+        )
+
+    @property
+    def input_dependent_examples(self) -> bool:
+        """Whether the examples are selected by the inputs, e.g. by similarity."""
+        return getattr(self.examples, "input_dependent", False)
+
+    @property
+    def static_examples(self) -> bool:
+        """Whether the examples are the same for every prompt, e.g. not selected by the inputs or shuffled anew."""
+        return getattr(self.examples, "static", True)
+
+    @property
+    def format_placeholders(self) -> tuple[str, ...]:
+        """Input placeholders the format instructions depend on."""
+        self._check_format_cache()
+        return self._format_placeholders
+
+    def _find_format_placeholders(self) -> tuple[str, ...]:
+        return schema_placeholders(self.output_model)
+
+    def _format_cache_state(self) -> tuple:
+        """State the format instructions depend on besides the inputs, changes reset the format cache.
+
+        The output model is identified by the versions of its lines, so in-place edits of its lines are detected.
+        """
+        return self.format_template, self._version_token(self.output_model)
+
+    @staticmethod
+    def _version_token(io_model: BaseIOModel = None):
+        if io_model is None:
+            return None
+        return io_model.version_token() if hasattr(io_model, "version_token") else id(io_model)
+
+    def _check_format_cache(self):
+        state = self._format_cache_state()
+        if state != self._format_cache_token:
+            self._format_cache.clear()
+            self._format_placeholders = self._find_format_placeholders()
+            self._format_cache_token = state
+
     def fix_parsing(self, error: str, **kwargs):
         return NotImplemented
 
@@ -106,23 +193,46 @@ class PromptBuilder(BasePromptBuilder):
 
     def _prep_format_instructions(self, template: str, **kwargs):
         """Prepare format instructions"""
-        format_instructions = self._pass_placeholder(
-            self.format_template,
-            response_schema=dump_to_yaml_string(build_output_schema(self.output_model, inputs=kwargs))
-        )
-
         return parse_section_placeholder(
             template,
             set_tags=self._set_format_tags,
-            format_instructions=format_instructions
+            format_instructions=self._format_instructions(**kwargs)
+        )
+
+    def _format_instructions(self, **kwargs) -> str:
+        """Return the format instructions, cached per values of the placeholders they depend on.
+
+        Without placeholders in the output model, the format instructions are rendered once.
+        """
+        placeholders = self.format_placeholders
+        key = json.dumps({p: kwargs.get(p) for p in placeholders}, sort_keys=True, default=repr)
+        format_instructions = self._format_cache.get(key)
+        if format_instructions is None:
+            format_instructions = self._render_format_instructions(**{p: kwargs[p] for p in placeholders if p in kwargs})
+            self._format_cache.set(key, format_instructions)
+        return format_instructions
+
+    def _render_format_instructions(self, **kwargs) -> str:
+        """Render format instructions for the output model"""
+        return self._pass_placeholder(
+            self.format_template,
+            response_schema=dump_to_yaml_string(build_output_schema(self.output_model, inputs=kwargs))
         )
 
-    def _prep_remarks(self, template: str, error: str = None, remarks: str = None, last_output: str = None):
+    def _prep_remarks(
+            self,
+            template: str,
+            error: str = None,
+            remarks: str = None,
+            last_output: str = None,
+            chat_mode: bool = None
+    ):
         """Prepare remarks"""
+        chat_mode = self.chat_mode if chat_mode is None else chat_mode
         if not remarks:
             remarks = self.remarks or ""
         if error:
-            if not self.chat_mode:
+            if not chat_mode:
                 remarks = self._pass_placeholder(
                     self.error_template, error=error, last_output=last_output, remarks=remarks
                 )
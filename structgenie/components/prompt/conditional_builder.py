@@ -1,11 +1,11 @@
 
 from structgenie.base import BasePromptBuilder, BaseIOModel
-from structgenie.components.input_output import init_output_model, build_output_schema
+from structgenie.components.input_output import init_output_model, build_output_schema, schema_placeholders
 from structgenie.components.prompt._templates import (
     FORMAT_INSTRUCTIONS_TEMPLATE_CONDITIONAL,
 )
 from structgenie.components.prompt.builder import PromptBuilder
-from structgenie.utils.parsing import parse_section_placeholder, dump_to_yaml_string
+from structgenie.utils.parsing import dump_to_yaml_string
 
 
 class ConditionalPromptBuilder(PromptBuilder):
@@ -27,19 +27,23 @@ class ConditionalPromptBuilder(PromptBuilder):
         self.condition: str = condition
         super().__init__(instruction, output_model, input_model, **kwargs)
 
-    def _prep_format_instructions(self, template: str, **kwargs):
-        """Prepare format instructions"""
-        format_instructions = self._pass_placeholder(
+    def _render_format_instructions(self, **kwargs) -> str:
+        """Render format instructions for both output models"""
+        return self._pass_placeholder(
             self.format_template,
             condition=self.condition,
             response_schema=dump_to_yaml_string(build_output_schema(self.output_model, inputs=kwargs)),
             response_schema_else=dump_to_yaml_string(build_output_schema(self.output_model_else, inputs=kwargs))
         )
 
-        return parse_section_placeholder(
-            template,
-            set_tags=self._set_format_tags,
-            format_instructions=format_instructions
+    def _find_format_placeholders(self) -> tuple[str, ...]:
+        """Input placeholders the format instructions of both output models depend on."""
+        placeholders = schema_placeholders(self.output_model)
+        return placeholders + tuple(p for p in schema_placeholders(self.output_model_else) if p not in placeholders)
+
+    def _format_cache_state(self) -> tuple:
+        return super()._format_cache_state() + (
+            self._version_token(self.output_model_else), self.condition
         )
 
     @classmethod
@@ -0,0 +1,42 @@
+from typing import Any
+
+from structgenie.pydantic_v1 import BaseModel
+
+
+class PromptPlan(BaseModel):
+    """Compiled prompt of a PromptBuilder.
+
+    Instruction and (if they are the same for every prompt) examples and format instructions are rendered once
+    at compile time. Building a prompt from the plan only splices in the per prompt examples, the input dependent
+    format instructions and the remarks/error section of a retry.
+    """
+    builder: Any
+    chat_mode: bool = False
+    template: str
+    template_on_error: str
+    static_format: bool = True
+    static_examples: bool = True
+
+    class Config:
+        frozen = True
+        arbitrary_types_allowed = True
+
+    def build(self, error: str = None, remarks: str = None, last_output: str = None, **kwargs) -> str:
+        """Build prompt from the frozen templates.
+
+        Args:
+            error (str, optional): Error message of the previous run.
+            remarks (str, optional): Remarks overriding the remarks of the prompt builder.
+            last_output (str, optional): Output of the previous run.
+            **kwargs: Inputs used for input dependent examples and format instructions.
+
+        Returns:
+            str: The prompt.
+        """
+        template = self.template_on_error if error else self.template
+        if not self.static_examples:
+            filters = kwargs if self.builder.input_dependent_examples else {}
+            template = self.builder._prep_examples(template, **filters)
+        if not self.static_format:
+            template = self.builder._prep_format_instructions(template, **kwargs)
+        return self.builder._prep_remarks(template, error, remarks, last_output, chat_mode=self.chat_mode)
@@ -0,0 +1,91 @@
+"""Columnar checks for validating many outputs of the same output model."""
+from numbers import Real
+from typing import Any, Hashable, Optional
+
+from structgenie.components.validation._compiled import CompiledKeyConfig
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, numeric columns are checked value by value without it
+    np = None
+
+# error type of ValidatorExecutionError in Validator.log_error_msg
+EXECUTION_ERROR = None
+
+
+def check_column(key: str, config: CompiledKeyConfig, values: list) -> list[list[tuple[Optional[str], str]]]:
+    """Run the type, rule and content checks of a key on a column of values.
+
+    Check results are memoized per distinct scalar value, so enum and boolean columns are checked once per
+    option. Min/max bounds of numeric columns are checked vectorized with numpy if installed.
+
+    Returns:
+        list: The (error type, message) pairs for each value.
+    """
+    in_bounds = _in_bounds_mask(config.bounds, values)
+    memo = {}
+    results = []
+    for i, value in enumerate(values):
+        if in_bounds is not None and in_bounds[i]:
+            # the rule passes, type and content checks of numbers only depend on the type and truthiness
+            memo_key = ("bounded", type(value), bool(value))
+            check_rule = False
+        else:
+            memo_key = _memo_key(value)
+            check_rule = True
+
+        if memo_key is not None and memo_key in memo:
+            results.append(memo[memo_key])
+            continue
+
+        errors = _check_value(key, config, value, check_rule)
+        if memo_key is not None:
+            memo[memo_key] = errors
+        results.append(errors)
+    return results
+
+
+def _check_value(key: str, config: CompiledKeyConfig, value: Any, check_rule: bool = True) -> list:
+    errors = []
+    try:
+        error_msg = config.check_type(key, value)
+        if error_msg:
+            errors.append(("type", error_msg))
+        error_msg = config.check_rule(value) if check_rule else None
+        if error_msg:
+            errors.append(("rule", error_msg))
+        error_msg = config.check_content(key, value)
+        if error_msg:
+            errors.append(("content", error_msg))
+    except Exception as e:
+        errors.append((EXECUTION_ERROR, f"Validator raised error: {e}"))
+    return errors
+
+
+def _memo_key(value: Any) -> Optional[Hashable]:
+    if value is None or isinstance(value, (str, int, float, bool)):
+        return type(value), value
+    return None
+
+
+def _in_bounds_mask(bounds: Optional[tuple], values: list):
+    """Return a mask of the numeric values within the bounds, None if not applicable."""
+    if bounds is None or np is None or not values:
+        return None
+    numeric = np.fromiter(
+        (isinstance(value, Real) and not isinstance(value, bool) for value in values), dtype=bool, count=len(values)
+    )
+    if not numeric.any():
+        return None
+    array = np.fromiter(
+        (float(value) if is_numeric else np.nan for value, is_numeric in zip(values, numeric)),
+        dtype=float,
+        count=len(values),
+    )
+    min_, max_ = bounds
+    mask = numeric.copy()
+    if min_ is not None:
+        mask &= array >= min_
+    if max_ is not None:
+        mask &= array <= max_
+    return mask
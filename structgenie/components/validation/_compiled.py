@@ -0,0 +1,92 @@
+from collections.abc import Mapping
+from typing import Any, Iterator, Optional
+
+from structgenie.components.validation._content import compile_content
+from structgenie.components.validation._rule import compile_rule, parse_min_max
+from structgenie.components.validation._type import compile_type
+from structgenie.utils.cache import LRUCache
+from structgenie.utils.parsing import replace_placeholder_from_inputs_and_kwargs
+from structgenie.utils.parsing.placeholder import has_placeholder
+
+
+class CompiledKeyConfig(Mapping):
+    """Validation config of a key with its checks compiled once.
+
+    Behaves like the config dict of the key, so the key validation helpers work on compiled configs. Rules with
+    placeholders are compiled per set of inputs by `resolve`, compiled rules are cached per resolved rule string.
+
+    Args:
+        key (str): The full key of the config, e.g. 'family.name'.
+        config (dict): The config of the key.
+        validation_config (dict, optional): The full validation config, used to compile 'for each' rules.
+    """
+
+    def __init__(self, key: str, config: dict, validation_config: dict = None):
+        self.key = key
+        self.config = config
+        self._validation_config = validation_config or {}
+
+        self.check_type = compile_type(config.get("type", None))
+        self.check_content = compile_content(config.get("type", None))
+
+        rule = config.get("rule", None)
+        self.has_placeholder_rule = bool(rule) and has_placeholder(rule)
+        self._resolved = LRUCache(max_size=128) if self.has_placeholder_rule else None
+        self._check_rule = None if self.has_placeholder_rule else self._compile_rule(rule)
+
+        # min/max bounds of the rule, used for vectorized checks of numeric columns. Options take precedence
+        # over the rule, so keys with options have no bounds
+        self.bounds = None
+        has_options = bool(config.get("options", None)) or config.get("multiple_select", False)
+        if rule and not self.has_placeholder_rule and not has_options and rule.startswith(("min=", "max=")):
+            self.bounds = parse_min_max(rule)
+
+    def _compile_rule(self, rule: Optional[str]):
+        try:
+            return compile_rule(
+                self.key,
+                rule,
+                self.config.get("options", None),
+                self.config.get("multiple_select", False),
+                self._validation_config,
+            )
+        except Exception as e:
+            # malformed rules are reported when validating, like before compiling
+            def check(value, error=e):
+                raise error
+            return check
+
+    def resolve(self, inputs: dict) -> "CompiledKeyConfig":
+        """Return the config with the placeholders of the rule replaced from the inputs."""
+        if not self.has_placeholder_rule:
+            return self
+
+        rule = replace_placeholder_from_inputs_and_kwargs(self.config["rule"], inputs)
+        resolved = self._resolved.get(rule)
+        if resolved is None:
+            resolved = CompiledKeyConfig(self.key, {**self.config, "rule": rule}, self._validation_config)
+            self._resolved.set(rule, resolved)
+        return resolved
+
+    def check_rule(self, value: Any) -> Optional[str]:
+        """Check the rules and options of the key, rules with placeholders have to be resolved first."""
+        if self._check_rule is None:
+            raise ValueError(f"Rule of key '{self.key}' has placeholders, resolve the config with the inputs first.")
+        return self._check_rule(value)
+
+    # === Mapping ===
+
+    def __getitem__(self, item: str) -> Any:
+        return self.config[item]
+
+    def __iter__(self) -> Iterator[str]:
+        return iter(self.config)
+
+    def __len__(self) -> int:
+        return len(self.config)
+
+    def copy(self) -> dict:
+        return dict(self.config)
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}({self.key!r}, {self.config!r})"
@@ -1,4 +1,5 @@
-from typing import Union
+from functools import lru_cache
+from typing import Any, Callable, Optional, Union
 
 from structgenie.components.validation._varkey import get_key_from_config
 from structgenie.utils.parsing.string import is_none
@@ -8,15 +9,24 @@ def validate_content(key: str, value: str, val_config: dict) -> Union[str, None]
     """Check if content is not a placeholder '<str>'."""
     _key = get_key_from_config(key, val_config)
     type_ = val_config.get(_key).get("type", None)
-    if is_none(value):
+    return compile_content(type_)(key, value)
+
+
+@lru_cache(maxsize=512)
+def compile_content(type_: Optional[str]) -> Callable[[str, Any], Optional[str]]:
+    """Compile the placeholder check for a type into a check function returning an error message or None."""
+    list_prefixes = ("<str", "< str")
+    prefixes = (f"<{type_}", f"< {type_}")
+
+    def check(key: str, value: Any) -> Optional[str]:
+        if is_none(value):
+            return None
+        if isinstance(value, list):
+            failed = [item for item in value if isinstance(item, str) and item.startswith(list_prefixes)]
+            if failed:
+                return f"For '{key}'s list items placeholder were returned {failed}. Please generate a string for each item instead."
+        if isinstance(value, str) and value.startswith(prefixes):
+            return f"For '{key}' a placeholder was returned. Please generate a string for this key instead."
         return None
-    if isinstance(value, list):
-        failed = []
-        for item in value:
-            if isinstance(item, str) and (item.startswith(f"<str") or item.startswith(f"< str")):
-                failed.append(item)
-        if failed:
-            return f"For '{key}'s list items placeholder were returned {failed}. Please generate a string for each item instead."
-    if isinstance(value, str) and (value.startswith(f"<{type_}") or value.startswith(f"< {type_}")):
-        return f"For '{key}' a placeholder was returned. Please generate a string for this key instead."
-    return None
+
+    return check
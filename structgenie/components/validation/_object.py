@@ -50,11 +50,17 @@ def validate_unexpected_keys(d: dict, val_config: dict) -> list:
     return unexpected_keys
 
 
-def nested_key_validation(key: str, value: any, output_model: BaseIOModel = None, inputs: dict = None):
+def nested_key_validation(
+        key: str, value: any, output_model: BaseIOModel = None, inputs: dict = None, output_schema: dict = None
+):
+    """Check the nested keys of a value against the output schema.
+
+    Pass the output schema built for the inputs to avoid building it for each nested value.
+    """
     errors = []
 
     if output_model and not key.startswith("$"):
-        schema = build_output_schema(output_model, inputs=inputs)
+        schema = output_schema if output_schema is not None else build_output_schema(output_model, inputs=inputs)
         for i, _k in enumerate(key.split(".")):
             schema = schema[_k]
         if isinstance(schema, list):
@@ -74,8 +80,8 @@ def _nested_key_validation(value: any, output_model: BaseIOModel = None, schema:
     for k_, v in schema.items():
         k = k_[1:] if k_.startswith("$") else k_
 
-        if isinstance(value, list) and isinstance(value[0], dict):
-                value_ = [v_ for v_ in value if k in v_][0]
+        if isinstance(value, list) and value and isinstance(value[0], dict):
+            value_ = next((v_ for v_ in value if k in v_), {})
         else:
             value_ = value
 
@@ -12,11 +12,14 @@ Rules:
 
 """
 import re
-from typing import Union
+from functools import partial
+from typing import Any, Callable, Optional, Union
 
 from structgenie.components.validation._varkey import get_key_from_config
 from structgenie.utils.parsing.string import format_as_variable, is_none
 
+FOR_EACH_PATTERN = re.compile(r"for each (.*) in (.*)")
+
 
 def is_equal(value, rule):
     val_value = rule.split("=")[1].strip()
@@ -29,43 +32,105 @@ def is_equal(value, rule):
 
 def validate_rules(key: str, value: Union[str, list], val_config) -> Union[str, None]:
     key = get_key_from_config(key, val_config)
-    rule = val_config[key].get("rule", None)
-    options = val_config[key].get("options", None)
+    config = val_config[key]
+    check = compile_rule(
+        key, config.get("rule", None), config.get("options", None), config.get("multiple_select", False), val_config
+    )
+    return check(value)
+
+
+def compile_rule(
+        key: str,
+        rule: Optional[str],
+        options: Optional[Union[str, list]] = None,
+        multiple_select: bool = False,
+        val_config: dict = None,
+) -> Callable[[Any], Optional[str]]:
+    """Compile the rule or options of a key into a check function returning an error message or None.
+
+    Rule strings are parsed once: possible values are parsed into lists (and sets for lookups), regex patterns
+    are compiled and min/max bounds are converted to numbers. Rules with placeholders have to be compiled after
+    the placeholders are replaced with the inputs.
+    """
     if options:
-        if val_config[key]["multiple_select"]:
-            return one_or_more(value, parse_list(options))
-        return one_of(value, parse_list(options))
-
-    if rule:
-        if rule.startswith("="):
-            return is_equal(value, rule)
-        elif rule.startswith("length"):
-            return validate_length(value, rule)
-        elif rule.startswith("one of"):
-            possible_values = rule.split(":")[1].strip()
-            return one_of(value, parse_list(possible_values))
-        elif rule.startswith("one or more"):
-            possible_values = rule.split(":")[1].strip()
-            return one_or_more(value, parse_list(possible_values))
-        elif rule.startswith("regex"):
-            pattern = rule.split(":")[1].strip()
-            return regex(value, pattern)
-        elif rule.startswith("for each"):
-            match = re.match(r"for each (.*) in (.*)", rule)
-            iterator = match.group(1)
-            possible_values = parse_list(match.group(2))
-            iter_values = _find_iterator_values(key, iterator, val_config)
-            is_iter_key = _is_iterator_key(key, iterator, val_config)
-            return for_each(value, iter_values, is_iter_key, possible_values)
-        elif rule.startswith("min=") or rule.startswith("max="):
-            return min_max(value, rule)
-        elif rule.startswith("if"):
-            pass
-        else:
-            return None
+        possible_values = parse_list(options)
+        if multiple_select:
+            return _compile_one_or_more(possible_values)
+        return _compile_one_of(possible_values)
+
+    if not rule:
+        return _no_check
+
+    if rule.startswith("="):
+        return partial(is_equal, rule=rule)
+    elif rule.startswith("length"):
+        return partial(validate_length, rule=rule)
+    elif rule.startswith("one of"):
+        return _compile_one_of(parse_list(rule.split(":")[1].strip()))
+    elif rule.startswith("one or more"):
+        return _compile_one_or_more(parse_list(rule.split(":")[1].strip()))
+    elif rule.startswith("regex"):
+        pattern = rule.split(":")[1].strip()
+        return partial(regex, pattern=re.compile(pattern))
+    elif rule.startswith("for each"):
+        match = FOR_EACH_PATTERN.match(rule)
+        iterator = match.group(1)
+        possible_values = parse_list(match.group(2))
+        iter_values = _find_iterator_values(key, iterator, val_config or {})
+        is_iter_key = _is_iterator_key(key, iterator, val_config or {})
+        return partial(
+            for_each, iterator_values=iter_values, is_iter_key=is_iter_key, possible_values=possible_values
+        )
+    elif rule.startswith("min=") or rule.startswith("max="):
+        min_, max_ = parse_min_max(rule)
+        return partial(check_min_max, min_=min_, max_=max_)
+    return _no_check
+
+
+def _no_check(value: Any) -> None:
     return None
 
 
+def _value_set(possible_values: list) -> Optional[frozenset]:
+    try:
+        return frozenset(possible_values)
+    except TypeError:
+        return None
+
+
+def _compile_one_of(possible_values: list) -> Callable[[Any], Optional[str]]:
+    value_set = _value_set(possible_values)
+    if value_set is None:
+        return partial(one_of, possible_values=possible_values)
+
+    def check(output):
+        try:
+            if output in value_set:
+                return None
+        except TypeError:
+            pass
+        return one_of(output, possible_values)
+
+    return check
+
+
+def _compile_one_or_more(possible_values: list) -> Callable[[Any], Optional[str]]:
+    value_set = _value_set(possible_values)
+    if value_set is None:
+        return partial(one_or_more, possible_values=possible_values)
+
+    def check(output):
+        if isinstance(output, list):
+            try:
+                if all(o in value_set for o in output):
+                    return None
+            except TypeError:
+                pass
+        return one_or_more(output, possible_values)
+
+    return check
+
+
 def parse_list(value: Union[str, list]) -> list:
     if isinstance(value, list):
         return value
@@ -105,7 +170,7 @@ def one_or_more(output: Union[str, list], possible_values: list[str]):
     return None
 
 
-def regex(output: str, pattern: str):
+def regex(output: str, pattern: Union[str, re.Pattern]):
     if not re.match(pattern, output):
         return f"Output '{output}' does not match pattern: {pattern}"
     return None
@@ -132,17 +197,28 @@ def for_each(output: list, iterator_values: list[list], is_iter_key: bool, possi
 
 def min_max(output: Union[str, int, float], rule: str):
     """Validate the length of the output."""
+    min_, max_ = parse_min_max(rule)
+    return check_min_max(output, min_, max_)
+
+
+def parse_min_max(rule: str) -> tuple[Optional[int], Optional[int]]:
+    """Parse the bounds of a min/max rule, e.g. 'min=0 max=10'."""
+    min_ = re.search(r"min=(\d+)", rule)
+    max_ = re.search(r"max=(\d+)", rule)
+    return (int(min_.group(1)) if min_ else None), (int(max_.group(1)) if max_ else None)
+
+
+def check_min_max(output: Union[str, int, float], min_: Optional[int], max_: Optional[int]):
+    """Check the output against parsed min/max bounds."""
     if isinstance(output, str):
         try:
             output = float(output)
         except:
             output = int(output)
 
-    min_ = re.search(r"min=(\d+)", rule).group(1)
-    max_ = re.search(r"max=(\d+)", rule).group(1)
-    if output < int(min_):
+    if min_ is not None and output < min_:
         return f"Output '{output}' is smaller than min: {min_}"
-    if output > int(max_):
+    if max_ is not None and output > max_:
         return f"Output '{output}' is larger than max: {max_}"
     return None
 
@@ -1,113 +1,80 @@
-import re
-from typing import Union, Optional, List
+from functools import lru_cache
+from typing import Any, Callable, Optional, Union
 
+from structgenie.components.validation._type_checker import (
+    ANY_TYPES, DATE_TYPES, TypeResolutionError, is_date, resolve_type
+)
 from structgenie.components.validation._varkey import get_key_from_config
 from structgenie.utils.parsing.string import is_none
 
 
-def instance_type(type_):
-    """Converts a string type to an instance type.
-
-    Removes nested generic types and replaces them with the correct type to run with isinstance(x, eval(type_str)).
-
-    Args:
-        type_ (str): A string representing a type.
-    Returns:
-        str: A string representing the instance type.
-    """
-
-    def parse_union(string: str):
-        types = []
-        for t in re.match(r"Union\[(.*)\]", string).group(1).split(","):
-            if t.endswith(']'):
-                t = t[:-1]
-            t_ = instance_type(t)
-            if t_ and t_.strip() not in types:
-                types.append(t_.strip())
-        if len(types) == 1:
-            return types[0]
-        types = [instance_type(t) for t in types if t]
-        return "Union[" + ", ".join(types) + "]"
-
-    def parse_optional(string: str):
-        t = re.match(r"Optional\[(.*)\]", string).group(1)
-        return "Optional[" + instance_type(t) + "]"
-
-    def parse_generic(string: str):
-        t = re.match(r"(.*)\[(.*)\]", string).group(1)
-        if "[" in t:
-            return t.split("[")[0]
-        return t
-
-    if "[" in type_ and not "]" in type_:
-        return type_.split("[")[0]
+def validate_type(key: str, value: str, val_config: dict) -> Union[str, None]:
+    _key = get_key_from_config(key, val_config)
+    type_ = val_config.get(_key).get("type", None)
+    return compile_type(type_)(key, value)
 
-    if re.match(r"(.*)\[(.*)\]", type_):
-        if re.match(r"Union\[(.*)\]", type_):
-            return parse_union(type_)
 
-        if re.match(r"Optional\[(.*)\]", type_):
-            return parse_optional(type_)
+@lru_cache(maxsize=512)
+def compile_type(type_: Optional[str]) -> Callable[[str, Any], Optional[str]]:
+    """Compile a type string into a check function returning an error message or None.
 
-        return parse_generic(type_)
+    The type string is resolved once (see resolve_type), element types of generic types are checked as well.
+    """
+    if not type_ or type_ in ANY_TYPES:
+        return _no_check
+    if type_ in DATE_TYPES:
+        return _date_check
 
-    return type_
+    try:
+        type_check = resolve_type(type_)
+    except TypeResolutionError:
+        def check(key, value):
+            if is_none(value):
+                return None
+            raise ValueError(f"Wrong type for '{key}': '{value}'. on isinstance({type_})")
+        return check
+
+    if type_check is None:
+        return _no_check
+
+    if isinstance(type_check, (type, tuple)):
+        def check(key, value):
+            if is_none(value) or isinstance(value, type_check):
+                return None
+            return f"Wrong type for '{key}': '{value}'. Expected {type_}, got {describe_type(value)}"
+    else:
+        def check(key, value):
+            if is_none(value) or type_check(value):
+                return None
+            return f"Wrong type for '{key}': '{value}'. Expected {type_}, got {describe_type(value)}"
+
+    return check
+
+
+def describe_type(value: Any) -> str:
+    """Describe the type of a value including the types of its items, e.g. list[int, str]."""
+    if isinstance(value, (list, set, tuple)) and value:
+        item_types = ", ".join(dict.fromkeys(type(item).__name__ for item in value))
+        return f"{type(value).__name__}[{item_types}]"
+    if isinstance(value, dict) and value:
+        key_types = ", ".join(dict.fromkeys(type(key).__name__ for key in value))
+        item_types = ", ".join(dict.fromkeys(type(item).__name__ for item in value.values()))
+        return f"dict[{key_types}: {item_types}]"
+    return str(type(value))
+
+
+def _no_check(key: str, value: Any) -> None:
+    return None
 
 
-def validate_type(key: str, value: str, val_config: dict) -> Union[str, None]:
-    _key = get_key_from_config(key, val_config)
-    type_ = val_config.get(_key).get("type", None)
+def _date_check(key: str, value: Any) -> Optional[str]:
     if is_none(value):
         return None
-    if type_ == "any":
-        return None
-    try:
-        if type_ and not isinstance(value, eval(instance_type(type_))):
-            return f"Wrong type for '{key}': '{value}'. Expected {type_}, got {type(value)}"
-    except:
-        if instance_type(type_) == "datetime.datetime":
-            return verify_date(key, value)
-        print(f"Isinstance failed for '{key}': '{value}'.Type: {type_}")
-        raise ValueError(f"Wrong type for '{key}': '{value}'. on isinstance({instance_type(type_)})")
-    return None
+    return verify_date(key, value)
 
 
 def verify_date(key, value):
-    from datetime import datetime
-
-    if isinstance(value, datetime):
+    if is_date(value):
         return None
-
-    for format in ["%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M:%S.%f", "%Y-%m-%d"]:
-        try:
-            date = datetime.strptime(value, format)
-            return None
-        except:
-            pass
-
     return f"Wrong date format for '{key}': '{value}'. Expected %Y-%m-%d, got {value}, type: {type(value)}"
 
-
-
-if __name__ == "__main__":
-    str_types = [
-        "list[Optional[str, None]]",
-        "list[Union[str, None]]",
-        "list[str]",
-        "Optional[str]",
-        "Union[str, None]",
-        "Optional[Union[str, None]]",
-        "Union[Optional[str, None]]",
-        "Optional[List[str]]",
-        "Union[List[str], None]",
-        ]
-
-    for str_type in str_types:
-
-        print(instance_type(str_type)) # list[Union[str, None]]
-
-
-    dates = ['2022-10-10', '2022-10-12 12:00:00', '2022-10-12 12:00:00.000000']
-
-    for date in dates:
-        print(verify_date("date", date))
\ No newline at end of file
@@ -0,0 +1,207 @@
+"""Resolve type strings of output models into type checks.
+
+A type string like 'Optional[list[dict[str, int]]]' is parsed once into a check, which is either a type or a
+tuple of types for a plain isinstance check, a function for generic types checking their elements as well, or
+None for any value. Checks are cached per type string.
+
+Supported types:
+    - builtins: str, int, float, bool, bytes, list, dict, tuple, set, None
+    - typing: Any, Union, Optional, List, Dict, Tuple, Set
+    - unions written with '|', e.g. 'str | None'
+    - dates: datetime, date (also as strings in '%Y-%m-%d' or '%Y-%m-%d %H:%M:%S' format)
+
+Unknown names nested in generic types, e.g. the pydantic model in 'list[Member]', accept any value.
+"""
+import datetime
+import re
+from functools import lru_cache
+from typing import Any, Callable, Optional, Union
+
+TypeCheck = Union[type, tuple, Callable[[Any], bool], None]
+
+NONE_TYPE = type(None)
+
+BASE_TYPES = {
+    "str": str,
+    "int": int,
+    "float": float,
+    "bool": bool,
+    "bytes": bytes,
+    "list": list,
+    "List": list,
+    "dict": dict,
+    "Dict": dict,
+    "tuple": tuple,
+    "Tuple": tuple,
+    "set": set,
+    "Set": set,
+    "None": NONE_TYPE,
+    "NoneType": NONE_TYPE,
+}
+ANY_TYPES = {"any", "Any", "object"}
+DATE_FORMATS = ["%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M:%S.%f", "%Y-%m-%d"]
+
+_TOKEN_PATTERN = re.compile(r"[\w.]+|[\[\],|]")
+
+
+class TypeResolutionError(ValueError):
+    pass
+
+
+def is_date(value: Any) -> bool:
+    """Check if value is a date, a datetime or a string in one of the DATE_FORMATS."""
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return True
+    if isinstance(value, str):
+        for date_format in DATE_FORMATS:
+            try:
+                datetime.datetime.strptime(value, date_format)
+                return True
+            except ValueError:
+                pass
+    return False
+
+
+DATE_TYPES = {
+    "datetime": is_date,
+    "datetime.datetime": is_date,
+    "date": is_date,
+    "datetime.date": is_date,
+}
+
+
+@lru_cache(maxsize=1024)
+def resolve_type(type_: str) -> TypeCheck:
+    """Parse a type string into a type check.
+
+    Raises:
+        TypeResolutionError: If the type string can not be parsed or the outer type is unknown.
+    """
+    tokens = _TOKEN_PATTERN.findall(type_)
+    if not tokens:
+        raise TypeResolutionError(f"Empty type '{type_}'")
+    check, position = _parse_union(tokens, 0, type_, nested=False)
+    if position != len(tokens):
+        raise TypeResolutionError(f"Unexpected '{tokens[position]}' in type '{type_}'")
+    return check
+
+
+def matches(value: Any, check: TypeCheck) -> bool:
+    """Check a value against a resolved type check."""
+    if check is None:
+        return True
+    if isinstance(check, (type, tuple)):
+        return isinstance(value, check)
+    return check(value)
+
+
+def _parse_union(tokens: list[str], position: int, type_: str, nested: bool) -> tuple[TypeCheck, int]:
+    """Parse a type or a union of types separated by '|'."""
+    check, position = _parse(tokens, position, type_, nested)
+    checks = [check]
+    while position < len(tokens) and tokens[position] == "|":
+        if position + 1 >= len(tokens):
+            raise TypeResolutionError(f"Missing type after '|' in type '{type_}'")
+        check, position = _parse(tokens, position + 1, type_, nested)
+        checks.append(check)
+    return (checks[0] if len(checks) == 1 else _union(checks)), position
+
+
+def _parse(tokens: list[str], position: int, type_: str, nested: bool) -> tuple[TypeCheck, int]:
+    name = tokens[position]
+    if name in "[],|":
+        raise TypeResolutionError(f"Unexpected '{name}' in type '{type_}'")
+    position += 1
+    args = []
+    if position < len(tokens) and tokens[position] == "[":
+        position += 1
+        while True:
+            if position >= len(tokens):
+                raise TypeResolutionError(f"Missing ']' in type '{type_}'")
+            if tokens[position] == "...":
+                args.append(...)
+                position += 1
+            else:
+                arg, position = _parse_union(tokens, position, type_, nested=True)
+                args.append(arg)
+            if position >= len(tokens):
+                raise TypeResolutionError(f"Missing ']' in type '{type_}'")
+            if tokens[position] == "]":
+                position += 1
+                break
+            if tokens[position] != ",":
+                raise TypeResolutionError(f"Unexpected '{tokens[position]}' in type '{type_}'")
+            position += 1
+    return _build(name, args, type_, nested), position
+
+
+def _build(name: str, args: list, type_: str, nested: bool) -> TypeCheck:
+    if name in ANY_TYPES:
+        return None
+    if name in DATE_TYPES:
+        return DATE_TYPES[name]
+    if name in ("Union", "Optional"):
+        if name == "Optional":
+            args = args + [NONE_TYPE]
+        return _union(args)
+    if name not in BASE_TYPES:
+        if nested:
+            return None
+        raise TypeResolutionError(f"Unknown type '{name}' in type '{type_}'")
+
+    base = BASE_TYPES[name]
+    if not args:
+        return base
+    if base in (list, set):
+        return _sequence(base, args[0])
+    if base is tuple:
+        return _tuple(args)
+    if base is dict:
+        key_check, value_check = (None, args[0]) if len(args) == 1 else (args[0], args[1])
+        return _mapping(key_check, value_check)
+    return base
+
+
+def _union(checks: list[TypeCheck]) -> TypeCheck:
+    if any(check is None for check in checks):
+        return None
+    types = []
+    functions = []
+    for check in checks:
+        if isinstance(check, tuple):
+            types.extend(check)
+        elif isinstance(check, type):
+            types.append(check)
+        else:
+            functions.append(check)
+    types = tuple(dict.fromkeys(types))
+    if not functions:
+        return types[0] if len(types) == 1 else types
+    return lambda value: (bool(types) and isinstance(value, types)) or any(check(value) for check in functions)
+
+
+def _sequence(base: type, item_check: TypeCheck) -> TypeCheck:
+    if item_check is None or item_check is ...:
+        return base
+    if isinstance(item_check, (type, tuple)):
+        return lambda value: isinstance(value, base) and all(isinstance(item, item_check) for item in value)
+    return lambda value: isinstance(value, base) and all(item_check(item) for item in value)
+
+
+def _tuple(args: list) -> TypeCheck:
+    if len(args) == 2 and args[1] is ...:
+        return _sequence(tuple, args[0])
+    checks = tuple(args)
+    return lambda value: (
+            isinstance(value, tuple)
+            and len(value) == len(checks)
+            and all(matches(item, check) for item, check in zip(value, checks))
+    )
+
+
+def _mapping(key_check: TypeCheck, value_check: TypeCheck) -> TypeCheck:
+    if key_check is None and value_check is None:
+        return dict
+    return lambda value: isinstance(value, dict) and all(
+        matches(key, key_check) and matches(item, value_check) for key, item in value.items()
+    )
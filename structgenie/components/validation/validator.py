@@ -1,22 +1,29 @@
-from typing import Type
+import copy
+import json
+from typing import Optional, Type
 
 from structgenie.pydantic_v1 import BaseModel
 
 from structgenie.base import BaseValidator
-from structgenie.components.validation._content import validate_content
+from structgenie.components.input_output import build_output_schema, schema_placeholders
+from structgenie.components.validation._batch import check_column
+from structgenie.components.validation._compiled import CompiledKeyConfig
 from structgenie.components.validation._object import *
-from structgenie.components.validation._rule import validate_rules
-from structgenie.components.validation._type import validate_type
+from structgenie.components.validation._varkey import get_key_from_config
+from structgenie.utils.cache import LRUCache
 from structgenie.errors import ValidationKeyError, ValidationTypeError, ValidationRuleError, ValidationContentError, \
     ValidatorExecutionError
-from structgenie.utils.parsing import replace_placeholder_from_inputs_and_kwargs
-from structgenie.utils.parsing.placeholder import has_placeholder
 
 
 class Validator(BaseValidator):
     """Validate an output based on a key and a set of rules.
 
     Takes the valid values from one input key and validates the output based on those values.
+    The config of each key is compiled once into type, rule and content checks (see CompiledKeyConfig),
+    only rules with placeholders are compiled again for new inputs.
+
+    Each validate call runs on a copy of the validator with its own inputs, error log and output schema, so a
+    validator is never left with the state of a failed call and can be shared by concurrent validations.
     """
     validation_config: dict
 
@@ -25,6 +32,15 @@ class Validator(BaseValidator):
         self.output_model = output_model
         self.error_log = []
         self.inputs = {}
+        self.compiled_config = {
+            key: CompiledKeyConfig(key, config, validation_config) for key, config in validation_config.items()
+        }
+        self._has_placeholder_rules = any(config.has_placeholder_rule for config in self.compiled_config.values())
+
+        # output schema for nested key validation, built once per validate call and cached per schema inputs
+        self._schema_placeholders = schema_placeholders(output_model) if output_model else ()
+        self._schema_cache = LRUCache(max_size=64)
+        self._output_schema = None
 
     @classmethod
     def from_output_model(cls, output_model: BaseIOModel):
@@ -40,21 +56,89 @@ class Validator(BaseValidator):
 
     def validate(self, output: dict, inputs: dict = None) -> Union[list, None]:
         """Validate the output based on the validation config."""
-        if inputs:
-            self.inputs = inputs
+        run = self._start_run(inputs)
+        validation_config = run._parse_inputs(run.inputs)
+        run._validate(output, validation_config)
+        return [error for error in run.error_log if error]
 
-        validation_config = self._parse_inputs(self.inputs)
+    def validate_item(self, key: str, value: any, inputs: dict = None) -> list:
+        """Validate a single top level item of the output, e.g. a key completed while streaming.
 
-        try:
-            self._validate(output, validation_config)
-        except Exception as e:
-            self.log_error_msg(f"Validator raised error: {e}")
-            raise e
+        Missing keys are not checked as the rest of the output is not known yet.
+        """
+        run = self._start_run(inputs)
+        validation_config = run._parse_inputs(run.inputs)
 
-        error_log = [error for error in self.error_log if error]
-        self.error_log = []
-        self.inputs = {}
-        return error_log
+        if key not in validation_config and not any(k.startswith("$") for k in validation_config):
+            run.log_error_msg(f"Unexpected keys {[key]} in output", "key", key=key)
+        else:
+            run._validate_item(key, value, validation_config)
+        return [error for error in run.error_log if error]
+
+    def validate_many(self, outputs: list[dict], inputs: dict = None) -> dict[int, list]:
+        """Validate many outputs with the same inputs.
+
+        The config is resolved and the output schema is built once for all outputs. Top level keys without nested
+        values are checked column by column (see check_column), nested keys are validated per output like in
+        validate. Errors raised by the checks of an output are reported for that output instead of raised.
+
+        Args:
+            outputs (list[dict]): The outputs.
+            inputs (dict, optional): The inputs shared by all outputs.
+
+        Returns:
+            dict[int, list]: The errors of each invalid output by its index, valid outputs are left out.
+        """
+        run = self._start_run(inputs)
+        validation_config = run._parse_inputs(run.inputs)
+        report = {}
+
+        valid = []
+        for index, output in enumerate(outputs):
+            run.error_log = []
+            try:
+                run.log_error_msg(validate_keys(output, validation_config), "key")
+            except Exception as e:
+                run.log_error_msg(f"Validator raised error: {e}")
+            if run.error_log:
+                report[index] = run.error_log
+            elif isinstance(output, dict):
+                valid.append(index)
+
+        columns = {}
+        for key, config in validation_config.items():
+            if "." in key or key.startswith("$") or is_nested(key, validation_config):
+                continue
+            indices = [index for index in valid if key in outputs[index]]
+            results = check_column(key, config, [outputs[index][key] for index in indices])
+            columns[key] = {index: errors for index, errors in zip(indices, results) if errors}
+
+        for index in valid:
+            run.error_log = []
+            for key, value in outputs[index].items():
+                if key in columns:
+                    for error_type, error_msg in columns[key].get(index, []):
+                        run.log_error_msg(error_msg, error_type, key=key)
+                    continue
+                try:
+                    run._validate_item(key, value, validation_config)
+                except Exception as e:
+                    run.log_error_msg(f"Validator raised error: {e}")
+            errors = [error for error in run.error_log if error]
+            if errors:
+                report[index] = errors
+        return report
+
+    def _start_run(self, inputs: dict = None) -> "Validator":
+        """Return a copy of the validator with the state of a single validate call.
+
+        Compiled configs and the schema cache are shared with the validator.
+        """
+        run = copy.copy(self)
+        run.inputs = inputs or {}
+        run.error_log = []
+        run._output_schema = None
+        return run
 
     def _validate(self, data: dict, validation_config: dict, parent_key: str = None):
         """Validate the output based on the validation config."""
@@ -72,17 +156,20 @@ class Validator(BaseValidator):
     def _validate_item(self, key: str, value: any, val_config: dict, parent_key: str = None):
         """Validate a single item in the output."""
 
+        output_key = parent_key.split(".")[0] if parent_key else key
+        config = val_config[get_key_from_config(key, val_config)]
+
         # validate type
-        error_msg = validate_type(key, value, val_config)
-        self.log_error_msg(error_msg, "type", parent_key)
+        error_msg = config.check_type(key, value)
+        self.log_error_msg(error_msg, "type", parent_key, key=output_key)
 
         # validate rules
-        error_msg = validate_rules(key, value, val_config)
-        self.log_error_msg(error_msg, "rule", parent_key)
+        error_msg = config.check_rule(value)
+        self.log_error_msg(error_msg, "rule", parent_key, key=output_key)
 
         # validate content
-        error_msg = validate_content(key, value, val_config)
-        self.log_error_msg(error_msg, "content", parent_key)
+        error_msg = config.check_content(key, value)
+        self.log_error_msg(error_msg, "content", parent_key, key=output_key)
 
         # validate nested value
         self._validate_nested(key, value, val_config, parent_key)
@@ -101,44 +188,67 @@ class Validator(BaseValidator):
 
         if isinstance(value, dict):
             self.log_error_msg(
-                nested_key_validation(key, value, self.output_model, inputs=self.inputs), "key",
+                nested_key_validation(key, value, self.output_model, output_schema=self.output_schema()), "key",
                 parent_key=new_parent_key
             )
             return self._validate(value, validation_config_nested(key, val_config), parent_key=new_parent_key)
 
         elif isinstance(value, list):
             self.log_error_msg(
-                nested_key_validation(key, value, self.output_model, inputs=self.inputs), "key",
+                nested_key_validation(key, value, self.output_model, output_schema=self.output_schema()), "key",
                 parent_key=new_parent_key
             )
             for obj in value:
                 self._validate(obj, validation_config_nested(key, val_config), parent_key=new_parent_key)
 
-    def _parse_inputs(self, inputs: dict):
-        """Parse the inputs to the correct format for validation."""
-        val_config = {}
-        for key, config in self.validation_config.items():
-            val_config[key] = config.copy()
-            if config["rule"] and has_placeholder(config["rule"]):
-                val_config[key]["rule"] = replace_placeholder_from_inputs_and_kwargs(config["rule"], inputs)
-        return val_config
+    def output_schema(self) -> Optional[dict]:
+        """Return the output schema for the inputs of the current validation.
 
-    def log_error_msg(self, msg: Union[str, list[str]], error_type: str = None, parent_key: str = None):
+        The schema only depends on the inputs used as placeholders in the output model, it is cached per values
+        of these inputs and memoized for the current validate call.
+        """
+        if self.output_model is None:
+            return None
+        if self._output_schema is None:
+            key = self._schema_key(self.inputs)
+            schema = self._schema_cache.get(key)
+            if schema is None:
+                schema = build_output_schema(self.output_model, inputs=self.inputs)
+                self._schema_cache.set(key, schema)
+            self._output_schema = schema
+        return self._output_schema
+
+    def _schema_key(self, inputs: dict) -> str:
+        values = {placeholder: inputs.get(placeholder) for placeholder in self._schema_placeholders}
+        return json.dumps(values, sort_keys=True, default=repr)
+
+    def _parse_inputs(self, inputs: dict) -> dict[str, CompiledKeyConfig]:
+        """Resolve the compiled config for the inputs, only rules with placeholders depend on the inputs."""
+        if not self._has_placeholder_rules:
+            return self.compiled_config
+        return {key: config.resolve(inputs) for key, config in self.compiled_config.items()}
+
+    def log_error_msg(
+            self,
+            msg: Union[str, list[str]],
+            error_type: str = None,
+            parent_key: str = None,
+            key: str = None):
         if not msg:
             return
 
         if isinstance(msg, list):
             for m in msg:
-                self.log_error_msg(m, error_type, parent_key)
+                self.log_error_msg(m, error_type, parent_key, key)
             return
 
         if error_type == "key":
-            self.error_log.append(ValidationKeyError(msg, parent_key))
+            self.error_log.append(ValidationKeyError(msg, parent_key, key))
         elif error_type == "type":
-            self.error_log.append(ValidationTypeError(msg, parent_key))
+            self.error_log.append(ValidationTypeError(msg, parent_key, key))
         elif error_type == "rule":
-            self.error_log.append(ValidationRuleError(msg, parent_key))
+            self.error_log.append(ValidationRuleError(msg, parent_key, key))
         elif error_type == "content":
-            self.error_log.append(ValidationContentError(msg, parent_key))
+            self.error_log.append(ValidationContentError(msg, parent_key, key))
         else:
             self.error_log.append(ValidatorExecutionError(msg))
@@ -0,0 +1,8 @@
+from .aggregator import VoteAggregator, VoteStatistics, canonicalize, fingerprint
+
+__all__ = [
+    "VoteAggregator",
+    "VoteStatistics",
+    "canonicalize",
+    "fingerprint",
+]
@@ -0,0 +1,187 @@
+import hashlib
+import json
+import math
+from collections import Counter
+from typing import Any, Callable, Iterable, Optional
+
+from structgenie.pydantic_v1 import BaseModel
+from structgenie.utils.helper import remove_reasoning
+
+REASONING_KEYS = ("reason", "chain-of-thoughts", "reasoning")
+
+
+def canonicalize(value: Any) -> Any:
+    """Return a hashable canonical form of an output value.
+
+    Dicts are order-insensitive, strings are compared case-insensitive with collapsed whitespace, lists keep their
+    order. Values which are neither are represented by their type and repr.
+    """
+    if isinstance(value, dict):
+        return ("dict", tuple(sorted(
+            ((str(key).strip().lower(), canonicalize(item)) for key, item in value.items()),
+            key=lambda pair: pair[0],
+        )))
+    if isinstance(value, (list, tuple)):
+        return ("list", tuple(canonicalize(item) for item in value))
+    if isinstance(value, str):
+        return " ".join(value.split()).casefold()
+    if isinstance(value, bool) or value is None or (isinstance(value, float) and math.isnan(value)):
+        return ("const", repr(value))
+    if isinstance(value, (int, float)):
+        return float(value)
+    return (type(value).__name__, repr(value))
+
+
+def canonicalize_output(output: dict) -> Any:
+    """Return the canonical form of an output without its reasoning keys."""
+    return canonicalize(remove_reasoning(dict(output)))
+
+
+def fingerprint(output: dict) -> str:
+    """Return a stable fingerprint of an output, outputs with the same canonical form share a fingerprint."""
+    canonical = json.dumps(canonicalize_output(output), default=str, ensure_ascii=False)
+    return hashlib.sha1(canonical.encode("utf-8")).hexdigest()
+
+
+class VoteStatistics(BaseModel):
+    """Statistics of a vote."""
+    total_votes: float = 0
+    num_outputs: int = 0
+    distinct_outputs: int = 0
+    leading_votes: float = 0
+    runner_up_votes: float = 0
+    agreement: float = 0  # share of the votes for the leading output
+    margin: float = 0  # votes between the leading output and the runner-up
+    entropy: float = 0  # entropy of the vote distribution in bits, 0 for a unanimous vote
+
+
+class VoteAggregator:
+    """Count votes of generation outputs in a single pass.
+
+    Outputs are counted by their canonical form, so outputs differing only in key order, whitespace, casing or
+    reasoning are counted as the same vote. Votes are counted for the full output and for each key, every vote
+    can be weighted.
+
+    Usage:
+        aggregator = VoteAggregator(outputs)
+        output, votes = aggregator.leading()
+        value, votes = aggregator.leading_by_key("genre")
+        statistics = aggregator.statistics()
+
+    Args:
+        outputs (Iterable[dict], optional): Outputs to count. Defaults to None.
+        weight (Callable[[dict], float], optional): Weight of the vote of an output. Defaults to 1 for every output.
+    """
+
+    def __init__(self, outputs: Iterable[dict] = None, weight: Callable[[dict], float] = None):
+        self.weight = weight
+        self.num_outputs = 0
+        self._counts = Counter()
+        self._representatives = {}  # canonical form -> first output seen
+        self._key_counts = {}  # key -> Counter of canonical values
+        self._key_representatives = {}  # key -> canonical value -> first value seen
+        if outputs:
+            self.extend(outputs)
+
+    def add(self, output: dict, weight: float = None):
+        """Add the vote of an output, weighted by the given weight or the weight function of the aggregator."""
+        if weight is None:
+            weight = self.weight(output) if self.weight else 1
+        self.num_outputs += 1
+        if not output or weight <= 0:
+            return
+
+        canonical_values = {}
+        for key, value in output.items():
+            if key in REASONING_KEYS:
+                continue
+            canonical = canonicalize(value)
+            canonical_values[str(key).strip().lower()] = canonical
+            self._key_counts.setdefault(key, Counter())[canonical] += weight
+            self._key_representatives.setdefault(key, {}).setdefault(canonical, value)
+
+        canonical = ("dict", tuple(sorted(canonical_values.items(), key=lambda pair: pair[0])))
+        self._counts[canonical] += weight
+        self._representatives.setdefault(canonical, output)
+
+    def extend(self, outputs: Iterable[dict], weights: Iterable[float] = None):
+        """Add the votes of several outputs."""
+        if weights is None:
+            for output in outputs:
+                self.add(output)
+        else:
+            for output, weight in zip(outputs, weights):
+                self.add(output, weight)
+
+    @property
+    def total_votes(self) -> float:
+        return sum(self._counts.values())
+
+    def counts(self) -> list[tuple[dict, float]]:
+        """Return the distinct outputs with their votes in order of first appearance."""
+        return [(self._representatives[canonical], votes) for canonical, votes in self._counts.items()]
+
+    def counts_by_key(self, key: str) -> list[tuple[Any, float]]:
+        """Return the distinct values of a key with their votes in order of first appearance."""
+        representatives = self._key_representatives.get(key, {})
+        return [(representatives[canonical], votes) for canonical, votes in self._key_counts.get(key, Counter()).items()]
+
+    def rank(self) -> list[tuple[dict, float]]:
+        """Return the distinct outputs with their votes, most voted first and first seen first on equal votes."""
+        return [(self._representatives[canonical], votes) for canonical, votes in self._counts.most_common()]
+
+    def rank_by_key(self, key: str) -> list[tuple[Any, float]]:
+        """Return the distinct values of a key with their votes, most voted first."""
+        representatives = self._key_representatives.get(key, {})
+        return [
+            (representatives[canonical], votes) for canonical, votes in self._key_counts.get(key, Counter()).most_common()
+        ]
+
+    def leading(self) -> tuple[Optional[dict], float]:
+        """Return the leading output and its votes, (None, 0) if there are no votes."""
+        ranked = self._counts.most_common(1)
+        if not ranked:
+            return None, 0
+        canonical, votes = ranked[0]
+        return self._representatives[canonical], votes
+
+    def leading_by_key(self, key: str) -> tuple[Any, float]:
+        """Return the leading value of a key and its votes, (None, 0) if there are no votes for the key."""
+        ranked = self._key_counts.get(key, Counter()).most_common(1)
+        if not ranked:
+            return None, 0
+        canonical, votes = ranked[0]
+        return self._key_representatives[key][canonical], votes
+
+    def keys(self) -> list[str]:
+        """Return the keys voted on, reasoning keys excluded."""
+        return list(self._key_counts)
+
+    def is_decided(self, min_votes: float, remaining_votes: float = 0) -> bool:
+        """Check if the leading output has min_votes and can not be overtaken by the remaining votes."""
+        ranked = self._counts.most_common(2)
+        if not ranked:
+            return False
+        leading = ranked[0][1]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0
+        return leading >= min_votes and leading > runner_up + remaining_votes
+
+    def statistics(self) -> VoteStatistics:
+        """Return the statistics of the vote."""
+        ranked = self._counts.most_common()
+        total = sum(votes for _, votes in ranked)
+        if not total:
+            return VoteStatistics(num_outputs=self.num_outputs)
+        leading = ranked[0][1]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0
+        entropy = -sum(votes / total * math.log2(votes / total) for _, votes in ranked)
+        return VoteStatistics(
+            total_votes=total,
+            num_outputs=self.num_outputs,
+            distinct_outputs=len(ranked),
+            leading_votes=leading,
+            runner_up_votes=runner_up,
+            agreement=leading / total,
+            margin=leading - runner_up,
+            entropy=abs(entropy),
+        )
@@ -0,0 +1,172 @@
+"""Content addressed response cache for generation drivers.
+
+Responses are keyed by a hash of the model name, the model config and the final message list, so only
+identical requests are served from the cache.
+"""
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from abc import ABC, abstractmethod
+from typing import Optional
+
+from structgenie.utils.cache import LRUCache
+
+
+def cache_key(model_name: str, llm_kwargs: Optional[dict], messages: list[dict]) -> str:
+    """Hash model name, model config and messages into a cache key."""
+    payload = json.dumps(
+        {"model_name": model_name, "llm_kwargs": llm_kwargs or {}, "messages": messages},
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class BaseResponseCache(ABC):
+    """Interface for response caches.
+
+    Entries are dicts with the generated `text` and the `token_usage` of the original request.
+    """
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+
+    def lookup(self, key: str) -> Optional[dict]:
+        """Get an entry and count the hit or miss."""
+        entry = self.get(key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    @abstractmethod
+    def get(self, key: str) -> Optional[dict]:
+        pass
+
+    @abstractmethod
+    def set(self, key: str, entry: dict):
+        pass
+
+    @abstractmethod
+    def clear(self):
+        pass
+
+
+class MemoryResponseCache(BaseResponseCache):
+    """In process response cache with LRU and time to live eviction.
+
+    Args:
+        max_size (int, optional): Max number of cached responses. Defaults to 1024.
+        ttl (float, optional): Seconds after which a response expires. Defaults to None (no expiry).
+    """
+
+    def __init__(self, max_size: Optional[int] = 1024, ttl: Optional[float] = None):
+        super().__init__()
+        self._cache = LRUCache(max_size=max_size, ttl=ttl)
+
+    def get(self, key: str) -> Optional[dict]:
+        return self._cache.get(key)
+
+    def set(self, key: str, entry: dict):
+        self._cache.set(key, entry)
+
+    def clear(self):
+        self._cache.clear()
+
+    def __len__(self):
+        return len(self._cache)
+
+
+class SQLiteResponseCache(BaseResponseCache):
+    """Response cache stored in a local SQLite database, survives restarts.
+
+    Args:
+        path (str, optional): Path of the database file. Defaults to `.structgenie_cache.sqlite`.
+        ttl (float, optional): Seconds after which a response expires. Defaults to None (no expiry).
+    """
+
+    def __init__(self, path: str = ".structgenie_cache.sqlite", ttl: Optional[float] = None):
+        super().__init__()
+        self.path = path
+        self.ttl = ttl
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        with self._lock, self._conn:
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS responses "
+                "(key TEXT PRIMARY KEY, entry TEXT NOT NULL, created REAL NOT NULL)"
+            )
+
+    def get(self, key: str) -> Optional[dict]:
+        with self._lock:
+            row = self._conn.execute("SELECT entry, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                return None
+            entry, created = row
+            if self.ttl is not None and created + self.ttl < time.time():
+                with self._conn:
+                    self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+                return None
+        return json.loads(entry)
+
+    def set(self, key: str, entry: dict):
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, entry, created) VALUES (?, ?, ?)",
+                (key, json.dumps(entry), time.time())
+            )
+
+    def clear(self):
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM responses")
+
+    def close(self):
+        self._conn.close()
+
+
+class TieredResponseCache(BaseResponseCache):
+    """Response cache checking multiple tiers in order, e.g. memory before disk.
+
+    Hits of a later tier are promoted to the earlier tiers, new entries are written to all tiers.
+
+    Usage:
+        cache = TieredResponseCache(MemoryResponseCache(), SQLiteResponseCache("cache.sqlite"))
+    """
+
+    def __init__(self, *tiers: BaseResponseCache):
+        super().__init__()
+        if not tiers:
+            raise ValueError("TieredResponseCache needs at least one tier.")
+        self.tiers = list(tiers)
+
+    def get(self, key: str) -> Optional[dict]:
+        for i, tier in enumerate(self.tiers):
+            entry = tier.get(key)
+            if entry is not None:
+                for upper in self.tiers[:i]:
+                    upper.set(key, entry)
+                return entry
+        return None
+
+    def set(self, key: str, entry: dict):
+        for tier in self.tiers:
+            tier.set(key, entry)
+
+    def clear(self):
+        for tier in self.tiers:
+            tier.clear()
+
+
+def load_response_cache(path: str = None, max_size: Optional[int] = 1024, ttl: Optional[float] = None):
+    """Load an in memory response cache, backed by a SQLite cache at path if given."""
+    memory = MemoryResponseCache(max_size=max_size, ttl=ttl)
+    if path is None:
+        return memory
+    return TieredResponseCache(memory, SQLiteResponseCache(path, ttl=ttl))
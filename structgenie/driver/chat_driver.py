@@ -1,7 +1,10 @@
+import asyncio
+import time
 from abc import ABC, abstractmethod
-from typing import Any, Union, Tuple
+from typing import Any, Union, Tuple, Optional, Iterator, AsyncIterator
 
-from structgenie.base import BaseGenerationDriver
+from structgenie.base import BaseGenerationDriver, sum_metrics
+from structgenie.driver.cache import BaseResponseCache, cache_key
 from structgenie.driver.utils import split_prompt, create_examples_messages, create_chat_message, message_to_str
 from structgenie.utils.logging import console_logger as logger
 
@@ -16,6 +19,7 @@ class ChatDriver(BaseGenerationDriver, ABC):
     llm_kwargs: dict = None
     max_retries: int = 4
     verbose: int = 0
+    cache: Optional[BaseResponseCache] = None
 
     @classmethod
     def prompt_mode(cls):
@@ -65,6 +69,145 @@ class ChatDriver(BaseGenerationDriver, ABC):
     async def async_completion(self, memory: list[dict] = None, **kwargs):
         pass
 
+    def stream_completion(self, memory: list[dict] = None, **kwargs) -> Iterator[str]:
+        """Stream the completion in chunks and set `stream_metrics` when done.
+
+        Falls back to a single chunk with the full completion, drivers with streaming support override this.
+        """
+        text, self.stream_metrics = self.completion(memory=memory, **kwargs)
+        yield text
+
+    async def async_stream_completion(self, memory: list[dict] = None, **kwargs) -> AsyncIterator[str]:
+        """Stream the completion in chunks and set `stream_metrics` when done. (async)"""
+        text, self.stream_metrics = await self.async_completion(memory=memory, **kwargs)
+        yield text
+
+    def sample(self, n: int, memory: list[dict] = None, **kwargs) -> Tuple[list[str], dict]:
+        """Generate n samples for the same prompt.
+
+        Samples bypass the response cache, as identical requests are expected to give different samples.
+        """
+        results = [self.completion(memory=memory, **kwargs) for _ in range(n)]
+        return [text for text, _ in results], sum_metrics([metrics for _, metrics in results])
+
+    async def asample(self, n: int, memory: list[dict] = None, **kwargs) -> Tuple[list[str], dict]:
+        """Generate n samples for the same prompt. (async)"""
+        results = await asyncio.gather(*[self.async_completion(memory=memory, **kwargs) for _ in range(n)])
+        return [text for text, _ in results], sum_metrics([metrics for _, metrics in results])
+
+    # === Cache ===
+
+    def _cache_key(self, memory: list[dict] = None, **kwargs) -> str:
+        messages = self.parse_prompt(memory=memory, **kwargs)
+        return cache_key(self.model_name, self.llm_kwargs, messages)
+
+    def _cache_hit_metrics(self, entry: dict, exec_start: float) -> dict:
+        return {
+            "execution_time": time.time() - exec_start,
+            "token_usage": 0,
+            "tokens_saved": entry.get("token_usage", 0),
+            "cache_hits": 1,
+            "cache_misses": 0,
+            "model_name": self.model_name,
+            "model_config": self.llm_kwargs,
+        }
+
+    def _cache_store(self, key: str, text: str, metrics: dict) -> dict:
+        self.cache.set(key, {"text": text, "token_usage": metrics.get("token_usage", 0)})
+        return {**metrics, "cache_misses": 1}
+
+    def cached_completion(self, memory: list[dict] = None, **kwargs) -> Tuple[str, dict]:
+        """Call completion, serving identical requests from the response cache if set."""
+        if self.cache is None:
+            return self.completion(memory=memory, **kwargs)
+
+        exec_start = time.time()
+        key = self._cache_key(memory=memory, **kwargs)
+        entry = self.cache.lookup(key)
+        if entry is not None:
+            return entry["text"], self._cache_hit_metrics(entry, exec_start)
+
+        text, metrics = self.completion(memory=memory, **kwargs)
+        return text, self._cache_store(key, text, metrics)
+
+    async def async_cached_completion(self, memory: list[dict] = None, **kwargs) -> Tuple[str, dict]:
+        """Call async_completion, serving identical requests from the response cache if set."""
+        if self.cache is None:
+            return await self.async_completion(memory=memory, **kwargs)
+
+        exec_start = time.time()
+        key = self._cache_key(memory=memory, **kwargs)
+        entry = self.cache.lookup(key)
+        if entry is not None:
+            return entry["text"], self._cache_hit_metrics(entry, exec_start)
+
+        text, metrics = await self.async_completion(memory=memory, **kwargs)
+        return text, self._cache_store(key, text, metrics)
+
+    # === Stream ===
+
+    def stream(self, memory: list[dict] = None, **kwargs) -> Iterator[str]:
+        """Stream the generated text in chunks.
+
+        Identical requests are served from the response cache as a single chunk if set. The performance metrics
+        are set as `stream_metrics` once the stream is exhausted.
+
+        Args:
+            memory (list[dict], optional): The memory. Defaults to None.
+            **kwargs: Keyword arguments for the prompt to pass into placeholder.
+
+        Yields:
+            str: Chunks of the generated text.
+        """
+        if self.cache is None:
+            yield from self.stream_completion(memory=memory, **kwargs)
+            return
+
+        exec_start = time.time()
+        key = self._cache_key(memory=memory, **kwargs)
+        entry = self.cache.lookup(key)
+        if entry is not None:
+            self.stream_metrics = self._cache_hit_metrics(entry, exec_start)
+            yield entry["text"]
+            return
+
+        chunks = []
+        for chunk in self.stream_completion(memory=memory, **kwargs):
+            chunks.append(chunk)
+            yield chunk
+        self.stream_metrics = self._cache_store(key, "".join(chunks), self.stream_metrics or {})
+
+    async def astream(self, memory: list[dict] = None, **kwargs) -> AsyncIterator[str]:
+        """Stream the generated text in chunks. (async)
+
+        Args:
+            memory (list[dict], optional): The memory. Defaults to None.
+            **kwargs: Keyword arguments for the prompt to pass into placeholder.
+
+        Yields:
+            str: Chunks of the generated text.
+        """
+        if self.cache is None:
+            async for chunk in self.async_stream_completion(memory=memory, **kwargs):
+                yield chunk
+            return
+
+        exec_start = time.time()
+        key = self._cache_key(memory=memory, **kwargs)
+        entry = self.cache.lookup(key)
+        if entry is not None:
+            self.stream_metrics = self._cache_hit_metrics(entry, exec_start)
+            yield entry["text"]
+            return
+
+        chunks = []
+        async for chunk in self.async_stream_completion(memory=memory, **kwargs):
+            chunks.append(chunk)
+            yield chunk
+        self.stream_metrics = self._cache_store(key, "".join(chunks), self.stream_metrics or {})
+
+    # === Predict ===
+
     def predict(self, memory: list[dict] = None, **kwargs) -> str:
         """Generate the text.
 
@@ -75,7 +218,7 @@ class ChatDriver(BaseGenerationDriver, ABC):
         Returns:
             str: The generated text.
         """
-        text, _ = self.completion(**kwargs)
+        text, _ = self.cached_completion(memory=memory, **kwargs)
         return text
 
     def predict_and_measure(self, memory: list[dict] = None, **kwargs) -> Tuple[str, dict]:
@@ -88,7 +231,7 @@ class ChatDriver(BaseGenerationDriver, ABC):
         Returns:
             Tuple[str, dict]: The generated text and the performance metrics.
         """
-        text, metrics = self.completion(**kwargs)
+        text, metrics = self.cached_completion(memory=memory, **kwargs)
         return text, metrics
 
     async def predict_async(self, memory: list[dict] = None, **kwargs) -> str:
@@ -101,7 +244,7 @@ class ChatDriver(BaseGenerationDriver, ABC):
         Returns:
             str: The generated text.
         """
-        text, _ = await self.async_completion(**kwargs)
+        text, _ = await self.async_cached_completion(memory=memory, **kwargs)
         return text
 
     async def predict_and_measure_async(self, memory: list[dict] = None, **kwargs) -> Tuple[str, dict]:
@@ -114,5 +257,5 @@ class ChatDriver(BaseGenerationDriver, ABC):
         Returns:
             Tuple[str, dict]: The generated text and the performance metrics.
         """
-        text, metrics = await self.async_completion(**kwargs)
+        text, metrics = await self.async_cached_completion(memory=memory, **kwargs)
         return text, metrics
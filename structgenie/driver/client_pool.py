@@ -0,0 +1,204 @@
+"""Process wide pool of OpenAI clients.
+
+Clients are keyed by API base and credentials and share pooled httpx connections, so consecutive requests reuse
+open connections instead of repeating client setup and TLS handshakes.
+
+Usage:
+    from structgenie.driver.client_pool import client_pool
+
+    client_pool.configure(max_connections=200, http2=True)
+    client_pool.warmup(connections=10)
+"""
+import asyncio
+import os
+import threading
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Tuple
+
+import httpx
+import openai
+
+from structgenie.utils.logging import console_logger as logger
+
+DEFAULT_BASE_URL = "https://api.openai.com/v1"
+
+ClientKey = Tuple[str, Optional[str], Optional[str]]
+
+
+class OpenAIClientPool:
+    """Pool of sync and async OpenAI clients with shared connection limits.
+
+    Args:
+        max_connections (int, optional): Max open connections per client. Defaults to 100.
+        max_keepalive_connections (int, optional): Max idle connections kept alive per client. Defaults to 20.
+        keepalive_expiry (float, optional): Seconds an idle connection is kept alive. Defaults to 30.
+        http2 (bool, optional): Use HTTP/2, requires the `h2` package. Defaults to False.
+        timeout (float, optional): Request timeout in seconds. Defaults to the openai default.
+    """
+
+    def __init__(
+            self,
+            max_connections: int = 100,
+            max_keepalive_connections: int = 20,
+            keepalive_expiry: float = 30.0,
+            http2: bool = False,
+            timeout: Optional[float] = None):
+        self.max_connections = max_connections
+        self.max_keepalive_connections = max_keepalive_connections
+        self.keepalive_expiry = keepalive_expiry
+        self.http2 = http2
+        self.timeout = timeout
+
+        self._lock = threading.Lock()
+        self._clients: dict[ClientKey, openai.OpenAI] = {}
+        # async clients are bound to the event loop they were created in
+        self._async_clients: dict[ClientKey, weakref.WeakKeyDictionary] = {}
+
+    # === Configuration ===
+
+    def configure(self, **kwargs):
+        """Update the pool settings.
+
+        Clients created with the previous settings are dropped from the pool but not closed, as in-flight requests
+        may still use them. Their connections are released once the clients are garbage collected.
+        """
+        for key, value in kwargs.items():
+            if not hasattr(self, key) or key.startswith("_"):
+                raise ValueError(f"Unknown client pool setting: {key}")
+            setattr(self, key, value)
+        with self._lock:
+            self._clients = {}
+            self._async_clients = {}
+
+    @property
+    def limits(self) -> httpx.Limits:
+        return httpx.Limits(
+            max_connections=self.max_connections,
+            max_keepalive_connections=self.max_keepalive_connections,
+            keepalive_expiry=self.keepalive_expiry,
+        )
+
+    def _http_kwargs(self) -> dict:
+        if self.http2:
+            try:
+                import h2  # noqa: F401
+            except ImportError:
+                raise ImportError("To use HTTP/2 for the client pool, you need to install the h2 package.")
+        kwargs = {"limits": self.limits, "http2": self.http2}
+        if self.timeout is not None:
+            kwargs["timeout"] = self.timeout
+        else:
+            kwargs["timeout"] = openai.DEFAULT_TIMEOUT
+        return kwargs
+
+    @staticmethod
+    def client_key(
+            base_url: str = None,
+            api_key: str = None,
+            organization: str = None) -> ClientKey:
+        """Resolve the pool key, falling back to the environment like the openai clients do."""
+        return (
+            base_url or os.environ.get("OPENAI_BASE_URL") or DEFAULT_BASE_URL,
+            api_key or os.environ.get("OPENAI_API_KEY"),
+            organization or os.environ.get("OPENAI_ORG_ID"),
+        )
+
+    # === Clients ===
+
+    def get_client(self, base_url: str = None, api_key: str = None, organization: str = None) -> openai.OpenAI:
+        """Get the pooled sync client for the API base and credentials."""
+        key = self.client_key(base_url, api_key, organization)
+        with self._lock:
+            client = self._clients.get(key)
+            if client is None:
+                client = openai.OpenAI(
+                    base_url=key[0],
+                    api_key=key[1],
+                    organization=key[2],
+                    http_client=httpx.Client(**self._http_kwargs()),
+                )
+                self._clients[key] = client
+            return client
+
+    def get_async_client(
+            self,
+            base_url: str = None,
+            api_key: str = None,
+            organization: str = None) -> openai.AsyncOpenAI:
+        """Get the pooled async client for the API base and credentials and the running event loop."""
+        key = self.client_key(base_url, api_key, organization)
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            clients = self._async_clients.setdefault(key, weakref.WeakKeyDictionary())
+            client = clients.get(loop)
+            if client is None:
+                client = openai.AsyncOpenAI(
+                    base_url=key[0],
+                    api_key=key[1],
+                    organization=key[2],
+                    http_client=httpx.AsyncClient(**self._http_kwargs()),
+                )
+                clients[loop] = client
+            return client
+
+    # === Warmup ===
+
+    def warmup(self, connections: int = 1, **client_kwargs):
+        """Open connections of the sync client ahead of the first request.
+
+        Each connection is opened by listing the models, failed requests are logged and not retried.
+
+        Args:
+            connections (int, optional): Number of connections to open. Defaults to 1.
+            **client_kwargs: base_url, api_key and organization of the client.
+        """
+        connections = min(connections, self.max_connections)
+        if connections <= 0:
+            return
+        client = self.get_client(**client_kwargs).with_options(max_retries=0)
+        with ThreadPoolExecutor(max_workers=connections) as executor:
+            list(executor.map(lambda _: self._warmup_request(client), range(connections)))
+
+    async def awarmup(self, connections: int = 1, **client_kwargs):
+        """Open connections of the async client ahead of the first request.
+
+        Args:
+            connections (int, optional): Number of connections to open. Defaults to 1.
+            **client_kwargs: base_url, api_key and organization of the client.
+        """
+        connections = min(connections, self.max_connections)
+        if connections <= 0:
+            return
+        client = self.get_async_client(**client_kwargs).with_options(max_retries=0)
+        await asyncio.gather(*[self._awarmup_request(client) for _ in range(connections)])
+
+    @staticmethod
+    def _warmup_request(client: openai.OpenAI):
+        try:
+            client.models.list()
+        except openai.OpenAIError as e:
+            logger.warning(f"Client pool warmup failed: {e}")
+
+    @staticmethod
+    async def _awarmup_request(client: openai.AsyncOpenAI):
+        try:
+            await client.models.list()
+        except openai.OpenAIError as e:
+            logger.warning(f"Client pool warmup failed: {e}")
+
+    # === Cleanup ===
+
+    def close(self):
+        """Close the sync clients and drop all pooled clients."""
+        with self._lock:
+            for client in self._clients.values():
+                client.close()
+            self._clients = {}
+            self._async_clients = {}
+
+    def __len__(self):
+        return len(self._clients) + sum(len(clients) for clients in self._async_clients.values())
+
+
+client_pool = OpenAIClientPool()
@@ -6,6 +6,7 @@ from mistralai.client import MistralClient
 from mistralai.client_base import ClientBase
 from mistralai.models.chat_completion import ChatMessage
 
+from structgenie.driver.cache import BaseResponseCache
 from structgenie.driver.chat_driver import ChatDriver
 from structgenie.utils.openai import create_retry_decorator
 import os
@@ -40,6 +41,7 @@ class MistralDriver(ChatDriver):
             prompt: Union[str, Any],
             model_name: str = "mistral-medium-latest",
             llm_kwargs: dict = None,
+            cache: BaseResponseCache = None,
             **kwargs):
         """Load the driver.
 
@@ -54,6 +56,7 @@ class MistralDriver(ChatDriver):
         cls_.prompt = prompt
         cls_.model_name = model_name
         cls_.llm_kwargs = llm_kwargs or {}
+        cls_.cache = cache
         return cls_
 
     @staticmethod
@@ -94,9 +97,9 @@ class MistralDriver(ChatDriver):
     def completion(self, memory: list[dict] = None, **kwargs):
         api_key = self._verify_api_key()
         client = MistralClient(api_key=api_key)
-        return self._completion(client, **kwargs)
+        return self._completion(client, memory=memory, **kwargs)
 
     async def async_completion(self, memory: list[dict] = None, **kwargs):
         api_key = self._verify_api_key()
         client = MistralAsyncClient(api_key=api_key)
-        return self._completion(client, **kwargs)
+        return self._completion(client, memory=memory, **kwargs)
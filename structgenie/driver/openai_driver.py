@@ -1,13 +1,13 @@
 """Custom openai driver for structgenie.
 
-using openai 1.2.0 OpenAI() client
+using openai 1.2.0 OpenAI() clients shared through the client pool
 """
 import time
-from typing import Any, Union, Tuple
-
-import openai
+from typing import Any, Union, Tuple, Iterator, AsyncIterator
 
+from structgenie.driver.cache import BaseResponseCache
 from structgenie.driver.chat_driver import ChatDriver
+from structgenie.driver.client_pool import OpenAIClientPool, client_pool as default_client_pool
 from structgenie.driver.utils import split_prompt, create_examples_messages, create_chat_message, message_to_str
 from structgenie.utils.openai import create_retry_decorator
 from structgenie.utils.logging import console_logger as logger
@@ -23,6 +23,7 @@ class OpenAIDriver(ChatDriver):
     llm_kwargs: dict = None
     max_retries: int = 4
     verbose: int = 0
+    client_pool: OpenAIClientPool = None
 
     @classmethod
     def prompt_mode(cls):
@@ -34,6 +35,8 @@ class OpenAIDriver(ChatDriver):
             prompt: Union[str, Any],
             model_name: str = "gpt-3.5-turbo",
             llm_kwargs: dict = None,
+            cache: BaseResponseCache = None,
+            client_pool: OpenAIClientPool = None,
             **kwargs):
         """Load the driver.
 
@@ -41,6 +44,8 @@ class OpenAIDriver(ChatDriver):
             prompt (Union[str, Any]): The prompt.
             model_name (str, optional): The model name. Defaults to "gpt-3.5-turbo".
             llm_kwargs (dict, optional): The model config. Defaults to None.
+            cache (BaseResponseCache, optional): Response cache for identical requests. Defaults to None.
+            client_pool (OpenAIClientPool, optional): Client pool to use. Defaults to the process wide pool.
 
         Returns:
             OpenAIDriver: The driver.
@@ -50,10 +55,17 @@ class OpenAIDriver(ChatDriver):
         cls_.prompt = prompt
         cls_.model_name = model_name
         cls_.llm_kwargs = llm_kwargs or {}
+        cls_.cache = cache
+        cls_.client_pool = client_pool
         return cls_
 
+    @property
+    def pool(self) -> OpenAIClientPool:
+        """The client pool of the driver, defaults to the process wide pool."""
+        return self.client_pool if self.client_pool is not None else default_client_pool
+
     def completion(self, memory: list[dict] = None, **kwargs):
-        client = openai.OpenAI()
+        client = self.pool.get_client()
         messages = self.parse_prompt(memory=memory, **kwargs)
         exec_start = time.time()
 
@@ -79,7 +91,7 @@ class OpenAIDriver(ChatDriver):
         return result, execution_metrics
 
     async def async_completion(self, memory: list[dict] = None, **kwargs):
-        client = openai.AsyncOpenAI()
+        client = self.pool.get_async_client()
         messages = self.parse_prompt(memory=memory, **kwargs)
         exec_start = time.time()
 
@@ -103,6 +115,133 @@ class OpenAIDriver(ChatDriver):
         }
         return result, execution_metrics
 
+    def sample(self, n: int, memory: list[dict] = None, **kwargs) -> Tuple[list[str], dict]:
+        """Generate n samples with a single request using the `n` parameter of the chat API.
+
+        The prompt is sent and billed as input once for all samples.
+        """
+        client = self.pool.get_client()
+        messages = self.parse_prompt(memory=memory, **kwargs)
+        exec_start = time.time()
+
+        retry_decorator = create_retry_decorator(self)
+
+        @retry_decorator
+        def _completion():
+            return client.chat.completions.create(
+                model=self.model_name,
+                messages=messages,
+                **{**self.llm_kwargs, "n": n}
+            )
+
+        response = _completion()
+        return [choice.message.content for choice in response.choices], {
+            "execution_time": time.time() - exec_start,
+            "token_usage": response.usage.total_tokens,
+            "model_name": self.model_name,
+            "model_config": self.llm_kwargs,
+        }
+
+    async def asample(self, n: int, memory: list[dict] = None, **kwargs) -> Tuple[list[str], dict]:
+        """Generate n samples with a single request using the `n` parameter of the chat API. (async)"""
+        client = self.pool.get_async_client()
+        messages = self.parse_prompt(memory=memory, **kwargs)
+        exec_start = time.time()
+
+        retry_decorator = create_retry_decorator(self)
+
+        @retry_decorator
+        async def _completion():
+            return await client.chat.completions.create(
+                model=self.model_name,
+                messages=messages,
+                **{**self.llm_kwargs, "n": n}
+            )
+
+        response = await _completion()
+        return [choice.message.content for choice in response.choices], {
+            "execution_time": time.time() - exec_start,
+            "token_usage": response.usage.total_tokens,
+            "model_name": self.model_name,
+            "model_config": self.llm_kwargs,
+        }
+
+    def stream_completion(self, memory: list[dict] = None, **kwargs) -> Iterator[str]:
+        """Stream the completion in chunks.
+
+        Token usage is only reported by the API if requested with
+        `llm_kwargs={"stream_options": {"include_usage": True}}`.
+        """
+        client = self.pool.get_client()
+        messages = self.parse_prompt(memory=memory, **kwargs)
+        exec_start = time.time()
+
+        retry_decorator = create_retry_decorator(self)
+
+        @retry_decorator
+        def _completion():
+            return client.chat.completions.create(
+                model=self.model_name,
+                messages=messages,
+                stream=True,
+                **self.llm_kwargs
+            )
+
+        self.stream_metrics = None
+        response = _completion()
+        token_usage = 0
+        try:
+            for chunk in response:
+                if getattr(chunk, "usage", None):
+                    token_usage = chunk.usage.total_tokens
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            response.close()
+
+        self.stream_metrics = {
+            "execution_time": time.time() - exec_start,
+            "token_usage": token_usage,
+            "model_name": self.model_name,
+            "model_config": self.llm_kwargs,
+        }
+
+    async def async_stream_completion(self, memory: list[dict] = None, **kwargs) -> AsyncIterator[str]:
+        """Stream the completion in chunks. (async)"""
+        client = self.pool.get_async_client()
+        messages = self.parse_prompt(memory=memory, **kwargs)
+        exec_start = time.time()
+
+        retry_decorator = create_retry_decorator(self)
+
+        @retry_decorator
+        async def _completion():
+            return await client.chat.completions.create(
+                model=self.model_name,
+                messages=messages,
+                stream=True,
+                **self.llm_kwargs
+            )
+
+        self.stream_metrics = None
+        response = await _completion()
+        token_usage = 0
+        try:
+            async for chunk in response:
+                if getattr(chunk, "usage", None):
+                    token_usage = chunk.usage.total_tokens
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            await response.close()
+
+        self.stream_metrics = {
+            "execution_time": time.time() - exec_start,
+            "token_usage": token_usage,
+            "model_name": self.model_name,
+            "model_config": self.llm_kwargs,
+        }
+
 
 if __name__ == "__main__":
     pass
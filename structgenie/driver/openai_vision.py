@@ -1,13 +1,12 @@
 """Custom openai driver for structgenie.
 
-using openai 1.2.0 OpenAI() client
+using openai 1.2.0 OpenAI() clients shared through the client pool
 """
 import time
 from typing import Any, Union, Tuple
 
-import openai
-
 from structgenie.base import BaseGenerationDriver
+from structgenie.driver.client_pool import OpenAIClientPool, client_pool as default_client_pool
 from structgenie.driver.utils import split_prompt, create_examples_messages, create_chat_message, \
     create_chat_message_with_image, parse_image_path
 
@@ -20,6 +19,7 @@ class OpenAIDriverVision(BaseGenerationDriver):
     prompt: str = None
     model_name: str = None
     llm_kwargs: dict = None
+    client_pool: OpenAIClientPool = None
 
     @classmethod
     def prompt_mode(cls):
@@ -31,11 +31,13 @@ class OpenAIDriverVision(BaseGenerationDriver):
             prompt: Union[str, Any],
             model_name: str = "gpt-4-vision-preview",
             llm_kwargs: dict = None,
+            client_pool: OpenAIClientPool = None,
             **kwargs):
         """Load the driver.
 
         Args:
             prompt (Union[str, Any]): The prompt.
+            client_pool (OpenAIClientPool, optional): Client pool to use. Defaults to the process wide pool.
 
         Returns:
             OpenAIDriver: The driver.
@@ -45,8 +47,14 @@ class OpenAIDriverVision(BaseGenerationDriver):
         cls_.prompt = prompt
         cls_.model_name = model_name
         cls_.llm_kwargs = llm_kwargs or {}
+        cls_.client_pool = client_pool
         return cls_
 
+    @property
+    def pool(self) -> OpenAIClientPool:
+        """The client pool of the driver, defaults to the process wide pool."""
+        return self.client_pool if self.client_pool is not None else default_client_pool
+
     def parse_prompt(self, image_path: str = None, **kwargs) -> list[dict]:
         # add inputs to prompt
         prompt = self.prompt.format(**kwargs)
@@ -70,7 +78,7 @@ class OpenAIDriverVision(BaseGenerationDriver):
         return messages
 
     def completion(self, **kwargs):
-        client = openai.OpenAI()
+        client = self.pool.get_client()
         messages = self.parse_prompt(**kwargs)
         exec_start = time.time()
         response = client.chat.completions.create(
@@ -89,7 +97,7 @@ class OpenAIDriverVision(BaseGenerationDriver):
         return result, execution_metrics
 
     async def async_completion(self, **kwargs):
-        client = openai.AsyncOpenAI()
+        client = self.pool.get_async_client()
         messages = self.parse_prompt(**kwargs)
         exec_start = time.time()
         response = await client.chat.completions.create(
@@ -1,7 +1,9 @@
 from .genie import StructEngine
 from .conditional import ConditionalEngine
+from .context import RunContext
 
 __all__ = [
     "StructEngine",
-    "ConditionalEngine"
+    "ConditionalEngine",
+    "RunContext"
 ]
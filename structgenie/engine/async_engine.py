@@ -1,54 +1,85 @@
-import asyncio
-from typing import Union, Tuple
+import time
+from typing import Union, Tuple, Iterable, AsyncIterator, Optional
 
 from structgenie.base import BaseGenerationDriver
+from structgenie.components.output_parser.stream import StreamingOutputParser
+from structgenie.engine.batch import DEFAULT_MAX_CONCURRENCY, run_as_completed, run_ordered
+from structgenie.engine.context import RunContext
 from structgenie.engine.genie import StructEngine
-from structgenie.errors import EngineRunError, ParsingError, ValidationError, MaxRetriesError
+from structgenie.errors import EngineRunError, ParsingError, ValidationError, MaxRetriesError, is_output_error
 
 
 class AsyncEngine(StructEngine):
 
-    async def apply(self, input_list: list[dict], **kwargs):
-        return await asyncio.gather(*[self.run(input_data, **kwargs) for input_data in input_list])
+    async def apply(
+            self,
+            input_list: Iterable[dict],
+            max_concurrency: Optional[int] = DEFAULT_MAX_CONCURRENCY,
+            **kwargs) -> list:
+        """Run the chain for each input with bounded concurrency.
+
+        Args:
+            input_list (Iterable[dict]): The inputs for the chain.
+            max_concurrency (int, optional): Max number of concurrent runs. None for no limit.
+            **kwargs: Keyword arguments for each run.
+
+        Returns:
+            list: The results in input order. Failed runs are returned as exception objects.
+        """
+        return await run_ordered(self.run, input_list, max_concurrency=max_concurrency, **kwargs)
+
+    async def apply_as_completed(
+            self,
+            input_list: Iterable[dict],
+            max_concurrency: Optional[int] = DEFAULT_MAX_CONCURRENCY,
+            **kwargs) -> AsyncIterator[Tuple[int, Union[dict, Tuple[dict, dict], Exception]]]:
+        """Run the chain for each input with bounded concurrency and yield (index, result) as each run finishes.
+
+        Failed runs are yielded as exception objects.
+        """
+        async for index, result in run_as_completed(self.run, input_list, max_concurrency=max_concurrency, **kwargs):
+            yield index, result
 
-    async def run(self, inputs: dict, raise_error: bool = False, **kwargs) -> Union[dict, Tuple[dict, dict]]:
+    async def run(
+            self,
+            inputs: dict,
+            raise_error: bool = False,
+            context: RunContext = None,
+            **kwargs) -> Union[dict, Tuple[dict, dict]]:
         """Run the chain.
 
         Args:
             inputs (dict): The inputs for the chain.
             raise_error (bool): If True, errors will be raised.
+            context (RunContext, optional): The context of the run. Defaults to a new context.
             **kwargs: Keyword arguments for the chain.
 
         Returns:
             Any: The output of the chain.
         """
-        self.last_error = None
-        error_index = 0
-
-        self.memory = kwargs.get("memory", [])
+        context = context or RunContext.from_kwargs(**kwargs)
 
-        n_run = 0
-        while n_run <= self.max_retries:
+        while context.n_run <= self.max_retries:
             try:
-                output = await self._run(inputs, error_msg=self.last_error, **kwargs)
+                output = await self._run(inputs, context, **kwargs)
                 if self.return_metrics:
-                    self.errors_to_string()
-                    return output, self.run_metrics
+                    self.errors_to_string(context)
+                    return output, context.run_metrics
                 return output
 
             except Exception as e:
-                n_run, error_index = self._on_run_error(e, error_index, n_run, raise_error)
+                self._on_run_error(e, context, raise_error)
 
         e = MaxRetriesError(f"exceeded max retries: {self.max_retries}")
-        self._log_error(e)
+        self._log_error(e, context)
         raise e
 
-    async def _run(self, inputs: dict, error_msg: str, **kwargs):
+    async def _run(self, inputs: dict, context: RunContext, **kwargs):
         """Run the chain.
 
         Args:
             inputs (dict): The inputs for the chain.
-            error_msg (Exception): The error of the previous run.
+            context (RunContext): The context of the run holding the error of the previous attempt.
             **kwargs: Keyword arguments for the chain.
 
         Returns:
@@ -57,7 +88,7 @@ class AsyncEngine(StructEngine):
 
         # prepare
         inputs = self.prep_inputs(inputs, **kwargs)
-        prompt = self.prep_prompt(error_msg, **inputs)
+        prompt = self.prep_prompt(context.last_error, context.last_output, **inputs)
         inputs_ = self.format_inputs(prompt, inputs, **kwargs)
         self._log_message(
             "Prompt",
@@ -66,42 +97,196 @@ class AsyncEngine(StructEngine):
 
         # generate
         executor = self.prep_executor(prompt, **kwargs)
-        text, run_metrics = await self._call_executor(executor, inputs_)
-        self._log_metrics(run_metrics)
+        text, run_metrics = await self._call_executor(executor, inputs_, context)
+        self._log_metrics(run_metrics, context)
 
-        self.last_output = text
+        context.last_output = text
         self._log_message(
             "Execution",
             generation_output=text,
             run_metrics=run_metrics
         )
         # parse
-        output = self.parse_output(text, inputs)
+        output = await self.aparse_output(text, inputs, context)
 
         # validate
-        self.validate_output(output, inputs)
+        if self.repair_failed_keys:
+            output = await self.arepair_output(output, inputs, context)
+        else:
+            self.validate_output(output, inputs, context)
 
         return output
 
+    async def asample(self, inputs: dict, n: int, context: RunContext = None, **kwargs) -> list:
+        """Generate n outputs from a single prompt, e.g. as votes.
+
+        The prompt is built once and the driver generates the samples, with a single request if it supports
+        several samples per request. Each sample is parsed and validated, samples failing are returned as the
+        exception instead of being retried. Run metrics are collected in the context.
+
+        Args:
+            inputs (dict): The inputs for the chain.
+            n (int): The number of samples.
+            context (RunContext, optional): The context of the run. Defaults to a new context.
+            **kwargs: Keyword arguments for the chain.
+
+        Returns:
+            list: The outputs and exceptions of failed samples.
+        """
+        context = context or RunContext.from_kwargs(**kwargs)
+
+        inputs = self.prep_inputs(inputs, **kwargs)
+        prompt = self.prep_prompt(**inputs)
+        inputs_ = self.format_inputs(prompt, inputs, **kwargs)
+
+        executor = self.prep_executor(prompt, **kwargs)
+        texts, run_metrics = await executor.asample(n, memory=context.memory, **inputs_)
+        self._log_metrics(run_metrics, context)
+
+        outputs = []
+        for text in texts:
+            try:
+                output = await self.aparse_output(text, inputs, context)
+                self.validate_output(output, inputs, context)
+                outputs.append(output)
+            except Exception as e:
+                if not is_output_error(e):
+                    raise e
+                outputs.append(e)
+        return outputs
+
+    async def astream(
+            self,
+            inputs: dict,
+            raise_error: bool = False,
+            context: RunContext = None,
+            **kwargs) -> AsyncIterator[dict]:
+        """Run the chain and stream the output.
+
+        Yields the partial output each time a top level key of the output model is complete. The last yielded
+        dict is the parsed and validated output. A retry after a failed attempt starts again with an empty partial
+        output. Run metrics are collected in the context.
+
+        Args:
+            inputs (dict): The inputs for the chain.
+            raise_error (bool): If True, errors will be raised.
+            context (RunContext, optional): The context of the run. Defaults to a new context.
+            **kwargs: Keyword arguments for the chain.
+
+        Yields:
+            dict: The partial output, the last one is the complete output.
+        """
+        context = context or RunContext.from_kwargs(**kwargs)
+
+        while context.n_run <= self.max_retries:
+            try:
+                async for output in self._astream(inputs, context, **kwargs):
+                    yield output
+                self.errors_to_string(context)
+                return
+
+            except Exception as e:
+                self._on_run_error(e, context, raise_error)
+
+        e = MaxRetriesError(f"exceeded max retries: {self.max_retries}")
+        self._log_error(e, context)
+        raise e
+
+    async def _astream(self, inputs: dict, context: RunContext, **kwargs) -> AsyncIterator[dict]:
+        """Stream a single attempt of the chain."""
+
+        # prepare
+        inputs = self.prep_inputs(inputs, **kwargs)
+        prompt = self.prep_prompt(context.last_error, context.last_output, **inputs)
+        inputs_ = self.format_inputs(prompt, inputs, **kwargs)
+
+        # generate
+        executor = self.prep_executor(prompt, **kwargs)
+        stream_parser = StreamingOutputParser(self.output_model)
+        partial_output = {}
+        exec_start = time.time()
+        stream = executor.astream(memory=context.memory, **inputs_)
+        try:
+            async for chunk in stream:
+                completed = stream_parser.feed(chunk)
+                if completed:
+                    self._check_streamed(completed, inputs, stream_parser.text, exec_start, context)
+                    partial_output = {**partial_output, **completed}
+                    yield partial_output
+        finally:
+            # closing the stream cancels the request if the generation is aborted
+            await stream.aclose()
+            stream_parser.close()
+
+        text = stream_parser.text
+        self._log_metrics(executor.stream_metrics, context)
+        context.last_output = text
+        self._log_message(
+            "Execution",
+            generation_output=text,
+            run_metrics=executor.stream_metrics
+        )
+
+        # parse and validate the full output
+        output = await self.aparse_output(text, inputs, context)
+        if self.repair_failed_keys:
+            output = await self.arepair_output(output, inputs, context)
+        else:
+            self.validate_output(output, inputs, context)
+
+        yield output
+
+    async def aparse_output(self, text: str, inputs: dict, context: RunContext = None):
+        """Parse the output of the chain without blocking the event loop, LLM fixing runs with async engines.
+
+        Returns a dictionary of the parsed output.
+        """
+        context = context or RunContext()
+        parsed = await self._output_parser().aparse(text, inputs)
+        return self._handle_parsed(*parsed, context=context)
+
+    async def arepair_output(self, output: dict, inputs: dict, context: RunContext = None) -> dict:
+        """Validate the output and regenerate only the keys failing validation. (async)
+
+        See StructEngine.repair_output.
+        """
+        context = context or RunContext()
+
+        repair = self._prep_repair(output, inputs, context, engine_cls=AsyncEngine)
+        if repair is None:
+            return output
+
+        engine, repair_context, keys = repair
+        if engine is None:
+            return self._merge_repair(output, {}, keys, None, inputs, context)
+        try:
+            repaired, run_metrics = await engine.run(inputs, raise_error=True, context=repair_context)
+        except Exception as e:
+            self._log_message("Repair Failed", error=str(e))
+            raise ValidationError("Repair of failed keys failed")
+
+        return self._merge_repair(output, repaired, keys, run_metrics, inputs, context)
+
     async def _call_executor(
             self,
             executor: BaseGenerationDriver,
             inputs: dict,
+            context: RunContext,
     ) -> Union[Tuple[str, None], Tuple[str, dict]]:
         """Call the executor.
 
         Args:
             executor (Any): The executor.
             inputs (dict): The inputs for the executor.
+            context (RunContext): The context of the current run.
         Returns:
             str: The output of the executor.
             dict|None: run_metric if return_metrics is True
         """
         if self.return_metrics:
-            result, run_metrics = await executor.predict_and_measure_async(memory=self.memory, **inputs)
-            self._log_metrics(run_metrics)
+            result, run_metrics = await executor.predict_and_measure_async(memory=context.memory, **inputs)
         else:
-            result = await executor.predict_async(memory=self.memory, **inputs)
+            result = await executor.predict_async(memory=context.memory, **inputs)
             run_metrics = None
 
         return result, run_metrics
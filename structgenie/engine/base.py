@@ -1,3 +1,4 @@
+import threading
 import uuid
 from abc import abstractmethod, ABC
 from typing import Union, Type, Tuple, Optional
@@ -14,41 +15,42 @@ from structgenie.components.input_output import (
     load_input_model,
     init_input_model
 )
+from structgenie.components.output_parser.output_parser import DEFAULT_MAX_FIX_CONCURRENCY
+from structgenie.components.prompt.plan import PromptPlan
+from structgenie.driver.cache import BaseResponseCache
 from structgenie.driver.openai_driver import OpenAIDriver
 from structgenie.errors import EngineRunError, ParsingError, ValidationError, is_output_error
 from structgenie.utils.templates import (
     extract_sections, load_default_template, load_system_config
 )
+from structgenie.engine.context import DEFAULT_RUN_METRICS, RunContext
 from structgenie.utils.logging import console_logger as logger
 
-DEFAULT_RUN_METRICS = {
-    "execution_time": 0,
-    "token_usage": 0,
-    "model_name": None,
-    "model_config": None,
-    "failure_rate": 0,
-    "errors": [],
-}
+# guards compiling engines which were not compiled on load, so concurrent runs do not compile twice
+_compile_lock = threading.Lock()
 
 
 class BaseEngine(BaseModel, ABC):
     run_id: str = Field(default_factory=lambda: str(uuid.uuid4().hex))
-    run_metrics: dict = DEFAULT_RUN_METRICS
 
     # executor
     driver: Type[BaseGenerationDriver] = OpenAIDriver
     model_name: str = "gpt-3.5-turbo"
     llm_kwargs: dict = Field(default_factory=dict)
+    cache: Optional[BaseResponseCache] = None
 
     # prompt
     prompt_builder: BasePromptBuilder = None
+    prompt_plan: Optional[PromptPlan] = None
 
     # validation settings
     validator: BaseValidator = None
+    repair_failed_keys: bool = False
 
     # parser
     fix_parsing_by_llm: bool = True
     fix_parsing_partially_by_llm: bool = True
+    max_fix_concurrency: int = DEFAULT_MAX_FIX_CONCURRENCY
 
     # run settings
     max_retries: int = 4
@@ -60,18 +62,14 @@ class BaseEngine(BaseModel, ABC):
     debug: bool = False
     raise_errors: bool = False
     return_metrics: bool = True
+    abort_on_invalid_stream: bool = True
 
     # logging
     verbose: int = 0
 
-    # run states
-    last_error: Union[str, None] = None
-    last_output: Union[str, None] = None
     partial_variables: dict = None
-    memory: list[dict] = None  # [{"role": "assistant", "content": "I am a chatbot"}]
 
     return_reasoning: bool = False
-    num_metrics_logged: int = 0
 
     class Config:
         arbitrary_types_allowed = True
@@ -81,16 +79,48 @@ class BaseEngine(BaseModel, ABC):
     def set_example_selector(self, examples: BaseExampleSelector):
         self.prompt_builder.examples = examples
         self.examples = examples
+        self.compile()
 
     def set_instruction(self, instruction: str):
         self.prompt_builder.instruction = instruction
         self.instruction = instruction
+        self.compile()
 
     def set_output_model(self, output_model: OutputModel):
         from structgenie.components.validation import Validator
         self.prompt_builder.output_model = output_model
         self.validator = Validator.from_output_model(output_model)
         self.output_model = output_model
+        self.compile()
+
+    # === Compile ===
+
+    def compile(self) -> "BaseEngine":
+        """Compile the prompt builder into a frozen prompt plan for the prompt mode of the driver.
+
+        Runs only splice the input dependent sections into the plan. Changes made directly to the prompt builder
+        require compiling the engine again, the setters of the engine compile it.
+        """
+        chat_mode = self.driver.prompt_mode() == "chat"
+        self.prompt_plan = self.prompt_builder.compile(chat_mode=chat_mode)
+        return self
+
+    def get_prompt_plan(self) -> PromptPlan:
+        """Return the prompt plan for the prompt mode of the driver.
+
+        Engines are compiled on load, so runs only read the plan. Engines which were not compiled yet, e.g.
+        constructed directly, are compiled once under a lock.
+        """
+        plan = self.prompt_plan
+        if plan is None or self._plan_outdated(plan):
+            with _compile_lock:
+                plan = self.prompt_plan
+                if plan is None or self._plan_outdated(plan):
+                    plan = self.compile().prompt_plan
+        return plan
+
+    def _plan_outdated(self, plan: PromptPlan) -> bool:
+        return self.driver.prompt_mode() == "chat" and not plan.chat_mode
 
     # === RUN ===
 
@@ -221,12 +251,12 @@ class BaseEngine(BaseModel, ABC):
             input_model=input_model,
             examples=examples,
             **kwargs
-        )
+        ).compile()
 
     # === Log/Debug ===
 
-    def _log_metrics(self, metrics: dict):
-        """Log run metrics.
+    def _log_metrics(self, metrics: dict, context: RunContext):
+        """Log run metrics to the run context.
 
         Remarks: Model name and config are only logged if not already set because output_fixing run
         could have different model and config.
@@ -235,23 +265,30 @@ class BaseEngine(BaseModel, ABC):
         if not metrics:
             metrics = {}
 
-        inc_fr = 0 if self.num_metrics_logged == 0 else 1
+        run_metrics = context.run_metrics
+        inc_fr = 0 if context.num_metrics_logged == 0 else 1
 
-        if not self.run_metrics["model_name"]:
-            self.run_metrics["model_name"] = metrics.get("model_name", None)
+        if not run_metrics["model_name"]:
+            run_metrics["model_name"] = metrics.get("model_name", None)
 
-        if not self.run_metrics["model_config"]:
-            self.run_metrics["model_config"] = metrics.get("model_config", None)
+        if not run_metrics["model_config"]:
+            run_metrics["model_config"] = metrics.get("model_config", None)
 
-        self.run_metrics["token_usage"] += metrics.get("token_usage", 0)
-        self.run_metrics["execution_time"] += metrics.get("execution_time", 0)
-        self.run_metrics["failure_rate"] += metrics.get("failure_rate", inc_fr)
-        self.run_metrics["errors"].extend(metrics.get("errors", []))
-        self.num_metrics_logged += 1
+        run_metrics["token_usage"] += metrics.get("token_usage", 0)
+        run_metrics["execution_time"] += metrics.get("execution_time", 0)
+        run_metrics["failure_rate"] += metrics.get("failure_rate", inc_fr)
+        run_metrics["tokens_saved"] += metrics.get("tokens_saved", 0)
+        run_metrics["cache_hits"] += metrics.get("cache_hits", 0)
+        run_metrics["cache_misses"] += metrics.get("cache_misses", 0)
+        run_metrics["streams_aborted"] += metrics.get("streams_aborted", 0)
+        run_metrics["keys_repaired"] += metrics.get("keys_repaired", 0)
+        run_metrics["errors"].extend(metrics.get("errors", []))
+        context.num_metrics_logged += 1
 
-    def _log_error(self, error: Exception):
-        """Log error in run_metrics."""
-        self.run_metrics["errors"].append(error)
+    @staticmethod
+    def _log_error(error: Exception, context: RunContext):
+        """Log error in run_metrics of the run context."""
+        context.run_metrics["errors"].append(error)
 
     # TODO: Add debug logging to file
 
@@ -283,48 +320,48 @@ class BaseEngine(BaseModel, ABC):
             self,
             executor: BaseGenerationDriver,
             inputs: dict,
+            context: RunContext,
     ) -> Union[Tuple[str, None], Tuple[str, dict]]:
         """Call the executor.
 
         Args:
             executor (Any): The executor.
             inputs (dict): The inputs for the executor.
+            context (RunContext): The context of the current run.
         Returns:
             str: The output of the executor.
             dict|None: run_metric if return_metrics is True
         """
         if self.return_metrics:
-            result, run_metrics = executor.predict_and_measure(memory=self.memory, **inputs)
-            self._log_metrics(run_metrics)
+            result, run_metrics = executor.predict_and_measure(memory=context.memory, **inputs)
         else:
-            result, run_metrics = executor.predict(memory=self.memory, **inputs), None
+            result, run_metrics = executor.predict(memory=context.memory, **inputs), None
 
         return result, run_metrics
 
     # === Error Handling ===
 
-    def _on_run_error(self, e, error_index, n_run, raise_error):
+    def _on_run_error(self, e: Exception, context: RunContext, raise_error: bool):
+        """Log the error of a failed run attempt and prepare the error message for the next attempt."""
         if raise_error or self.raise_errors or not is_output_error(e):
             raise e
 
-        e = EngineRunError(f"run_num: {n_run}/{self.max_retries} ", e)
-        self._log_error(e)
+        e = EngineRunError(f"run_num: {context.n_run}/{self.max_retries} ", e)
+        self._log_error(e, context)
         # prepare error remarks
-        if len(self.run_metrics["errors"]) > error_index:
-            new_errors = [er for er in self.run_metrics["errors"][error_index:]]
+        errors = context.run_metrics["errors"]
+        if len(errors) > context.error_index:
+            new_errors = [er for er in errors[context.error_index:]]
             prompt_errors = [
                 str(er) for er in new_errors if isinstance(er, ParsingError) or isinstance(er, ValidationError)
             ]
-            error_index = len(self.run_metrics["errors"])
-            self.last_error = "\n - ".join(prompt_errors)
+            context.error_index = len(errors)
+            context.last_error = "\n - ".join(prompt_errors)
         self._log_message(
-            f"Run Error #{n_run}/{self.max_retries}",
+            f"Run Error #{context.n_run}/{self.max_retries}",
             raised=str(e),
-            new_errors=self.last_error,
-            error_index=error_index,
-            run_metrics=self.run_metrics["errors"]
+            new_errors=context.last_error,
+            error_index=context.error_index,
+            run_metrics=errors
         )
-        n_run += 1
-        return n_run, error_index
-
-
+        context.n_run += 1
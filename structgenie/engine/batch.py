@@ -0,0 +1,73 @@
+"""Bounded concurrency batch execution for async engines."""
+import asyncio
+from typing import Any, AsyncIterator, Awaitable, Callable, Iterable, Optional, Tuple
+
+DEFAULT_MAX_CONCURRENCY = 10
+
+
+async def run_as_completed(
+        func: Callable[..., Awaitable[Any]],
+        input_list: Iterable[Any],
+        max_concurrency: Optional[int] = DEFAULT_MAX_CONCURRENCY,
+        **kwargs
+) -> AsyncIterator[Tuple[int, Any]]:
+    """Call func for each item of input_list and yield (index, result) as soon as each call finishes.
+
+    At most max_concurrency calls are running at the same time and input_list is consumed lazily, so generators
+    of inputs are never fully materialized. Exceptions raised by a call are yielded as result instead of
+    cancelling the remaining calls.
+
+    Args:
+        func (Callable): Coroutine function called with each item and kwargs.
+        input_list (Iterable): The inputs.
+        max_concurrency (int, optional): Max number of concurrent calls. None for no limit.
+        **kwargs: Keyword arguments passed to each call.
+    """
+    if max_concurrency is not None and max_concurrency < 1:
+        raise ValueError(f"max_concurrency must be at least 1, got {max_concurrency}")
+
+    async def _call(index: int, item: Any) -> Tuple[int, Any]:
+        try:
+            return index, await func(item, **kwargs)
+        except Exception as e:
+            return index, e
+
+    inputs = enumerate(input_list)
+    pending = set()
+
+    def _schedule():
+        while max_concurrency is None or len(pending) < max_concurrency:
+            try:
+                index, item = next(inputs)
+            except StopIteration:
+                return
+            pending.add(asyncio.ensure_future(_call(index, item)))
+
+    _schedule()
+    try:
+        while pending:
+            done, _ = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                pending.discard(task)
+            _schedule()
+            for task in sorted(done, key=lambda t: t.result()[0]):
+                yield task.result()
+    finally:
+        for task in pending:
+            task.cancel()
+
+
+async def run_ordered(
+        func: Callable[..., Awaitable[Any]],
+        input_list: Iterable[Any],
+        max_concurrency: Optional[int] = DEFAULT_MAX_CONCURRENCY,
+        **kwargs
+) -> list:
+    """Call func for each item of input_list with bounded concurrency and return the results in input order.
+
+    Failed calls are returned as exception objects at their index.
+    """
+    results = {}
+    async for index, result in run_as_completed(func, input_list, max_concurrency=max_concurrency, **kwargs):
+        results[index] = result
+    return [results[index] for index in range(len(results))]
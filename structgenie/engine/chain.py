@@ -1,24 +1,95 @@
-from typing import Union
+import asyncio
+from string import Formatter
+from typing import Iterable, Optional, Tuple, Type, Union
 
-from structgenie.base import BaseEngine
-from structgenie.engine.genie import StructGenie
+from nest_asyncio import apply
+
+from structgenie.base import sum_metrics
+from structgenie.components.input_output.output_schema import schema_placeholders
+from structgenie.engine.async_engine import AsyncEngine
+from structgenie.engine.base import BaseEngine
+from structgenie.engine.batch import DEFAULT_MAX_CONCURRENCY, run_ordered
+from structgenie.pydantic_v1 import BaseModel, Field
 
 TEMPLATE_SEPERATOR = "%%%"
 
 
+class ChainStep(BaseModel):
+    """A compiled step of a chain.
+
+    Attributes:
+        index (int): Position of the step in the chain.
+        engine (BaseEngine): The compiled engine of the step.
+        input_keys (list[str]): Keys the prompt of the step depends on.
+        output_keys (list[str]): Keys generated by the step.
+        depends_on (list[int]): Indices of the previous steps generating the input keys.
+        upstream (list[int]): Indices of the dependencies and their upstream steps, their outputs are merged into
+            the inputs of the step.
+    """
+    index: int
+    engine: BaseEngine
+    input_keys: list[str] = Field(default_factory=list)
+    output_keys: list[str] = Field(default_factory=list)
+    depends_on: list[int] = Field(default_factory=list)
+    upstream: list[int] = Field(default_factory=list)
+
+    class Config:
+        arbitrary_types_allowed = True
+
+
+def _placeholder_key(field: str) -> str:
+    return field.split(".")[0].split("[")[0]
+
+
+def _template_placeholders(text: Optional[str]) -> list[str]:
+    if not text:
+        return []
+    try:
+        return [_placeholder_key(field) for _, field, _, _ in Formatter().parse(text) if field]
+    except ValueError:
+        return []
+
+
+def _step_input_keys(engine: BaseEngine) -> list[str]:
+    """Keys the prompt of the engine depends on: the input model, placeholders of the instruction and of the
+    output schema, and the example inputs if examples are selected by the inputs."""
+    keys = []
+    if engine.input_model:
+        for line in engine.input_model.lines:
+            keys.extend(line.placeholder or [line.key])
+    keys.extend(_template_placeholders(engine.instruction))
+    if engine.output_model:
+        keys.extend(_placeholder_key(placeholder) for placeholder in schema_placeholders(engine.output_model))
+    if engine.examples and getattr(engine.examples, "input_dependent", False):
+        keys.extend(engine.examples.input_keys)
+    return list(dict.fromkeys(keys))
+
+
 class StructChain(BaseEngine):
-    """Prediction Chain."""
+    """Prediction Chain.
+
+    The templates are compiled once into engines with declared input and output keys. A step depends on the last
+    previous step generating one of its input keys, steps are run as soon as their dependencies are finished, so
+    independent steps run concurrently. A step referencing all inputs with the `{inputs}` placeholder depends on
+    all previous steps.
+
+    Each step gets the inputs updated with the outputs of its upstream steps in step order. Unlike a sequential
+    run, the outputs of independent previous steps are not merged, as they do not affect the prompt of the
+    step. The outputs of all steps are merged into the result in step order.
+    """
     templates: list[str]
     template_seperator: str = TEMPLATE_SEPERATOR
-    default_engine: BaseEngine = StructGenie
+    default_engine: Type[BaseEngine] = AsyncEngine
+    engine_kwargs: dict = Field(default_factory=dict)
+    steps: list[ChainStep] = Field(default_factory=list)
 
     @classmethod
-    def from_instruction(cls, instruction: str, **kwargs) -> "PredictionChain":
+    def from_instruction(cls, instruction: str, **kwargs) -> "StructChain":
         """Build Prediction Chain from instruction."""
         return NotImplemented
 
     @classmethod
-    def load_engine(cls, **kwargs) -> "PredictionChain":
+    def load_engine(cls, **kwargs) -> "StructChain":
         """Load Prediction Chain."""
         return NotImplemented
 
@@ -26,25 +97,131 @@ class StructChain(BaseEngine):
     def from_template(
             cls,
             templates: Union[list[str], str],
-            **kwargs) -> "PredictionChain":
+            template_seperator: str = TEMPLATE_SEPERATOR,
+            default_engine: Type[BaseEngine] = AsyncEngine,
+            **kwargs) -> "StructChain":
         """Build Prediction Chain from template.
 
-        Split templates by template_seperator and run engine in sequence.
+        Split templates by template_seperator and compile an engine for each template. Keyword arguments are
+        passed to the engines.
         """
 
         if isinstance(templates, str):
-            templates = [t.strip() for t in templates.split(TEMPLATE_SEPERATOR)]
+            templates = [t.strip() for t in templates.split(template_seperator)]
+
+        chain_kwargs = {key: kwargs[key] for key in ("debug", "verbose", "return_metrics") if key in kwargs}
+        chain = cls(
+            templates=templates,
+            template_seperator=template_seperator,
+            default_engine=default_engine,
+            engine_kwargs=kwargs,
+            **chain_kwargs
+        )
+        return chain.compile()
+
+    # === Compile ===
 
-        return cls(templates=templates, **kwargs)
+    def compile(self) -> "StructChain":
+        """Compile the templates into engines and resolve the dependencies between the steps."""
+        steps = []
+        producers = {}  # output key -> index of the last step generating it
+        for index, template in enumerate(self.templates):
+            engine = self.default_engine.from_template(template, **self.engine_kwargs)
+            if engine.prompt_builder is not None:
+                engine.compile()
+            input_keys = _step_input_keys(engine)
+            output_keys = engine.output_model.keys() if engine.output_model else []
+            if "inputs" in input_keys and "inputs" not in producers:
+                depends_on = list(range(index))
+            else:
+                depends_on = sorted({producers[key] for key in input_keys if key in producers})
+            upstream = sorted(set(depends_on).union(*(steps[dependency].upstream for dependency in depends_on)))
+            steps.append(
+                ChainStep(
+                    index=index,
+                    engine=engine,
+                    input_keys=input_keys,
+                    output_keys=output_keys,
+                    depends_on=depends_on,
+                    upstream=upstream,
+                )
+            )
+            producers.update({key: index for key in output_keys})
+        self.steps = steps
+        return self
 
-    def run(self, inputs: dict, **kwargs):
+    # === RUN ===
+
+    def run(self, inputs: dict, raise_error: bool = False, **kwargs) -> Union[dict, Tuple[dict, dict]]:
         """Run Prediction Chain."""
-        for i, template in enumerate(self.templates):
-            engine = self.default_engine.from_template(template, **kwargs)
-            outputs = engine.run(inputs, **kwargs)
-            print(f"Finished run {i} of {len(self.templates) - 1} with: \n")
-            print(outputs)
-            print("\n=== Next run ===\n")
-            inputs.update(outputs)
-
-        return inputs
+        apply()
+        return asyncio.run(self.arun(inputs, raise_error=raise_error, **kwargs))
+
+    async def arun(self, inputs: dict, raise_error: bool = False, **kwargs) -> Union[dict, Tuple[dict, dict]]:
+        """Run Prediction Chain, steps whose dependencies are finished run concurrently.
+
+        Args:
+            inputs (dict): The inputs for the chain.
+            raise_error (bool): If True, errors of the steps are raised by the engines.
+            **kwargs: Keyword arguments for the engine runs.
+
+        Returns:
+            dict: The inputs updated with the outputs of all steps, and the summed run metrics if return_metrics
+                is set.
+        """
+        if not self.steps:
+            self.compile()
+
+        results = {}  # step index -> (output, metrics)
+        tasks = {}
+
+        async def _run_after(step: ChainStep):
+            if step.depends_on:
+                await asyncio.gather(*(tasks[index] for index in step.depends_on))
+            step_inputs = dict(inputs)
+            for index in step.upstream:
+                step_inputs.update(results[index][0])
+            results[step.index] = await self._run_step(step, step_inputs, raise_error=raise_error, **kwargs)
+            self._log_message(
+                f"Finished step {step.index} of {len(self.steps) - 1}", outputs=results[step.index][0]
+            )
+
+        for step in self.steps:
+            tasks[step.index] = asyncio.ensure_future(_run_after(step))
+        try:
+            await asyncio.gather(*tasks.values())
+        finally:
+            for task in tasks.values():
+                task.cancel()
+
+        outputs = dict(inputs)
+        for step in self.steps:
+            outputs.update(results[step.index][0])
+
+        if self.return_metrics:
+            return outputs, sum_metrics([results[step.index][1] for step in self.steps])
+        return outputs
+
+    async def apply(
+            self,
+            input_list: Iterable[dict],
+            max_concurrency: Optional[int] = DEFAULT_MAX_CONCURRENCY,
+            **kwargs) -> list:
+        """Run the chain for each input with bounded concurrency.
+
+        Returns:
+            list: The results in input order. Failed runs are returned as exception objects.
+        """
+        return await run_ordered(self.arun, input_list, max_concurrency=max_concurrency, **kwargs)
+
+    @staticmethod
+    async def _run_step(step: ChainStep, inputs: dict, **kwargs) -> Tuple[dict, Optional[dict]]:
+        """Run the engine of a step, engines without async run are run in a thread."""
+        if asyncio.iscoroutinefunction(step.engine.run):
+            result = await step.engine.run(inputs, **kwargs)
+        else:
+            result = await asyncio.to_thread(step.engine.run, inputs, **kwargs)
+
+        if isinstance(result, tuple):
+            return result
+        return result, None
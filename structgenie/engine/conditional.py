@@ -7,7 +7,7 @@ from structgenie.components.prompt.builder import PromptBuilder
 from structgenie.components.prompt.conditional_builder import ConditionalPromptBuilder
 from structgenie.components.validation._object import validate_missing_keys, validate_unexpected_keys, required_keys
 from structgenie.engine import StructEngine
-from structgenie.errors import ValidationError
+from structgenie.utils.operator.default_loops import has_defaults
 from structgenie.utils.templates import load_system_config
 
 
@@ -82,7 +82,7 @@ class ConditionalEngine(StructEngine):
             examples=examples,
             validator_else=validator_else,
             **kwargs
-        )
+        ).compile()
 
     def check_condition(self, inputs: dict, output: dict) -> bool:
         """Check the condition.
@@ -128,31 +128,29 @@ class ConditionalEngine(StructEngine):
 
         return False
 
-    def validate_output(self, output: dict, inputs: dict):
-        """Validate the output of the chain.
+    def _select_validator(self, inputs: dict, output: dict) -> BaseValidator:
+        """Select the validator based on the condition."""
+        if self.check_condition(inputs, output):
+            return self.validator
+        return self.validator_else
 
-        Selects the validator based on the condition and validates the output.
+    def validate_streamed(self, completed: dict, inputs: dict) -> list:
+        """Validate the top level keys completed while streaming.
 
-        Args:
-            output (Any): The output of the chain.
-            inputs (dict): The inputs for the chain for extra variables used in output_schema.
+        The branch of the condition is not known before the output is complete, so a key is only invalid if
+        it violates both output models. Keys with defaults are skipped.
 
         Returns:
-            Any: The output of the chain.
+            list: The validation errors.
         """
-
-        if self.check_condition(inputs, output):
-            validator = self.validator
-        else:
-            validator = self.validator_else
-
-        validation_errors = validator.validate(output, inputs)
-        if validation_errors:
-            errors = {f"Error_{i}": str(error) for i, error in enumerate(validation_errors)}
-            self._log_message(
-                "Validation Error",
-                **errors,
-            )
-            for error in validation_errors:
-                self._log_error(error)
-            raise ValidationError("Validation failed with errors")
+        errors = []
+        for key, value in completed.items():
+            if self.output_model.get(key) and has_defaults(self.output_model.get_nested_dict(key)):
+                continue
+            errors_if = self.validator.validate_item(key, value, inputs)
+            if not errors_if:
+                continue
+            if self.validator_else and not self.validator_else.validate_item(key, value, inputs):
+                continue
+            errors.extend(errors_if)
+        return errors
@@ -0,0 +1,52 @@
+import copy
+import uuid
+from typing import Optional
+
+from structgenie.pydantic_v1 import BaseModel, Field
+
+DEFAULT_RUN_METRICS = {
+    "execution_time": 0,
+    "token_usage": 0,
+    "model_name": None,
+    "model_config": None,
+    "failure_rate": 0,
+    "tokens_saved": 0,
+    "cache_hits": 0,
+    "cache_misses": 0,
+    "streams_aborted": 0,
+    "keys_repaired": 0,
+    "errors": [],
+}
+
+
+def default_run_metrics() -> dict:
+    """Return a fresh copy of the default run metrics."""
+    return copy.deepcopy(DEFAULT_RUN_METRICS)
+
+
+class RunContext(BaseModel):
+    """State of a single engine run.
+
+    Carries retry state, memory and metrics through one run (including its retries), so a single engine instance
+    can serve concurrent runs without sharing state between them.
+    """
+    run_id: str = Field(default_factory=lambda: str(uuid.uuid4().hex))
+    memory: list[dict] = Field(default_factory=list)  # [{"role": "assistant", "content": "I am a chatbot"}]
+
+    # retry state
+    n_run: int = 0
+    error_index: int = 0
+    last_error: Optional[str] = None
+    last_output: Optional[str] = None
+
+    # metrics
+    run_metrics: dict = Field(default_factory=default_run_metrics)
+    num_metrics_logged: int = 0
+
+    class Config:
+        arbitrary_types_allowed = True
+
+    @classmethod
+    def from_kwargs(cls, **kwargs) -> "RunContext":
+        """Create a run context from the keyword arguments of a run call."""
+        return cls(memory=kwargs.get("memory") or [])
@@ -1,8 +1,16 @@
-from structgenie.base import BaseGenerationDriver
+import time
+from typing import Iterator, Optional
+
+from structgenie.base import BaseGenerationDriver, BaseValidator
 from structgenie.components.output_parser.output_parser import OutputParser
+from structgenie.components.output_parser.fixing import partial_output_model
+from structgenie.components.output_parser.stream import StreamingOutputParser
+from structgenie.components.validation._object import validate_missing_keys, validate_unexpected_keys
 from structgenie.engine.base import BaseEngine
-from structgenie.errors import ParsingError, ValidationError, EngineRunError, MaxRetriesError
+from structgenie.engine.context import RunContext
+from structgenie.errors import ParsingError, ValidationError, ValidationKeyError, EngineRunError, MaxRetriesError
 from structgenie.utils.logging import error_logger
+from structgenie.utils.operator.default_loops import has_defaults
 from structgenie.utils.parsing import (
     dump_to_yaml_string,
     format_inputs,
@@ -16,12 +24,13 @@ class StructEngine(BaseEngine):
 
     # === Run ===
 
-    def run(self, inputs: dict, raise_error: bool = False, **kwargs):
+    def run(self, inputs: dict, raise_error: bool = False, context: RunContext = None, **kwargs):
         """Run the chain.
 
         Args:
             inputs (dict): The inputs for the chain.
             raise_error (bool): If True, errors will be raised.
+            context (RunContext, optional): The context of the run. Defaults to a new context.
             **kwargs: Keyword arguments for the chain.
 
         Returns:
@@ -29,34 +38,30 @@ class StructEngine(BaseEngine):
             (optional) Output (dict), run_metrics (dict): The output of the chain and the run metrics.
 
         """
-        self.last_error = None
-        error_index = 0
-
-        self.memory = kwargs.get("memory", [])
+        context = context or RunContext.from_kwargs(**kwargs)
 
-        n_run = 0
-        while n_run <= self.max_retries:
+        while context.n_run <= self.max_retries:
             try:
-                output = self._run(inputs, error_msg=self.last_error, **kwargs)
+                output = self._run(inputs, context, **kwargs)
                 if self.return_metrics:
-                    self.errors_to_string()
-                    return output, self.run_metrics
+                    self.errors_to_string(context)
+                    return output, context.run_metrics
                 return output
 
             except Exception as e:
                 error_logger.exception("Error in run")
-                n_run, error_index = self._on_run_error(e, error_index, n_run, raise_error)
+                self._on_run_error(e, context, raise_error)
 
         e = MaxRetriesError(f"exceeded max retries: {self.max_retries}")
-        self._log_error(e)
+        self._log_error(e, context)
         raise e
 
-    def _run(self, inputs: dict, error_msg: str, **kwargs):
+    def _run(self, inputs: dict, context: RunContext, **kwargs):
         """Run the chain.
 
         Args:
             inputs (dict): The inputs for the chain.
-            error_msg (Exception): The error of the previous run.
+            context (RunContext): The context of the run holding the error of the previous attempt.
             **kwargs: Keyword arguments for the chain.
 
         Returns:
@@ -65,7 +70,7 @@ class StructEngine(BaseEngine):
 
         # prepare
         inputs = self.prep_inputs(inputs, **kwargs)
-        prompt = self.prep_prompt(error_msg, **inputs)
+        prompt = self.prep_prompt(context.last_error, context.last_output, **inputs)
         inputs_ = self.format_inputs(prompt, inputs, **kwargs)
 
         if "<%last_output%>" in prompt:
@@ -81,41 +86,160 @@ class StructEngine(BaseEngine):
 
         # generate
         executor = self.prep_executor(prompt, **kwargs)
-        text, run_metrics = self._call_executor(executor, inputs_)
-        self._log_metrics(run_metrics)
+        text, run_metrics = self._call_executor(executor, inputs_, context)
+        self._log_metrics(run_metrics, context)
 
-        self.last_output = text
+        context.last_output = text
         self._log_message(
             "Execution",
             generation_output=text,
             run_metrics=run_metrics
         )
         # parse
-        output = self.parse_output(text, inputs)
+        output = self.parse_output(text, inputs, context)
 
         # validate
-        self.validate_output(output, inputs)
+        if self.repair_failed_keys:
+            output = self.repair_output(output, inputs, context)
+        else:
+            self.validate_output(output, inputs, context)
 
         return output
 
-    def prep_prompt(self, error_msg: str = None, **kwargs) -> str:
+    # === Stream ===
+
+    def stream(
+            self,
+            inputs: dict,
+            raise_error: bool = False,
+            context: RunContext = None,
+            **kwargs) -> Iterator[dict]:
+        """Run the chain and stream the output.
+
+        Yields the partial output each time a top level key of the output model is complete. The last yielded
+        dict is the parsed and validated output. A retry after a failed attempt starts again with an empty partial
+        output. Run metrics are collected in the context.
+
+        Args:
+            inputs (dict): The inputs for the chain.
+            raise_error (bool): If True, errors will be raised.
+            context (RunContext, optional): The context of the run. Defaults to a new context.
+            **kwargs: Keyword arguments for the chain.
+
+        Yields:
+            dict: The partial output, the last one is the complete output.
+        """
+        context = context or RunContext.from_kwargs(**kwargs)
+
+        while context.n_run <= self.max_retries:
+            try:
+                yield from self._stream(inputs, context, **kwargs)
+                self.errors_to_string(context)
+                return
+
+            except Exception as e:
+                error_logger.exception("Error in stream")
+                self._on_run_error(e, context, raise_error)
+
+        e = MaxRetriesError(f"exceeded max retries: {self.max_retries}")
+        self._log_error(e, context)
+        raise e
+
+    def _stream(self, inputs: dict, context: RunContext, **kwargs) -> Iterator[dict]:
+        """Stream a single attempt of the chain."""
+
+        # prepare
+        inputs = self.prep_inputs(inputs, **kwargs)
+        prompt = self.prep_prompt(context.last_error, context.last_output, **inputs)
+        inputs_ = self.format_inputs(prompt, inputs, **kwargs)
+
+        # generate
+        executor = self.prep_executor(prompt, **kwargs)
+        stream_parser = StreamingOutputParser(self.output_model)
+        partial_output = {}
+        exec_start = time.time()
+        stream = executor.stream(memory=context.memory, **inputs_)
+        try:
+            for chunk in stream:
+                completed = stream_parser.feed(chunk)
+                if completed:
+                    self._check_streamed(completed, inputs, stream_parser.text, exec_start, context)
+                    partial_output = {**partial_output, **completed}
+                    yield partial_output
+        finally:
+            # closing the stream cancels the request if the generation is aborted
+            stream.close()
+            stream_parser.close()
+
+        text = stream_parser.text
+        self._log_metrics(executor.stream_metrics, context)
+        context.last_output = text
+        self._log_message(
+            "Execution",
+            generation_output=text,
+            run_metrics=executor.stream_metrics
+        )
+
+        # parse and validate the full output
+        output = self.parse_output(text, inputs, context)
+        if self.repair_failed_keys:
+            output = self.repair_output(output, inputs, context)
+        else:
+            self.validate_output(output, inputs, context)
+
+        yield output
+
+    def _check_streamed(self, completed: dict, inputs: dict, text: str, exec_start: float, context: RunContext):
+        """Abort the stream if a completed key already violates the output model."""
+        if not self.abort_on_invalid_stream:
+            return
+
+        validation_errors = self.validate_streamed(completed, inputs)
+        if not validation_errors:
+            return
+
+        errors = {f"Error_{i}": str(error) for i, error in enumerate(validation_errors)}
+        self._log_message("Stream Aborted", **errors)
+        for error in validation_errors:
+            self._log_error(error, context)
+        self._log_metrics({"execution_time": time.time() - exec_start, "streams_aborted": 1}, context)
+        context.last_output = text
+        raise ValidationError("Streamed output is invalid, generation aborted")
+
+    def validate_streamed(self, completed: dict, inputs: dict) -> list:
+        """Validate the top level keys completed while streaming.
+
+        Keys with defaults are skipped as their final value is only set when parsing the full output.
+
+        Returns:
+            list: The validation errors.
+        """
+        errors = []
+        for key, value in completed.items():
+            if self.output_model.get(key) and has_defaults(self.output_model.get_nested_dict(key)):
+                continue
+            errors.extend(self.validator.validate_item(key, value, inputs))
+        return errors
+
+    def prep_prompt(self, error_msg: str = None, last_output: str = None, **kwargs) -> str:
         """Prepare the prompt for the chain.
 
         Args:
             error_msg (Exception): The error message.
+            last_output (str): The output of the previous run.
             **kwargs: Keyword arguments for the prompt.
 
         Returns:
             str: The prompt.
         """
-        is_chat_mode = self.driver.prompt_mode() == "chat"
+        prompt_plan = self.get_prompt_plan()
+
         if error_msg is None:
-            return self.prompt_builder.build(chat_mode=is_chat_mode, **kwargs)
+            return prompt_plan.build(**kwargs)
 
-        return self.prompt_builder.build(
+        return prompt_plan.build(
             error=error_msg,
-            chat_mode=is_chat_mode,
-            last_output=self.last_output,
+            last_output=last_output,
             **kwargs
         )
 
@@ -132,17 +256,22 @@ class StructEngine(BaseEngine):
 
         Args:
             prompt (str): The prompt for the chain.
-            **kwargs: Keyword arguments for the executor.
+            **kwargs: Keyword arguments for the executor. Pass `use_cache=False` to bypass the response cache,
+                e.g. for runs expected to give different outputs for the same prompt.
 
         Returns:
             Any: The executor.
         """
-        return self.driver.load_driver(prompt=prompt, model_name=self.model_name, **self.llm_kwargs)
+        use_cache = self.cache is not None and kwargs.get("use_cache", True)
+        driver_kwargs = {"cache": self.cache} if use_cache else {}
+        return self.driver.load_driver(
+            prompt=prompt, model_name=self.model_name, **driver_kwargs, **self.llm_kwargs
+        )
 
     def prep_inputs(self, inputs: dict, **kwargs) -> dict:
         """Analyzes input variables in prompt and prepares inputs for executor."""
         if self.partial_variables:
-            inputs.update(self.partial_variables)
+            inputs = {**inputs, **self.partial_variables}
         return inputs
 
     def format_inputs(self, prompt: str, inputs: dict, **kwargs) -> dict:
@@ -166,19 +295,26 @@ class StructEngine(BaseEngine):
 
     # === output parsing ===
 
-    def parse_output(self, text: str, inputs: dict):
+    def parse_output(self, text: str, inputs: dict, context: RunContext = None):
         """Parse the output of the chain.
 
         Returns a dictionary of the parsed output.
         """
-        output_parser = OutputParser(
+        context = context or RunContext()
+        parsed = self._output_parser().parse(text, inputs)
+        return self._handle_parsed(*parsed, context=context)
+
+    def _output_parser(self) -> OutputParser:
+        return OutputParser(
             self.output_model,  # type: ignore
             fix_by_llm=self.fix_parsing_by_llm,
             fix_partial_by_llm=self.fix_parsing_partially_by_llm,
-            debug=self.debug
+            debug=self.debug,
+            max_fix_concurrency=self.max_fix_concurrency,
         )
-        output, run_metrics, error_log = output_parser.parse(text, inputs)
 
+    def _handle_parsed(self, output: dict, run_metrics: list, error_log: list, context: RunContext) -> dict:
+        """Log the metrics and errors of parsing, raise if parsing failed."""
         self._log_message(
             "Output Parsing",
             parsed_output=output,
@@ -187,36 +323,175 @@ class StructEngine(BaseEngine):
 
         if self.return_metrics and run_metrics:
             for run_metrics in run_metrics:
-                self._log_metrics(run_metrics)
+                self._log_metrics(run_metrics, context)
         if error_log:
             for error in error_log:
-                self._log_error(error)
+                self._log_error(error, context)
             raise ParsingError("Parsing failed with errors")
         return output
 
     # === output validation ===
 
-    def validate_output(self, output: dict, inputs: dict):
+    def validate_output(self, output: dict, inputs: dict, context: RunContext = None):
         """Validate the output of the chain.
 
         Args:
             output (Any): The output of the chain.
             inputs (dict): The inputs for the chain for extra variables used in output_schema.
+            context (RunContext, optional): The context of the run to log validation errors to.
 
         Returns:
             Any: The output of the chain.
         """
+        context = context or RunContext()
 
-        validation_errors = self.validator.validate(output, inputs)
+        validation_errors = self._select_validator(inputs, output).validate(output, inputs)
         if validation_errors:
-            errors = {f"Error_{i}": str(error) for i, error in enumerate(validation_errors)}
-            self._log_message(
-                "Validation Error",
-                **errors,
-            )
-            for error in validation_errors:
-                self._log_error(error)
-            raise ValidationError("Validation failed with errors")
+            self._raise_validation_errors(validation_errors, context)
+
+    def _select_validator(self, inputs: dict, output: dict) -> BaseValidator:
+        """Select the validator for the output."""
+        return self.validator
+
+    def _raise_validation_errors(self, validation_errors: list, context: RunContext):
+        """Log the validation errors to the run context and raise."""
+        errors = {f"Error_{i}": str(error) for i, error in enumerate(validation_errors)}
+        self._log_message(
+            "Validation Error",
+            **errors,
+        )
+        for error in validation_errors:
+            self._log_error(error, context)
+        raise ValidationError("Validation failed with errors")
+
+    # === output repair ===
+
+    def repair_output(self, output: dict, inputs: dict, context: RunContext = None) -> dict:
+        """Validate the output and regenerate only the keys failing validation.
+
+        Valid keys are kept, the failing keys are generated with an output model of these keys only and merged
+        into the output, which is then validated again. Raises a ValidationError (and thereby a full retry)
+        if errors can not be mapped to output keys or the repair fails.
+
+        Args:
+            output (dict): The parsed output.
+            inputs (dict): The inputs for the chain.
+            context (RunContext, optional): The context of the run.
+
+        Returns:
+            dict: The valid output.
+        """
+        context = context or RunContext()
+
+        repair = self._prep_repair(output, inputs, context)
+        if repair is None:
+            return output
+
+        engine, repair_context, keys = repair
+        if engine is None:
+            return self._merge_repair(output, {}, keys, None, inputs, context)
+        try:
+            repaired, run_metrics = engine.run(inputs, raise_error=True, context=repair_context)
+        except Exception as e:
+            self._log_message("Repair Failed", error=str(e))
+            raise ValidationError("Repair of failed keys failed")
+
+        return self._merge_repair(output, repaired, keys, run_metrics, inputs, context)
+
+    def _prep_repair(self, output: dict, inputs: dict, context: RunContext, engine_cls: type = None):
+        """Validate the output and prepare the engine and context generating the failing keys.
+
+        Returns:
+            None if the output is valid, else (engine, repair_context, keys). engine is None if invalid keys
+            only need to be removed.
+        """
+        validator = self._select_validator(inputs, output)
+        validation_errors = validator.validate(output, inputs)
+        if not validation_errors:
+            return None
+
+        keys = self._failing_keys(output, inputs, validation_errors, validator)
+        if keys is None:
+            self._raise_validation_errors(validation_errors, context)
+
+        errors = {f"Error_{i}": str(error) for i, error in enumerate(validation_errors)}
+        self._log_message("Repair", keys=keys, **errors)
+        for error in validation_errors:
+            self._log_error(error, context)
+
+        if not keys:
+            return None, None, keys
+
+        engine_cls = engine_cls or StructEngine
+        engine = engine_cls.load_engine(
+            instruction=self.instruction,
+            input_model=self.input_model,
+            output_model=partial_output_model(validator.output_model, keys),
+            driver=self.driver,
+            model_name=self.model_name,
+            llm_kwargs=self.llm_kwargs,
+            cache=self.cache,
+            partial_variables=self.partial_variables,
+            fix_parsing_by_llm=self.fix_parsing_by_llm,
+            fix_parsing_partially_by_llm=self.fix_parsing_partially_by_llm,
+            max_retries=0,
+            return_metrics=True,
+            verbose=self.verbose,
+            debug=self.debug,
+        )
+
+        failed_output = {key: output[key] for key in keys if key in output} or output
+        repair_context = RunContext(
+            memory=context.memory,
+            last_error="\n - ".join(str(error) for error in validation_errors),
+            last_output=dump_to_yaml_string(failed_output),
+        )
+        return engine, repair_context, keys
+
+    @staticmethod
+    def _failing_keys(output: dict, inputs: dict, validation_errors: list, validator: BaseValidator):
+        """Map validation errors to the top level keys of the output model to regenerate.
+
+        Returns:
+            list | None: The failing keys, None if an error can not be repaired by regenerating keys.
+        """
+        val_config = validator._parse_inputs(inputs)
+        keys = []
+        for error in validation_errors:
+            if error.key:
+                keys.append(error.key)
+            elif isinstance(error, ValidationKeyError) and error.parent_key is None:
+                # missing keys are regenerated, unexpected keys are removed when merging
+                keys.extend(validate_missing_keys(output, val_config))
+            else:
+                return None
+
+        keys = list(dict.fromkeys(keys))
+        if any(validator.output_model.get(key) is None for key in keys):
+            return None
+        return keys
+
+    def _merge_repair(
+            self,
+            output: dict,
+            repaired: dict,
+            keys: list,
+            run_metrics: Optional[dict],
+            inputs: dict,
+            context: RunContext) -> dict:
+        """Merge the repaired keys into the output and validate the merged output."""
+        val_config = self._select_validator(inputs, output)._parse_inputs(inputs)
+        unexpected_keys = validate_unexpected_keys(output, val_config)
+
+        merged = {key: value for key, value in output.items() if key not in unexpected_keys}
+        merged.update({key: repaired[key] for key in keys if key in repaired})
+
+        if run_metrics is not None:
+            self._log_metrics({**run_metrics, "keys_repaired": len(keys)}, context)
+        self._log_message("Repaired Output", repaired_keys=keys, output=merged)
+
+        self.validate_output(merged, inputs, context)
+        return merged
 
     # === helpers ===
 
@@ -229,8 +504,9 @@ class StructEngine(BaseEngine):
     def execution_type(self):
         return "sync"
 
-    def errors_to_string(self):
-        self.run_metrics["errors"] = [str(e) for e in self.run_metrics["errors"]]
+    @staticmethod
+    def errors_to_string(context: RunContext):
+        context.run_metrics["errors"] = [str(e) for e in context.run_metrics["errors"]]
 
     # def _remove_cot(self, output: dict):
     #     cot = []
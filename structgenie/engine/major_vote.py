@@ -1,49 +1,35 @@
-"""TODO: Add voting results to output object."""
-
 import asyncio
+import json
+import math
+from typing import Any, Callable, Iterable, Optional, Union
 
 from nest_asyncio import apply
 
+from structgenie.components.voting import VoteAggregator
+from structgenie.components.voting.aggregator import REASONING_KEYS
 from structgenie.engine.async_engine import AsyncEngine
-from structgenie.utils import remove_reasoning
+from structgenie.engine.batch import DEFAULT_MAX_CONCURRENCY, run_ordered
+from structgenie.errors import EngineRunError
 
 
-def count_output_values_by_key(outputs: list[dict], key: str) -> list[tuple[dict, int]]:
-    options = {}
-    for output in outputs:
-        if output[key] in options:
-            options[output[key]] += 1
-        else:
-            options[output[key]] = 1
-    return [(option, options[option]) for option in options]
+def count_output_values_by_key(outputs: list[dict], key: str) -> list[tuple[Any, int]]:
+    """Counts the values of a key in the outputs, in order of first appearance."""
+    return [(value, int(votes)) for value, votes in VoteAggregator(outputs).counts_by_key(key)]
 
 
 def count_outputs(outputs: list[dict]) -> list[tuple[dict, int]]:
-    options = {}
-    option_index_list = []
-    option_index_clean_list = []
-
-    for output in outputs:
-        clean_output = remove_reasoning(output.copy())
-        if clean_output in option_index_clean_list:
-            # get index
-            index = option_index_clean_list.index(clean_output)
-            options[index] += 1
-        else:
-            option_index_list.append(output)
-            option_index_clean_list.append(clean_output)
-            options[option_index_list.index(output)] = 1
-    return [(option_index_list[i], options[i]) for i in range(len(option_index_list))]
+    """Counts the distinct outputs ignoring reasoning, in order of first appearance."""
+    return [(output, int(votes)) for output, votes in VoteAggregator(outputs).counts()]
 
 
 def rank_outputs(outputs: list[dict]) -> list[tuple[dict, int]]:
     """Ranks outputs by the number of times they appear in the outputs list."""
-    return sort_count(count_outputs(outputs))
+    return [(output, int(votes)) for output, votes in VoteAggregator(outputs).rank()]
 
 
-def rank_outputs_by_key(outputs: list[dict], key: str) -> list[tuple[dict, int]]:
+def rank_outputs_by_key(outputs: list[dict], key: str) -> list[tuple[Any, int]]:
     """Ranks output keys by the number of times they appear in the outputs list."""
-    return sort_count(count_output_values_by_key(outputs, key))
+    return [(value, int(votes)) for value, votes in VoteAggregator(outputs).rank_by_key(key)]
 
 
 def sort_count(tuple_list: list[tuple[dict, int]]) -> list[tuple[dict, int]]:
@@ -52,61 +38,265 @@ def sort_count(tuple_list: list[tuple[dict, int]]) -> list[tuple[dict, int]]:
 
 
 class MajorVoteEngine:
+    """Run an engine several times and select the output by majority vote.
+
+    Votes are counted by the canonical form of the outputs (see VoteAggregator). If no output has a majority, the
+    output is composed key by key and keys without a majority are decided by an LLM selecting among the
+    candidate values.
+
+    Args:
+        template (str): The template of the engine.
+        total_votes (int, optional): Max number of votes. Failed votes are retried, votes still failing are
+            dropped and count as issued, so fewer votes may be counted. Defaults to 10.
+        min_votes (int, optional): Votes needed for a majority. Defaults to 2.
+        adaptive (bool, optional): Issue votes in waves and stop as soon as the leading output has a majority and
+            can no longer be overtaken by the remaining votes. Defaults to False.
+        wave_size (int, optional): Votes per wave in adaptive mode. Defaults to min_votes.
+        samples_per_request (int, optional): Votes generated per provider request with the `n` parameter of the
+            chat API, the prompt is sent and billed once for these votes. Defaults to 1.
+        max_concurrency (int, optional): Max number of concurrent requests.
+        vote_weight (Callable[[dict], float], optional): Weight of the vote of an output. Defaults to 1 per output.
+        tie_break_by_llm (bool, optional): Decide keys without a majority by an LLM, otherwise the most voted
+            value is taken. Defaults to True.
+        max_candidates (int, optional): Max number of candidate values presented to the LLM. Defaults to 5.
+        **kwargs: Keyword arguments for the engine.
+    """
 
     def __init__(
             self,
             template: str,
             total_votes: int = 10,
             min_votes: int = 2,
+            adaptive: bool = False,
+            wave_size: int = None,
+            samples_per_request: int = 1,
+            max_concurrency: Optional[int] = DEFAULT_MAX_CONCURRENCY,
+            vote_weight: Callable[[dict], float] = None,
+            tie_break_by_llm: bool = True,
+            max_candidates: int = 5,
             **kwargs):
+        if samples_per_request < 1:
+            raise ValueError(f"samples_per_request must be at least 1, got {samples_per_request}")
         self.engine = AsyncEngine.from_template(template, **kwargs)
         self.total_votes = total_votes
         self.min_votes = min_votes
+        self.adaptive = adaptive
+        self.wave_size = wave_size or min_votes
+        self.samples_per_request = samples_per_request
+        self.max_concurrency = max_concurrency
+        self.vote_weight = vote_weight
+        self.tie_break_by_llm = tie_break_by_llm
+        self.max_candidates = max_candidates
         self.return_votes = kwargs.get("return_votes", False)
         self.debug = kwargs.get("debug", False)
+        self._selector = None
+
+    @property
+    def selector(self) -> AsyncEngine:
+        """Engine selecting among the candidate values of a key, using the driver and model of the voting engine."""
+        if self._selector is None:
+            self._selector = AsyncEngine.from_defaults(
+                "selector_template",
+                driver=self.engine.driver,
+                model_name=self.engine.model_name,
+                llm_kwargs=self.engine.llm_kwargs,
+                debug=self.debug,
+                return_metrics=False,
+            )
+        return self._selector
+
+    def aggregate(self, outputs: list[dict] = None) -> VoteAggregator:
+        """Return a vote aggregator with the vote weight of the engine."""
+        return VoteAggregator(outputs, weight=self.vote_weight)
+
+    async def gather_engine_run(self, inputs: dict, n_votes: int = None, **kwargs) -> list[dict]:
+        """Collect n_votes (defaults to total_votes) votes.
+
+        Failed votes are retried like engine runs: single votes by the retries of the run, failed samples are
+        requested again up to max_retries times of the engine. Votes still failing are dropped.
+
+        Votes bypass the response cache of the engine, otherwise each vote on the same prompt would return the
+        cached output of the first one.
+        """
+        n_votes = n_votes or self.total_votes
+
+        if self.samples_per_request == 1:
+            results = await run_ordered(
+                lambda _: self.engine.run(inputs, **{**kwargs, "use_cache": False}),
+                range(n_votes),
+                max_concurrency=self.max_concurrency,
+            )
+            return _valid_outputs(results)
 
-    async def gather_engine_run(self, inputs: dict, **kwargs) -> list[dict]:
-        outputs = await asyncio.gather(*[self.engine.run(inputs, **kwargs) for _ in range(self.total_votes)])
-        return [output for output in outputs if output]
+        outputs = []
+        for _ in range(self.engine.max_retries + 1):
+            missing = n_votes - len(outputs)
+            if missing <= 0:
+                break
+            n_requests = math.ceil(missing / self.samples_per_request)
+            sizes = [min(self.samples_per_request, missing - i * self.samples_per_request) for i in range(n_requests)]
+            results = await run_ordered(
+                lambda n: self.engine.asample(inputs, n, **kwargs), sizes, max_concurrency=self.max_concurrency
+            )
+            samples = [output for result in results if isinstance(result, list) for output in result]
+            outputs.extend(_valid_outputs(samples))
+        return outputs
+
+    async def collect_votes(self, inputs: dict, **kwargs) -> VoteAggregator:
+        """Collect the votes, in waves with early stopping in adaptive mode."""
+        if not self.adaptive:
+            return self.aggregate(await self.gather_engine_run(inputs, **kwargs))
+
+        aggregator = self.aggregate()
+        votes_issued = 0
+        while votes_issued < self.total_votes:
+            n_votes = min(self.wave_size, self.total_votes - votes_issued)
+            aggregator.extend(await self.gather_engine_run(inputs, n_votes=n_votes, **kwargs))
+            votes_issued += n_votes
+            if self.is_decided(aggregator, self.total_votes - votes_issued):
+                self.callback(f"Vote decided after {votes_issued} of {self.total_votes} votes.")
+                break
+        return aggregator
+
+    def is_decided(self, aggregator: VoteAggregator, remaining_votes: int) -> bool:
+        """Check if the leading output has a majority and can not be overtaken by the remaining votes."""
+        if self.vote_weight:
+            # the weights of the remaining votes are unknown, only a unanimous vote is final before the last wave
+            return remaining_votes == 0 or (
+                    aggregator.statistics().distinct_outputs == 1 and aggregator.is_decided(self.min_votes)
+            )
+        return aggregator.is_decided(self.min_votes, remaining_votes)
+
+    async def arun(self, inputs: dict, **kwargs):
+        """Run the vote.
+
+        Returns:
+            dict: The voted output, with the vote statistics as second value if return_votes is set.
+        """
+        aggregator = await self.collect_votes(inputs, **kwargs)
+        self.callback(f"Votes: {aggregator.counts()}")
+        output = await self.aevaluate_output(aggregator, inputs)
+        if self.return_votes:
+            return output, aggregator.statistics().dict()
+        return output
 
     def run(self, inputs: dict, **kwargs):
         apply()
-        outputs: list[dict] = asyncio.run(self.gather_engine_run(inputs, **kwargs))
-        self.callback(f"Outputs: {outputs}")
-        return self.evaluate_output(outputs)
-
-    def evaluate_output(self, outputs: list[dict]):
-        output_rank = rank_outputs(outputs)
-        self.callback(f"Output rank: {output_rank}")
-        if output_rank[0][1] >= self.min_votes:
-            self.callback(f"Majority vote of {output_rank[0][1]}.")
-            return output_rank[0][0]
-        else:
-            self.callback(f"Majority vote of {output_rank[0][1]} failed. Evaluating by key.")
-            return self.evaluate_output_by_key(outputs)
-
-    def evaluate_output_by_key(self, outputs: list[dict]):
+        return asyncio.run(self.arun(inputs, **kwargs))
+
+    async def aevaluate_output(self, outputs: Union[list[dict], VoteAggregator], inputs: dict = None) -> dict:
+        """Select the output by majority vote, composing it key by key if no output has a majority.
+
+        Args:
+            outputs (list[dict] | VoteAggregator): The votes.
+            inputs (dict, optional): The inputs of the vote, needed for the tie-breaking by LLM.
+
+        Raises:
+            EngineRunError: If there are no valid votes.
+        """
+        aggregator = outputs if isinstance(outputs, VoteAggregator) else self.aggregate(outputs)
+        output, votes = aggregator.leading()
+        if output is None:
+            raise EngineRunError(f"No valid votes out of {aggregator.num_outputs} outputs.")
+
+        self.callback(f"Output rank: {aggregator.rank()}")
+        if votes >= self.min_votes:
+            self.callback(f"Majority vote of {votes}.")
+            return output
+
+        self.callback(f"Majority vote of {votes} failed. Evaluating by key.")
+        composed_output, failed_keys = self.compose_output_by_key(aggregator)
+        if failed_keys:
+            self.callback(f"Key {failed_keys} failed. Evaluating by LLM.")
+            composed_output.update(await self.aevaluate_output_by_llm(aggregator, failed_keys, inputs))
+        return {key: composed_output[key] for key in self.engine.output_model.keys() if key in composed_output}
+
+    def evaluate_output(self, outputs: Union[list[dict], VoteAggregator], inputs: dict = None) -> dict:
+        apply()
+        return asyncio.run(self.aevaluate_output(outputs, inputs))
+
+    def evaluate_output_by_key(self, outputs: Union[list[dict], VoteAggregator]) -> dict:
+        """Compose the output from the keys with a majority, keys without a majority are left out."""
+        aggregator = outputs if isinstance(outputs, VoteAggregator) else self.aggregate(outputs)
+        return self.compose_output_by_key(aggregator)[0]
+
+    def compose_output_by_key(self, aggregator: VoteAggregator) -> tuple[dict, list[str]]:
+        """Compose the output from the keys with a majority and collect the keys without a majority.
+
+        Returns:
+            tuple[dict, list[str]]: The composed output and the keys without a majority.
+        """
         composed_output = {}
         failed_keys = []
+        first_output = aggregator.counts()[0][0]
         for key in self.engine.output_model.keys():
-            output_rank = rank_outputs_by_key(outputs, key)
-            if output_rank[0][1] >= self.min_votes:
-                self.callback(f"Key {key} has a majority vote of {output_rank[0][1]}.")
-                composed_output[key] = output_rank[0][0][key]
-            elif key == "reasoning":
-                composed_output[key] = output_rank[0][0][key]
-            else:
+            if key in REASONING_KEYS:
+                if key in first_output:
+                    composed_output[key] = first_output[key]
+                continue
+            value, votes = aggregator.leading_by_key(key)
+            if votes >= self.min_votes:
+                self.callback(f"Key {key} has a majority vote of {votes}.")
+                composed_output[key] = value
+            elif votes:
                 failed_keys.append(key)
-        if failed_keys:
-            self.callback(f"Key {failed_keys} failed. Evaluating by lowest likelihood model.")
-            self.evaluate_output_by_llm(outputs, failed_keys)
-        return composed_output
+        return composed_output, failed_keys
 
-    def evaluate_output_by_llm(self, outputs: list[dict], failed_keys: list[str]):
-        """Evaluate outputs by the lowest likelihood model."""
-        return NotImplemented
+    async def aevaluate_output_by_llm(
+            self, aggregator: VoteAggregator, failed_keys: list[str], inputs: dict = None
+    ) -> dict:
+        """Decide the values of keys without a majority by an LLM selecting among the most voted candidates.
+
+        Falls back to the most voted value if tie-breaking by LLM is disabled, no inputs are given or the
+        selection fails.
+        """
+        selections = await asyncio.gather(
+            *(self._select_value(aggregator, key, inputs) for key in failed_keys)
+        )
+        return dict(zip(failed_keys, selections))
+
+    async def _select_value(self, aggregator: VoteAggregator, key: str, inputs: Optional[dict]) -> Any:
+        candidates = aggregator.rank_by_key(key)[:self.max_candidates]
+        if len(candidates) == 1 or not self.tie_break_by_llm or inputs is None:
+            return candidates[0][0]
+
+        selector_inputs = {
+            "task": self.engine.instruction or "",
+            "task_input": _dumps(inputs),
+            "key": key,
+            "candidates": "\n".join(
+                f"{i}. ({votes:g} votes) {_dumps(value)}" for i, (value, votes) in enumerate(candidates, start=1)
+            ),
+        }
+        try:
+            selection = await self.selector.run(selector_inputs, raise_error=True)
+            index = int(selection["selection"]) - 1
+        except Exception as e:
+            self.callback(f"Selection for key {key} failed: {e}")
+            return candidates[0][0]
+
+        if not 0 <= index < len(candidates):
+            self.callback(f"Selection {index + 1} for key {key} out of range.")
+            return candidates[0][0]
+        self.callback(f"Key {key} selected by LLM: {candidates[index][0]}")
+        return candidates[index][0]
 
     def callback(self, msg):
         if self.debug:
             msg = "MajorVoteEngine: " + msg + "\n"
             print(msg)
+
+
+def _valid_outputs(results: Iterable) -> list[dict]:
+    """Return the outputs of the successful runs, dropping failed runs and their metrics."""
+    outputs = []
+    for result in results:
+        if isinstance(result, tuple):
+            result = result[0]
+        if result and not isinstance(result, Exception):
+            outputs.append(result)
+    return outputs
+
+
+def _dumps(value: Any) -> str:
+    return json.dumps(value, default=str, ensure_ascii=False)
@@ -32,9 +32,11 @@ class MaxRetriesError(EngineRunError):
 # === VALIDATION ERRORS ===
 
 class ValidationError(Exception):
-    def __init__(self, msg: str, parent_key: str = None):
+    def __init__(self, msg: str, parent_key: str = None, key: str = None):
         self.msg = msg
         self.parent_key = parent_key
+        # top level output key the error refers to
+        self.key = key or (parent_key.split(".")[0] if parent_key else None)
 
     def __str__(self):
         if self.parent_key:
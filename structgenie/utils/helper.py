@@ -1,11 +1,9 @@
 
 
-def count_tokens(string: str, encoding_name: str = "cl100k_base") -> int:
-    """Returns the number of tokens in a text string."""
-    import tiktoken
-    encoding = tiktoken.get_encoding(encoding_name)
-    num_tokens = len(encoding.encode(string))
-    return num_tokens
+def count_tokens(string: str, encoding_name: str = None, model: str = None) -> int:
+    """Returns the number of tokens in a text string, using the default encoding if neither is given."""
+    from structgenie.utils.tokenizer import tokenizer_registry
+    return tokenizer_registry.count(string, model=model, encoding_name=encoding_name)
 
 
 def remove_reasoning(data: dict):
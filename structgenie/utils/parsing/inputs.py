@@ -4,6 +4,7 @@ from typing import Union
 from structgenie.pydantic_v1 import BaseModel
 
 from structgenie.utils.parsing.placeholder import has_placeholder
+from structgenie.utils.parsing.template import compile_template, parse_lookup, resolve_lookup
 from structgenie.utils.parsing.string import dump_to_yaml_string
 
 
@@ -14,7 +15,7 @@ def format_inputs(placeholder_mapping: dict):
     formatted_inputs = {}
 
     for placeholder, value in placeholder_mapping.items():
-        key = re.match(r"{(.*)}", placeholder).group(1)
+        key = placeholder[1:-1]
 
         formatted_inputs[key] = value_to_string(value)
 
@@ -98,8 +99,7 @@ def prepare_inputs_placeholders(prompt: str, inputs: dict, **kwargs) -> tuple[st
 
 def load_placeholder_inputs(placeholder: str, inputs: dict, **kwargs):
     """Load placeholder from input schema."""
-    key = re.match(r"{(.*)}", placeholder).group(1)
-    return _pass_placeholder_key(key, inputs, **kwargs)
+    return resolve_lookup(parse_lookup(placeholder[1:-1]), inputs, **kwargs)
 
 
 def load_placeholder_if_exist(placeholder: str, inputs: dict, **kwargs):
@@ -113,14 +113,14 @@ def load_placeholder_if_exist(placeholder: str, inputs: dict, **kwargs):
 # === System placeholders ===
 
 def load_system_placeholders(prompt: str, inputs: dict, **kwargs):
-    match = re.findall(r"(\{\{!system.*?}})", prompt, re.DOTALL)
-
-    if match:
-        for system_placeholder in match:
-            prompt = prompt.replace(
-                system_placeholder,
-                load_system_placeholder(system_placeholder, inputs, **kwargs)
-            )
+    if "{{!system" not in prompt:
+        return prompt
+
+    for system_placeholder in compile_template(prompt).system_placeholders:
+        prompt = prompt.replace(
+            system_placeholder,
+            load_system_placeholder(system_placeholder, inputs, **kwargs)
+        )
     return prompt
 
 
@@ -154,64 +154,16 @@ def _format_input_schema_inputs(input_schema: str, placeholder: str, value: Unio
 
 
 def _prepare_placeholders(prompt: str, inputs: dict, **kwargs) -> tuple:
-    if "<%last_output%>" in prompt:
-        prompt_ = prompt.split("<%last_output%>")[0]
-    else:
-        prompt_ = prompt
-    match = re.findall(r"{.*?}", prompt_, re.DOTALL)
-    placeholder_inputs = {}
-    if match:
-        for placeholder in match:
-            placeholder_inputs[placeholder] = load_placeholder_inputs(placeholder, inputs, **kwargs)
-    return prompt, placeholder_inputs
+    return prompt, compile_template(prompt).load_inputs(inputs, **kwargs)
 
 
 def _pass_placeholder_key(key: str, inputs: Union[dict, str], **kwargs):
     """Pass values from inputs and kwargs to placeholder."""
-    if not inputs and not kwargs:
-        raise ValueError(f"No inputs or kwargs passed to placeholder for loading {{key}}")
-
-    if key == "inputs":
-        return inputs
-
-    if key == "input":
-        # when inputs is a single argument
-        if isinstance(inputs, str):
-            return inputs
-        # when multiple inputs are passed
-        if isinstance(inputs, dict):
-            if "input" in inputs:
-                return inputs["input"]
-            elif "input" in kwargs:
-                return kwargs["input"]
-            else:
-                # when no "input" key is found in inputs or kwargs pass all inputs
-                return inputs
-
-    # load value placeholder is a dictionary
-    match_dict = re.match(r"(.*)\[['\"](.*)['\"]]", key)
-    if match_dict:
-        if match_dict.group(1) == "inputs":
-            return inputs[match_dict.group(2)]
-        elif kwargs and match_dict.group(1) in kwargs:
-            return kwargs[match_dict.group(1)][match_dict.group(2)]
-        else:
-            if match_dict.group(1) in inputs:
-                return inputs[match_dict.group(1)][match_dict.group(2)]
-    # load value placeholder is not a dictionary
-    else:
-        if key in inputs:
-            return inputs[key]
-        elif kwargs and key in kwargs:
-            return kwargs[key]
-
-    raise ValueError(f"Placeholder {key} not found in inputs or kwargs")
+    return resolve_lookup(parse_lookup(key), inputs, **kwargs)
 
 
 def replace_placeholder_from_inputs_and_kwargs(string: str, inputs: dict, **kwargs):
     """Replace placeholder with value."""
-    placeholders = re.findall(r"{.*?}", string, re.DOTALL)
-    for placeholder in placeholders:
-        value = load_placeholder_inputs(placeholder, inputs, **kwargs)
-        string = string.replace(placeholder, str(value))
-    return string
+    template = compile_template(string)
+    values = template.load_inputs(inputs, **kwargs)
+    return template.render({placeholder[1:-1]: value for placeholder, value in values.items()})
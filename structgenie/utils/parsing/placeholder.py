@@ -1,19 +1,21 @@
-import re
+from structgenie.utils.parsing.template import PLACEHOLDER_PATTERN, compile_template
 
 
 def has_placeholder(text: str):
     """Check if text has placeholder."""
-    return bool(re.search(r"{.*?}", text, re.DOTALL))
+    return bool(PLACEHOLDER_PATTERN.search(text))
 
 
 def replace_placeholder(template: str, set_tags: bool = False, with_end_tag: bool = False, **kwargs):
+    """Replace the placeholders of the kwargs keys in a single pass over the compiled template."""
+    values = {}
     for key, value in kwargs.items():
         if not value:
             value = ""
         elif set_tags:
             value = _parse_section_in_tags(value, key, with_end_tag=with_end_tag)
-        template = template.replace(f"{{{key}}}", str(value))
-    return template
+        values[key] = value
+    return compile_template(template).render(values)
 
 
 def parse_section_placeholder(template, set_tags=True, with_end_tag: bool = False, **kwargs):
@@ -0,0 +1,132 @@
+"""Compile prompt templates into literal and placeholder segments.
+
+A template is tokenized once, lookups of the placeholders are resolved at compile time. Rendering a compiled
+template is a single join of its segments and loading the inputs of a prompt only walks its resolved lookups.
+Compiled templates are cached per template string.
+"""
+import re
+from functools import lru_cache
+from typing import Any, Union
+
+LAST_OUTPUT_TAG = "<%last_output%>"
+
+PLACEHOLDER_PATTERN = re.compile(r"{.*?}", re.DOTALL)
+SEGMENT_PATTERN = re.compile(r"{([^{}]*)}")
+SYSTEM_PLACEHOLDER_PATTERN = re.compile(r"(\{\{!system.*?}})", re.DOTALL)
+DICT_KEY_PATTERN = re.compile(r"(.*)\[['\"](.*)['\"]]")
+
+# lookup paths of a placeholder key
+LOOKUP_INPUTS = "inputs"  # ('inputs',): all inputs
+LOOKUP_INPUT = "input"  # ('input',): the 'input' key or all inputs
+LOOKUP_ITEM = "item"  # ('item', name, item): an item of a dict input, e.g. {inputs['x']}
+LOOKUP_KEY = "key"  # ('key', name): an input or keyword argument
+
+
+@lru_cache(maxsize=1024)
+def parse_lookup(key: str) -> tuple:
+    """Resolve the lookup path of a placeholder key."""
+    if key in (LOOKUP_INPUTS, LOOKUP_INPUT):
+        return (key,)
+    match_dict = DICT_KEY_PATTERN.match(key)
+    if match_dict:
+        return LOOKUP_ITEM, match_dict.group(1), match_dict.group(2)
+    return LOOKUP_KEY, key
+
+
+def resolve_lookup(lookup: tuple, inputs: Union[dict, str], **kwargs) -> Any:
+    """Load the value of a resolved lookup path from inputs and kwargs."""
+    kind = lookup[0]
+    if not inputs and not kwargs:
+        raise ValueError(f"No inputs or kwargs passed to placeholder for loading {{{lookup[-1]}}}")
+
+    if kind == LOOKUP_INPUTS:
+        return inputs
+
+    if kind == LOOKUP_INPUT:
+        # when inputs is a single argument
+        if isinstance(inputs, str):
+            return inputs
+        # when multiple inputs are passed
+        if isinstance(inputs, dict):
+            if "input" in inputs:
+                return inputs["input"]
+            elif "input" in kwargs:
+                return kwargs["input"]
+            else:
+                # when no "input" key is found in inputs or kwargs pass all inputs
+                return inputs
+
+    if kind == LOOKUP_ITEM:
+        _, name, item = lookup
+        if name == "inputs":
+            return inputs[item]
+        elif kwargs and name in kwargs:
+            return kwargs[name][item]
+        elif name in inputs:
+            return inputs[name][item]
+        key = f"{name}['{item}']"
+    else:
+        key = lookup[-1]
+        if key in inputs:
+            return inputs[key]
+        elif kwargs and key in kwargs:
+            return kwargs[key]
+
+    raise ValueError(f"Placeholder {key} not found in inputs or kwargs")
+
+
+class CompiledTemplate:
+    """A template tokenized into literal and placeholder segments.
+
+    Args:
+        template (str): The template string.
+
+    Attributes:
+        placeholders (dict): Placeholders of the prompt before the last output section with their lookup paths,
+            e.g. {"{inputs['x']}": ('item', 'inputs', 'x')}.
+        system_placeholders (list[str]): System placeholders of the template, e.g. '{{!system:...}}'.
+    """
+
+    def __init__(self, template: str):
+        self.template = template
+
+        # literals and keys alternate: literal, key, literal, ..., literal
+        parts = SEGMENT_PATTERN.split(template)
+        self._literals = parts[0::2]
+        self._keys = parts[1::2]
+
+        prompt = template.split(LAST_OUTPUT_TAG)[0]
+        self.placeholders = {
+            placeholder: parse_lookup(placeholder[1:-1]) for placeholder in PLACEHOLDER_PATTERN.findall(prompt)
+        }
+        self.system_placeholders = list(dict.fromkeys(SYSTEM_PLACEHOLDER_PATTERN.findall(template)))
+
+    @property
+    def keys(self) -> list[str]:
+        """Keys of the placeholder segments in order of appearance."""
+        return list(dict.fromkeys(self._keys))
+
+    def render(self, values: dict) -> str:
+        """Replace the placeholders of the given keys by their values, other placeholders are kept."""
+        if not self._keys:
+            return self.template
+        parts = [self._literals[0]]
+        for key, literal in zip(self._keys, self._literals[1:]):
+            parts.append(str(values[key]) if key in values else f"{{{key}}}")
+            parts.append(literal)
+        return "".join(parts)
+
+    def load_inputs(self, inputs: Union[dict, str], **kwargs) -> dict:
+        """Load the values of the placeholders from inputs and kwargs."""
+        return {
+            placeholder: resolve_lookup(lookup, inputs, **kwargs) for placeholder, lookup in self.placeholders.items()
+        }
+
+    def __repr__(self):
+        return f"{self.__class__.__name__}(keys={self.keys!r})"
+
+
+@lru_cache(maxsize=256)
+def compile_template(template: str) -> CompiledTemplate:
+    """Compile a template, compiled templates are cached per template string."""
+    return CompiledTemplate(template)
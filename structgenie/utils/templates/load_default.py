@@ -1,4 +1,5 @@
 import os
+from functools import lru_cache
 
 from structgenie.utils.templates.functions import load_from_file
 
@@ -15,6 +16,7 @@ def template_mapping() -> dict:
 DEFAULT_TEMPLATES = template_mapping()
 
 
+@lru_cache(maxsize=None)
 def load_default_template(template_key: str) -> str:
     """Load default template from template_key."""
     if template_key in DEFAULT_TEMPLATES:
@@ -0,0 +1,140 @@
+"""Process wide registry of tokenizer encodings.
+
+Encodings are loaded once and resolved per model, so counting tokens does not repeat the encoding lookup.
+Models without a known encoding fall back to the default encoding.
+
+Usage:
+    from structgenie.utils.tokenizer import tokenizer_registry
+
+    tokenizer_registry.count("Hello world", model="gpt-4")
+    tokenizer_registry.count_batch(["Hello", "world"])
+    tokenizer_registry.count_messages(messages, model="gpt-3.5-turbo")
+"""
+import threading
+from typing import Any, Optional
+
+DEFAULT_ENCODING = "cl100k_base"
+
+# tokens per message, tokens per name and tokens priming the reply of chat models
+DEFAULT_MESSAGE_OVERHEAD = (3, 1, 3)
+MESSAGE_OVERHEAD = {
+    "gpt-3.5-turbo-0301": (4, -1, 2),
+    "gpt-3.5-turbo-0613": (4, -1, 2),
+}
+
+
+class TokenizerRegistry:
+    """Registry of encodings loaded once and resolved per model.
+
+    Encodings are loaded with tiktoken on first use. Encodings can also be registered directly, e.g. custom
+    encodings or encodings of models unknown to tiktoken. An encoding is any object with an `encode` method.
+
+    Args:
+        default_encoding (str, optional): Encoding for models without a known encoding. Defaults to 'cl100k_base'.
+    """
+
+    def __init__(self, default_encoding: str = DEFAULT_ENCODING):
+        self.default_encoding = default_encoding
+        self._lock = threading.Lock()
+        self._encodings: dict[str, Any] = {}
+        self._model_encodings: dict[str, str] = {}
+
+    # === Registration ===
+
+    def register(self, name: str, encoding: Any, models: list[str] = None):
+        """Register an encoding by name, optionally for the given models."""
+        with self._lock:
+            self._encodings[name] = encoding
+            for model in models or []:
+                self._model_encodings[model] = name
+
+    def clear(self):
+        """Drop all loaded and registered encodings."""
+        with self._lock:
+            self._encodings = {}
+            self._model_encodings = {}
+
+    # === Encodings ===
+
+    def encoding_name(self, model: Optional[str] = None) -> str:
+        """Return the name of the encoding of a model, the default encoding for unknown models."""
+        if not model:
+            return self.default_encoding
+        name = self._model_encodings.get(model)
+        if name is None:
+            name = self._resolve_encoding_name(model)
+            with self._lock:
+                self._model_encodings[model] = name
+        return name
+
+    def _resolve_encoding_name(self, model: str) -> str:
+        try:
+            from tiktoken.model import encoding_name_for_model
+            return encoding_name_for_model(model)
+        except (ImportError, KeyError):
+            return self.default_encoding
+
+    def get_encoding(self, name: Optional[str] = None, model: Optional[str] = None) -> Any:
+        """Return the encoding by name or for a model, loading it on first use."""
+        name = name or self.encoding_name(model)
+        encoding = self._encodings.get(name)
+        if encoding is None:
+            import tiktoken
+            encoding = tiktoken.get_encoding(name)
+            with self._lock:
+                encoding = self._encodings.setdefault(name, encoding)
+        return encoding
+
+    # === Encode ===
+
+    def encode(self, text: str, model: Optional[str] = None, encoding_name: Optional[str] = None) -> list[int]:
+        """Encode a text with the encoding of the model."""
+        return self.get_encoding(encoding_name, model).encode(text)
+
+    def encode_batch(
+            self,
+            texts: list[str],
+            model: Optional[str] = None,
+            encoding_name: Optional[str] = None) -> list[list[int]]:
+        """Encode several texts at once, in parallel if the encoding supports batch encoding."""
+        encoding = self.get_encoding(encoding_name, model)
+        if hasattr(encoding, "encode_batch"):
+            return encoding.encode_batch(list(texts))
+        return [encoding.encode(text) for text in texts]
+
+    def count(self, text: str, model: Optional[str] = None, encoding_name: Optional[str] = None) -> int:
+        """Return the number of tokens of a text."""
+        return len(self.encode(text, model, encoding_name))
+
+    def count_batch(
+            self,
+            texts: list[str],
+            model: Optional[str] = None,
+            encoding_name: Optional[str] = None) -> list[int]:
+        """Return the number of tokens of several texts."""
+        return [len(tokens) for tokens in self.encode_batch(texts, model, encoding_name)]
+
+    def count_messages(self, messages: list[dict], model: Optional[str] = None) -> int:
+        """Return the number of prompt tokens of chat messages.
+
+        Text parts of messages with content lists, e.g. messages with images, are counted, other parts are not.
+        """
+        tokens_per_message, tokens_per_name, reply_tokens = MESSAGE_OVERHEAD.get(model, DEFAULT_MESSAGE_OVERHEAD)
+        texts = []
+        num_tokens = 0
+        for message in messages:
+            num_tokens += tokens_per_message
+            for key, value in message.items():
+                if isinstance(value, list):
+                    texts.extend(part["text"] for part in value if isinstance(part, dict) and "text" in part)
+                elif value is not None:
+                    texts.append(str(value))
+                if key == "name":
+                    num_tokens += tokens_per_name
+        return num_tokens + sum(self.count_batch(texts, model)) + reply_tokens
+
+    def __len__(self):
+        return len(self._encodings)
+
+
+tokenizer_registry = TokenizerRegistry()
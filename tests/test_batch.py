@@ -0,0 +1,46 @@
+import asyncio
+import random
+
+import pytest
+
+from structgenie.engine.batch import run_as_completed, run_ordered
+
+
+class Counter:
+    def __init__(self):
+        self.running = 0
+        self.max_running = 0
+
+    async def call(self, item: int):
+        self.running += 1
+        self.max_running = max(self.max_running, self.running)
+        await asyncio.sleep(random.random() / 100)
+        self.running -= 1
+        if item == 3:
+            raise ValueError("failed item")
+        return item * 2
+
+
+def test_run_ordered_bounded():
+    counter = Counter()
+    results = asyncio.run(run_ordered(counter.call, range(20), max_concurrency=4))
+
+    assert counter.max_running <= 4
+    assert isinstance(results[3], ValueError)
+    assert [r for i, r in enumerate(results) if i != 3] == [i * 2 for i in range(20) if i != 3]
+
+
+def test_run_as_completed_yields_all():
+    counter = Counter()
+
+    async def collect():
+        return [item async for item in run_as_completed(counter.call, (i for i in range(10)), max_concurrency=3)]
+
+    results = asyncio.run(collect())
+    assert sorted(index for index, _ in results) == list(range(10))
+    assert counter.max_running <= 3
+
+
+def test_invalid_concurrency():
+    with pytest.raises(ValueError):
+        asyncio.run(run_ordered(Counter().call, [1], max_concurrency=0))
@@ -0,0 +1,122 @@
+import asyncio
+
+import pytest
+
+from structgenie.driver.chat_driver import ChatDriver
+from structgenie.engine.chain import StructChain
+
+TEMPLATES = """Classify the book.
+
+# Input
+Book: {book}
+---
+Genre: <str>
+%%%
+Summarize the book.
+
+# Input
+Book: {book}
+---
+Summary: <str>
+%%%
+Write a teaser for the book.
+
+# Input
+Genre: {genre}
+Summary: {summary}
+---
+Teaser: <str>
+"""
+
+
+class ChainDriver(ChatDriver):
+    running = 0
+    max_running = 0
+    calls = 0
+
+    @classmethod
+    def load_driver(cls, prompt: str, model_name: str = "fake", **kwargs):
+        driver = cls()
+        driver.prompt = prompt
+        driver.model_name = model_name
+        driver.llm_kwargs = {}
+        return driver
+
+    def completion(self, memory: list[dict] = None, **kwargs):
+        ChainDriver.calls += 1
+        content = self.parse_prompt(memory=memory, **kwargs)[-1]["content"]
+        if "Teaser" in self.prompt:
+            values = dict(line.split(": ", 1) for line in content.splitlines() if ": " in line)
+            return f"Teaser: {values['Genre']} - {values['Summary']}", {"token_usage": 10}
+        if "Genre" in self.prompt:
+            return "Genre: fiction", {"token_usage": 10}
+        return f"Summary: {content.count('Dune')} x Dune", {"token_usage": 10}
+
+    async def async_completion(self, memory: list[dict] = None, **kwargs):
+        ChainDriver.running += 1
+        ChainDriver.max_running = max(ChainDriver.max_running, ChainDriver.running)
+        await asyncio.sleep(0.01)
+        ChainDriver.running -= 1
+        return self.completion(memory=memory, **kwargs)
+
+
+@pytest.fixture(autouse=True)
+def reset_driver():
+    ChainDriver.running = 0
+    ChainDriver.max_running = 0
+    ChainDriver.calls = 0
+
+
+def test_chain_compiles_dependencies():
+    chain = StructChain.from_template(TEMPLATES, driver=ChainDriver)
+
+    assert [step.depends_on for step in chain.steps] == [[], [], [0, 1]]
+    assert chain.steps[2].input_keys == ["genre", "summary"]
+    assert chain.steps[0].engine.prompt_plan is not None
+
+
+def test_chain_runs_independent_steps_concurrently():
+    chain = StructChain.from_template(TEMPLATES, driver=ChainDriver)
+    engines = [step.engine for step in chain.steps]
+
+    output, metrics = chain.run({"book": "Dune"})
+
+    assert output == {"book": "Dune", "genre": "fiction", "summary": "1 x Dune", "teaser": "fiction - 1 x Dune"}
+    assert metrics["token_usage"] == 30
+    assert ChainDriver.max_running == 2
+    # engines are compiled once and reused
+    assert [step.engine for step in chain.steps] == engines
+
+
+def test_chain_apply():
+    chain = StructChain.from_template(TEMPLATES, driver=ChainDriver, return_metrics=False)
+    results = asyncio.run(chain.apply([{"book": "Dune"}, {"book": "Emma"}]))
+
+    assert [result["teaser"] for result in results] == ["fiction - 1 x Dune", "fiction - 0 x Dune"]
+    assert ChainDriver.calls == 6
+
+
+def test_chain_dependencies_from_output_schema():
+    templates = TEMPLATES + """%%%
+Name the characters for each role.
+
+# Input
+Book: {book}
+---
+Characters: <list[dict], rule=for each $role in {roles}>
+%%%
+Rate the teaser.
+
+# Input
+Teaser: {teaser}
+---
+Rating: <int>
+"""
+    templates = templates.replace("Summary: <str>", "Summary: <str>\nRoles: <list[str]>")
+    chain = StructChain.from_template(templates, driver=ChainDriver)
+
+    assert chain.steps[3].input_keys == ["book", "roles"]
+    assert chain.steps[3].depends_on == [1]
+    # the outputs of all steps upstream of the teaser are merged into the inputs of the rating
+    assert chain.steps[4].depends_on == [2]
+    assert chain.steps[4].upstream == [0, 1, 2]
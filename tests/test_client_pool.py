@@ -0,0 +1,57 @@
+import asyncio
+
+import pytest
+
+from structgenie.driver.client_pool import OpenAIClientPool
+from structgenie.driver.openai_driver import OpenAIDriver
+
+
+def test_clients_are_reused_per_credentials():
+    pool = OpenAIClientPool(max_connections=5)
+    client = pool.get_client(api_key="key-a")
+
+    assert pool.get_client(api_key="key-a") is client
+    assert pool.get_client(api_key="key-b") is not client
+    assert pool.get_client(api_key="key-a", base_url="http://localhost:1234/v1") is not client
+    assert len(pool) == 3
+
+
+def test_async_clients_are_bound_to_loop():
+    pool = OpenAIClientPool()
+
+    async def get_twice():
+        return pool.get_async_client(api_key="key"), pool.get_async_client(api_key="key")
+
+    first, second = asyncio.run(get_twice())
+    assert first is second
+
+
+def test_configure_resets_clients():
+    pool = OpenAIClientPool()
+    client = pool.get_client(api_key="key")
+    pool.configure(max_keepalive_connections=2)
+
+    assert pool.limits.max_keepalive_connections == 2
+    assert pool.get_client(api_key="key") is not client
+    # clients may still be used by in-flight requests
+    assert not client.is_closed()
+    with pytest.raises(ValueError):
+        pool.configure(unknown=1)
+
+
+def test_driver_uses_given_pool():
+    pool = OpenAIClientPool()
+    driver = OpenAIDriver.load_driver(prompt="", client_pool=pool)
+    assert driver.pool is pool
+
+
+def test_warmup_failures_are_logged():
+    pool = OpenAIClientPool(timeout=1)
+    client_kwargs = {"api_key": "key", "base_url": "http://127.0.0.1:9/v1"}
+
+    pool.warmup(connections=0, **client_kwargs)
+    assert len(pool) == 0
+
+    pool.warmup(connections=2, **client_kwargs)
+    assert len(pool) == 1
+    asyncio.run(pool.awarmup(connections=2, **client_kwargs))
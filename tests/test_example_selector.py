@@ -0,0 +1,111 @@
+import pytest
+
+from structgenie.components.examples import ExampleSelector
+from structgenie.components.examples.packing import pack
+from structgenie.components.prompt.builder import PromptBuilder
+from structgenie.components.prompt.plan import PromptPlan
+from structgenie.utils.tokenizer import DEFAULT_ENCODING, tokenizer_registry
+
+
+class WordEncoding:
+    def encode(self, text: str) -> list[int]:
+        return list(range(len(text.split())))
+
+
+@pytest.fixture(autouse=True)
+def encoding():
+    tokenizer_registry.register(DEFAULT_ENCODING, WordEncoding())
+    yield
+    tokenizer_registry.clear()
+
+
+@pytest.mark.parametrize("strategy, selected", [
+    ("greedy", [0]),
+    ("first_fit", [0, 2]),
+    ("knapsack", [1, 2]),
+])
+def test_packing_strategies(strategy, selected):
+    assert pack([4, 7, 3, 6], 10, strategy) == selected
+
+
+def test_knapsack_fills_budget_on_large_pool():
+    lengths = [(index * 7919) % 97 + 3 for index in range(5000)]
+
+    selected = pack(lengths, 2000, "knapsack")
+
+    assert sum(lengths[position] for position in selected) == 2000
+    assert selected == sorted(set(selected))
+
+
+def _selector(**kwargs) -> ExampleSelector:
+    return ExampleSelector.from_list([
+        {"input": {"genre": "fiction", "title": "Dune"}, "output": {"summary": " ".join(["word"] * size)}}
+        for size in (10, 40, 5, 20, 5)
+    ]).copy(update=kwargs)
+
+
+def test_selector_packs_smaller_examples_after_overflow():
+    selector = _selector(seed=1, strategy="first_fit")
+
+    examples = selector.select(max_token=60)
+    lengths = selector.token_lengths()
+
+    assert sum(lengths[selector.examples.index(example)] for example in examples) <= 60
+    assert len(examples) >= 3
+
+
+def test_selector_shuffle_is_seeded():
+    selector = _selector(strategy="first_fit")
+
+    orders = set()
+    for seed in range(5):
+        selector.seed = seed
+        orders.add(selector.to_prompt(max_token=1000))
+        assert selector.to_prompt(max_token=1000) == selector.to_prompt(max_token=1000)
+
+    assert len(orders) > 1
+
+
+def test_token_lengths_extended_on_add_example():
+    selector = _selector()
+    lengths = list(selector.token_lengths())
+
+    selector.add_example(selector.examples[0].copy())
+
+    assert selector.token_lengths() == lengths + lengths[:1]
+
+
+def test_filter_examples_by_inverted_index():
+    selector = ExampleSelector.from_list([
+        {"input": {"genre": genre, "lang": lang, "tags": ["a"]}, "output": {"title": f"{genre}-{lang}"}}
+        for genre in ("fiction", "horror", "romance") for lang in ("en", "de")
+    ])
+
+    def linear(**kwargs):
+        return [example for example in selector.examples if example.filter(**kwargs)]
+
+    for kwargs in ({"genre": "horror"}, {"genre": "horror", "lang": "de"}, {"lang": "fr"}, {"tags": ["a"]}):
+        assert selector.filter_examples(**kwargs) == linear(**kwargs)
+
+    selector.add_example(selector.examples[2].copy())
+    assert [example.output["title"] for example in selector.filter_examples(genre="horror", lang="en")] == [
+        "horror-en", "horror-en"
+    ]
+
+
+def _plan(selector: ExampleSelector) -> PromptPlan:
+    return PromptBuilder(
+        instruction="Summarize the book.",
+        input_model="Title: {title}",
+        output_model="Summary: <str>",
+        examples=selector,
+    ).compile()
+
+
+def test_unseeded_examples_rendered_per_prompt():
+    assert _plan(_selector(seed=1)).static_examples
+
+    plan = _plan(_selector(seed=None))
+    assert not plan.static_examples
+    # examples are not filtered by the inputs, only shuffled anew
+    assert len({plan.build(title="Emma") for _ in range(20)}) > 1
@@ -1,8 +1,14 @@
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
 from unittest.mock import Mock
 
 import pytest
 
+from structgenie.driver.chat_driver import ChatDriver
 from structgenie.engine import StructEngine
+from structgenie.engine.context import RunContext
 from structgenie.errors import MaxRetriesError
 
 
@@ -41,11 +47,13 @@ def test_failure_rate(mocker, template):
     )
 
     engine = StructEngine.from_template(template)
-    output, m = engine.run(inputs={"input_model": "some model", "output_model": "some model"})
+    context = RunContext()
+    output, m = engine.run(inputs={"input_model": "some model", "output_model": "some model"}, context=context)
 
     assert output == {"reasoning": "I knew it all along.", "instruction": "Do it again."}
     assert m["failure_rate"] == 2
-    assert engine.num_metrics_logged == 3
+    assert context.num_metrics_logged == 3
+    assert context.n_run == 2
 
 
 def test_max_retries(mocker, template):
@@ -75,4 +83,59 @@ def test_max_retries(mocker, template):
 
 
 if __name__ == '__main__':
-    pytest.main()
\ No newline at end of file
+    pytest.main()
+
+class ConcurrentDriver(ChatDriver):
+    calls = {}
+    lock = threading.Lock()
+
+    @classmethod
+    def load_driver(cls, prompt: str, model_name: str = "fake", **kwargs):
+        driver = cls()
+        driver.prompt = prompt
+        driver.model_name = model_name
+        driver.llm_kwargs = {}
+        return driver
+
+    def completion(self, memory: list[dict] = None, **kwargs):
+        messages = self.parse_prompt(memory=memory, **kwargs)
+        run = int(re.search(r"run-(\d+)", " ".join(message["content"] for message in messages)).group(1))
+        with ConcurrentDriver.lock:
+            attempt = ConcurrentDriver.calls[run] = ConcurrentDriver.calls.get(run, 0) + 1
+        time.sleep(0.001)
+        # odd runs fail validation on their first attempt
+        if run % 2 and attempt == 1:
+            return f"Reasoning: run-{run}\n", {"token_usage": 1}
+        return f"Reasoning: run-{run}\nInstruction: Do {run}.", {"token_usage": 1}
+
+    async def async_completion(self, memory: list[dict] = None, **kwargs):
+        return self.completion(memory=memory, **kwargs)
+
+
+def test_concurrent_runs_on_shared_engine(template, monkeypatch):
+    ConcurrentDriver.calls = {}
+    engine = StructEngine.from_template(template, driver=ConcurrentDriver)
+    plan = engine.prompt_plan
+
+    def run(index):
+        return engine.run({"inp_model": f"run-{index}", "out_model": "text"})
+
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        results = list(executor.map(run, range(64)))
+
+    for index, (output, metrics) in enumerate(results):
+        assert output == {"reasoning": f"run-{index}", "instruction": f"Do {index}."}
+        # the validation error and the run error of the first attempt of odd runs only
+        assert len(metrics["errors"]) == 2 * (index % 2)
+        assert all("instruction" in str(error) or "run_num: 0/" in str(error) for error in metrics["errors"])
+        assert metrics["token_usage"] == 1 + index % 2
+    assert engine.prompt_plan is plan
+
+    # an engine which was not compiled yet is compiled once
+    compiled = []
+    compile_engine = StructEngine.compile
+    monkeypatch.setattr(StructEngine, "compile", lambda self: compiled.append(1) or compile_engine(self))
+    engine.prompt_plan = None
+    with ThreadPoolExecutor(max_workers=16) as executor:
+        list(executor.map(run, range(0, 32, 2)))
+    assert len(compiled) == 1
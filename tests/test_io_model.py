@@ -0,0 +1,49 @@
+from structgenie.components.input_output import OutputModel
+from structgenie.components.input_output.line import IOLine
+
+SCHEMA = """Family: <list[dict]>
+Family.name: <str>
+Family.age: <int> = 0
+Family_name: <str>"""
+
+
+def test_nested_views_use_key_tree():
+    output_model = OutputModel.from_string(SCHEMA)
+
+    assert [line.key for line in output_model.get_nested_attr("family")] == ["family", "family.name", "family.age"]
+    assert list(output_model.get_nested_dict("family", full_key=False)) == ["name", "age", "_info"]
+    assert output_model.get("family.age").default == "0"
+
+
+def test_cached_views_are_invalidated():
+    output_model = OutputModel.from_string(SCHEMA)
+    as_dict = output_model.as_dict
+    assert output_model.as_dict is as_dict
+
+    output_model.lines.append(IOLine(key="family.role", type="str"))
+    assert "family.role" in output_model.as_dict
+    assert "role" in output_model.get_nested_dict("family", full_key=False)
+
+    output_model.get("family.role").type = "int"
+    output_model.invalidate_cache()
+    assert output_model.as_dict["family.role"]["type"] == "int"
+
+
+def test_line_changes_invalidate_cached_views():
+    output_model = OutputModel.from_string(SCHEMA)
+    assert output_model.as_dict["family.name"]["type"] == "str"
+
+    output_model.get("family.name").type = "int"
+    assert output_model.as_dict["family.name"]["type"] == "int"
+
+    output_model.lines[0] = IOLine(key="family", type="dict")
+    assert output_model.as_dict["family"]["type"] == "dict"
+    assert output_model.get("family").type == "dict"
+
+
+def test_nested_dict_with_kwargs_does_not_change_cache():
+    output_model = OutputModel.from_string("Family: <list[dict]>\nFamily.name: <str, rule={rule_a}>")
+
+    assert output_model.get_nested_dict("family", rule_a="X")["family.name"]["rule"] == "X"
+    assert output_model.get_nested_dict("family", rule_a="Y")["family.name"]["rule"] == "Y"
+    assert output_model.as_dict["family.name"]["rule"] == "{rule_a}"
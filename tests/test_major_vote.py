@@ -0,0 +1,184 @@
+import asyncio
+
+import pytest
+
+from structgenie.components.voting import VoteAggregator, fingerprint
+from structgenie.driver.cache import MemoryResponseCache
+from structgenie.driver.chat_driver import ChatDriver
+from structgenie.engine.major_vote import MajorVoteEngine
+from structgenie.errors import EngineRunError
+
+
+class VoteDriver(ChatDriver):
+    completions = 0
+    requests = 0
+
+    @classmethod
+    def load_driver(cls, prompt: str, model_name: str = "fake", **kwargs):
+        driver = cls()
+        driver.prompt = prompt
+        driver.model_name = model_name
+        driver.llm_kwargs = {}
+        return driver
+
+    def completion(self, memory: list[dict] = None, **kwargs):
+        VoteDriver.completions += 1
+        return "Genre: fiction", {"token_usage": 10}
+
+    async def async_completion(self, memory: list[dict] = None, **kwargs):
+        VoteDriver.requests += 1
+        return self.completion(memory=memory, **kwargs)
+
+    async def asample(self, n: int, memory: list[dict] = None, **kwargs):
+        VoteDriver.requests += 1
+        VoteDriver.completions += n
+        return ["Genre: fiction"] * (n - 1) + ["Genre: fantasy"], {"token_usage": 10 + n}
+
+
+@pytest.fixture
+def template():
+    return """Classify the book.
+
+# Input
+Book: {book}
+---
+Genre: <str>
+"""
+
+
+@pytest.fixture(autouse=True)
+def reset_driver():
+    VoteDriver.completions = 0
+    VoteDriver.requests = 0
+    TieDriver.selection = "2"
+
+
+def test_adaptive_votes_stop_early(template):
+    engine = MajorVoteEngine(template, total_votes=10, min_votes=2, adaptive=True, driver=VoteDriver)
+    output = asyncio.run(engine.arun({"book": "Dune"}))
+
+    assert output == {"genre": "fiction"}
+    # after 6 unanimous votes the remaining 4 can not change the result
+    assert VoteDriver.completions == 6
+
+
+def test_all_votes_without_adaptive(template):
+    engine = MajorVoteEngine(template, total_votes=5, min_votes=2, driver=VoteDriver, return_votes=True)
+    output, votes = asyncio.run(engine.arun({"book": "Dune"}))
+
+    assert VoteDriver.completions == 5
+    assert votes["leading_votes"] == 5
+    assert votes["entropy"] == 0
+
+
+def test_samples_per_request(template):
+    engine = MajorVoteEngine(template, total_votes=10, min_votes=2, samples_per_request=4, driver=VoteDriver)
+    outputs = asyncio.run(engine.gather_engine_run({"book": "Dune"}))
+
+    assert VoteDriver.requests == 3
+    assert len(outputs) == 10
+    assert outputs.count({"genre": "fantasy"}) == 3
+
+
+def test_aggregator_canonicalizes_outputs():
+    aggregator = VoteAggregator([
+        {"reasoning": "first", "genre": "Science  Fiction", "tags": [{"a": 1, "b": [1, 2]}]},
+        {"tags": [{"b": [1, 2], "a": 1}], "genre": "science fiction", "reasoning": "second"},
+        {"genre": "fantasy", "tags": []},
+    ])
+
+    output, votes = aggregator.leading()
+    assert output["reasoning"] == "first"
+    assert votes == 2
+    assert aggregator.counts_by_key("genre") == [("Science  Fiction", 2), ("fantasy", 1)]
+    assert fingerprint({"genre": "A", "reason": "x"}) == fingerprint({"genre": " a "})
+
+    statistics = aggregator.statistics()
+    assert statistics.distinct_outputs == 2
+    assert statistics.margin == 1
+    assert statistics.agreement == pytest.approx(2 / 3)
+
+
+def test_aggregator_weighted_votes():
+    aggregator = VoteAggregator(weight=lambda output: 3 if output["genre"] == "fantasy" else 1)
+    aggregator.extend([{"genre": "fiction"}, {"genre": "fiction"}, {"genre": "fantasy"}])
+
+    assert aggregator.leading() == ({"genre": "fantasy"}, 3)
+    assert aggregator.rank_by_key("genre") == [("fantasy", 3), ("fiction", 2)]
+    assert not aggregator.is_decided(min_votes=2, remaining_votes=1)
+
+
+def test_evaluate_without_votes_raises(template):
+    engine = MajorVoteEngine(template, driver=VoteDriver)
+    with pytest.raises(EngineRunError):
+        engine.evaluate_output([{}, {}])
+
+
+class TieDriver(VoteDriver):
+    selection = "2"
+
+    def completion(self, memory: list[dict] = None, **kwargs):
+        messages = self.parse_prompt(memory=memory, **kwargs)
+        if "Candidates" in messages[-1]["content"]:
+            return f"Reasoning: The second fits.\nSelection: {TieDriver.selection}", {"token_usage": 5}
+        return super().completion(memory=memory, **kwargs)
+
+
+def test_tie_broken_by_llm(template):
+    engine = MajorVoteEngine(template, min_votes=2, driver=TieDriver)
+    outputs = [{"genre": "fiction"}, {"genre": "fantasy"}, {"genre": "horror"}]
+
+    assert engine.evaluate_output(outputs, {"book": "Dune"}) == {"genre": "fantasy"}
+    # without inputs or with an invalid selection the most voted value is taken
+    assert engine.evaluate_output(outputs) == {"genre": "fiction"}
+    TieDriver.selection = "7"
+    assert engine.evaluate_output(outputs, {"book": "Dune"}) == {"genre": "fiction"}
+
+
+class CachedVoteDriver(VoteDriver):
+    @classmethod
+    def load_driver(cls, prompt: str, model_name: str = "fake", cache=None, **kwargs):
+        driver = super().load_driver(prompt, model_name=model_name)
+        driver.cache = cache
+        return driver
+
+    def completion(self, memory: list[dict] = None, **kwargs):
+        VoteDriver.completions += 1
+        return ("Genre: fiction", {"token_usage": 10}) if VoteDriver.completions % 2 else ("Genre: fantasy", {})
+
+
+def test_votes_bypass_response_cache(template):
+    engine = MajorVoteEngine(
+        template, total_votes=4, min_votes=2, driver=CachedVoteDriver, cache=MemoryResponseCache()
+    )
+    outputs = asyncio.run(engine.gather_engine_run({"book": "Dune"}))
+
+    assert VoteDriver.completions == 4
+    assert outputs.count({"genre": "fantasy"}) == 2
+
+
+def test_evaluate_output_by_key(template):
+    engine = MajorVoteEngine(template, min_votes=2, driver=VoteDriver)
+    outputs = [{"genre": "fiction"}, {"genre": "fiction"}, {"genre": "fantasy"}]
+
+    assert engine.evaluate_output_by_key(outputs) == {"genre": "fiction"}
+    assert engine.evaluate_output_by_key(outputs[1:]) == {}
+    assert engine.compose_output_by_key(engine.aggregate(outputs[1:])) == ({}, ["genre"])
+
+
+class FlakySampleDriver(VoteDriver):
+    async def asample(self, n: int, memory: list[dict] = None, **kwargs):
+        VoteDriver.requests += 1
+        VoteDriver.completions += n
+        # the first request returns two failing samples
+        failing = 2 if VoteDriver.requests == 1 else 0
+        return ["Genre: fiction"] * (n - failing) + ["Genre: 5"] * failing, {"token_usage": n}
+
+
+def test_failed_samples_are_requested_again(template):
+    engine = MajorVoteEngine(template, total_votes=4, samples_per_request=4, driver=FlakySampleDriver)
+    outputs = asyncio.run(engine.gather_engine_run({"book": "Dune"}))
+
+    assert outputs == [{"genre": "fiction"}] * 4
+    assert VoteDriver.requests == 2
+    assert VoteDriver.completions == 6
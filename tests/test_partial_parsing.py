@@ -3,6 +3,7 @@ import pytest
 from structgenie.components.input_output import OutputModel
 from structgenie.components.output_parser.fixing import fix_split_output
 from structgenie.components.output_parser.output_parser import OutputParser
+from structgenie.errors import ParsingPartialError
 
 
 @pytest.fixture
@@ -30,5 +31,142 @@ def test_partial_parsing(output_model, output):
     assert all([key in text.keys() for key in ["reasoning", "instruction"]])
 
 
+@pytest.fixture
+def broken_output_model():
+    return OutputModel.from_string("Family: <list[dict]>\nHobbies: <list[str]>\nAddress: <dict>")
+
+
+def test_partial_fixes_run_concurrently(mocker, broken_output_model):
+    import threading
+    import time
+
+    running = []
+    max_running = []
+    lock = threading.Lock()
+
+    def fake_fixing(error_msg, key, output_model, debug=False):
+        with lock:
+            running.append(key)
+            max_running.append(len(running))
+        time.sleep(0.05)
+        with lock:
+            running.remove(key)
+        return {key: f"fixed {key}"}, {"token_usage": 1}
+
+    mocker.patch(
+        "structgenie.components.output_parser.output_parser.llm_output_fixing_partial", side_effect=fake_fixing
+    )
+    text = "Family: [broken\nHobbies: [broken\nAddress: {broken"
+    parser = OutputParser(output_model=broken_output_model, fix_by_llm=False, max_fix_concurrency=2)
+    output = parser._fixing_parser(text)
+
+    assert list(output) == ["family", "hobbies", "address"]
+    assert output["address"] == "fixed address"
+    assert max(max_running) == 2
+    assert len(parser.run_metrics) == 3
+
+
+def test_async_partial_fixes_do_not_block_loop(mocker, broken_output_model):
+    import asyncio
+
+    ticks = []
+
+    async def fake_fixing(error_msg, key, output_model, debug=False):
+        await asyncio.sleep(0.05)
+        return {key: f"fixed {key}"}, {"token_usage": 1}
+
+    async def ticker():
+        for _ in range(3):
+            ticks.append(1)
+            await asyncio.sleep(0.01)
+
+    mocker.patch(
+        "structgenie.components.output_parser.output_parser.allm_output_fixing_partial", side_effect=fake_fixing
+    )
+    text = "Family: [broken\nHobbies: [broken\nAddress: {broken"
+    parser = OutputParser(output_model=broken_output_model, fix_by_llm=False, max_fix_concurrency=4)
+
+    async def main():
+        return await asyncio.gather(parser.aparse(text, {}), ticker())
+
+    (output, run_metrics, error_log), _ = asyncio.run(main())
+
+    assert output == {"family": "fixed family", "hobbies": "fixed hobbies", "address": "fixed address"}
+    assert len(run_metrics) == 3
+    assert len(ticks) == 3
+
+
+def test_failed_partial_fix_cancels_other_fixes(mocker, broken_output_model):
+    import asyncio
+    import time
+
+    started = []
+
+    def fake_fixing(error_msg, key, output_model, debug=False):
+        started.append(key)
+        if key == "family":
+            time.sleep(0.01)
+            raise ValueError("fix failed")
+        time.sleep(0.1)
+        return {key: f"fixed {key}"}, {"token_usage": 1}
+
+    async def afake_fixing(error_msg, key, output_model, debug=False):
+        if key == "family":
+            raise ValueError("fix failed")
+        await asyncio.sleep(0.05)
+        started.append(key)
+        return {key: f"fixed {key}"}, {"token_usage": 1}
+
+    module = "structgenie.components.output_parser.output_parser"
+    mocker.patch(f"{module}.llm_output_fixing_partial", side_effect=fake_fixing)
+    mocker.patch(f"{module}.allm_output_fixing_partial", side_effect=afake_fixing)
+    partial_errors = [(key, ParsingPartialError(key)) for key in ("family", "hobbies", "address", "notes")]
+
+    parser = OutputParser(output_model=broken_output_model, fix_by_llm=False, max_fix_concurrency=2)
+    with pytest.raises(ValueError):
+        parser._fix_partial_by_llm(partial_errors)
+    # fixes already running finish, queued fixes are not started
+    assert "notes" not in started
+
+    started.clear()
+    parser = OutputParser(output_model=broken_output_model, fix_by_llm=False, max_fix_concurrency=4)
+
+    async def main():
+        with pytest.raises(ValueError):
+            await parser._afix_partial_by_llm(partial_errors)
+        await asyncio.sleep(0.1)
+
+    asyncio.run(main())
+    assert started == []
+
+
+def test_fixing_engines_are_cached(broken_output_model):
+    from structgenie.components.output_parser.fixing import load_fixing_engine, partial_output_model
+
+    engine = load_fixing_engine("fix_partial_parsing", partial_output_model(broken_output_model, ["family"]))
+
+    assert engine is load_fixing_engine("fix_partial_parsing", partial_output_model(broken_output_model, ["family"]))
+    assert engine is not load_fixing_engine("fix_partial_parsing", partial_output_model(broken_output_model, ["hobbies"]))
+    assert engine.fix_parsing_by_llm is False
+    assert engine.return_metrics is True
+
+
+
+def test_cached_fixing_engine_validates_concurrently(broken_output_model):
+    from concurrent.futures import ThreadPoolExecutor
+    from structgenie.components.output_parser.fixing import load_fixing_engine
+
+    engine = load_fixing_engine("fix_parsing_error", broken_output_model)
+    outputs = [
+        {"family": [{"name": "Tom"}], "hobbies": ["chess"], "address": {"city": "Berlin"}},
+        {"family": [{"name": "Tom"}], "hobbies": "chess", "address": {"city": "Berlin"}},
+    ] * 50
+
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        errors = list(executor.map(lambda output: engine.validator.validate(output, {}), outputs))
+
+    assert [len(e) for e in errors] == [0, 1] * 50
+
+
 if __name__ == '__main__':
     pytest.main()
@@ -0,0 +1,103 @@
+import pytest
+
+from structgenie.components.prompt.builder import PromptBuilder
+from structgenie.engine import StructEngine
+
+
+@pytest.fixture()
+def static_template():
+    return """
+Reverse engineer the instruction of a task with following input and output models.
+
+# Input
+Input Model: {inp_model}
+Output Model: {out_model}
+---
+Reasoning: <str>
+Instruction: <str>
+"""
+
+
+@pytest.fixture()
+def placeholder_template():
+    return """
+Generate a Person for each of the following family roles:
+{family_roles}
+
+Begin!
+Family Members: {family_roles}
+---
+Family: <list[dict], rule=for each $role in {family_roles}>
+Family.$role: <dict>
+Family.$role.name: <str>
+Family.$role.age: <int>
+"""
+
+
+def _builder(engine: StructEngine) -> PromptBuilder:
+    return PromptBuilder(
+        instruction=engine.instruction,
+        examples=engine.examples,
+        output_model=engine.output_model,
+        input_model=engine.input_model,
+    )
+
+
+@pytest.mark.parametrize("chat_mode", [True, False])
+def test_plan_matches_build(static_template, chat_mode):
+    engine = StructEngine.from_template(static_template)
+    builder = _builder(engine)
+    plan = builder.compile(chat_mode=chat_mode)
+
+    assert plan.static_format
+    assert plan.build() == builder.build(chat_mode=chat_mode)
+    assert plan.build(error="Some error", last_output="Reasoning: none") == builder.build(
+        error="Some error", last_output="Reasoning: none", chat_mode=chat_mode
+    )
+
+
+def test_plan_with_input_dependent_schema(placeholder_template):
+    engine = StructEngine.from_template(placeholder_template)
+    builder = _builder(engine)
+    plan = builder.compile(chat_mode=True)
+    inputs = {"family_roles": ["father", "mother"]}
+
+    assert not plan.static_format
+    assert builder.format_placeholders == ("family_roles",)
+    assert plan.build(**inputs) == builder.build(chat_mode=True, **inputs)
+    assert "father" in plan.build(**inputs)
+
+
+def test_engine_compiled_on_load(static_template):
+    engine = StructEngine.from_template(static_template)
+    plan = engine.prompt_plan
+    assert plan is not None
+
+    engine.prep_prompt(inp_model="a", out_model="b")
+    assert engine.prompt_plan is plan
+
+    engine.set_instruction("Another instruction.")
+    assert "Another instruction." in engine.prep_prompt(inp_model="a", out_model="b")
+
+
+def test_format_instructions_cached_per_placeholder_values(placeholder_template, monkeypatch):
+    engine = StructEngine.from_template(placeholder_template)
+    builder = _builder(engine)
+    renders = []
+    render = builder._render_format_instructions
+    monkeypatch.setattr(builder, "_render_format_instructions", lambda **kwargs: renders.append(kwargs) or render(**kwargs))
+
+    first = builder._format_instructions(family_roles=["father", "mother"], other="a")
+    assert builder._format_instructions(family_roles=["father", "mother"], other="b") == first
+    assert "son" in builder._format_instructions(family_roles=["son"])
+    assert renders == [{"family_roles": ["father", "mother"]}, {"family_roles": ["son"]}]
+
+
+def test_format_cache_reset_on_in_place_edit(static_template):
+    engine = StructEngine.from_template(static_template)
+    builder = _builder(engine)
+    builder._format_instructions()
+
+    builder.output_model.lines[1].type = "int"
+
+    assert "Instruction: <int>" in builder._format_instructions()
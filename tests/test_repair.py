@@ -0,0 +1,80 @@
+import pytest
+
+from structgenie.driver.chat_driver import ChatDriver
+from structgenie.engine import StructEngine, RunContext
+from structgenie.errors import ValidationError
+
+
+class RepairDriver(ChatDriver):
+    outputs = []
+    prompts = []
+
+    @classmethod
+    def load_driver(cls, prompt: str, model_name: str = "fake", **kwargs):
+        driver = cls()
+        driver.prompt = prompt
+        driver.model_name = model_name
+        driver.llm_kwargs = {}
+        return driver
+
+    def completion(self, memory: list[dict] = None, **kwargs):
+        RepairDriver.prompts.append(self.parse_prompt(memory=memory, **kwargs))
+        return RepairDriver.outputs.pop(0), {"token_usage": 10}
+
+    async def async_completion(self, memory: list[dict] = None, **kwargs):
+        return self.completion(memory=memory, **kwargs)
+
+
+@pytest.fixture
+def template():
+    return """Classify the book.
+
+# Input
+Book: {book}
+---
+Summary: <str>
+Genre: <str, options=[fiction, non-fiction]>
+Tags: <list[str]>
+"""
+
+
+def test_repair_regenerates_failing_key_only(template):
+    RepairDriver.outputs = [
+        "Summary: A long summary.\nGenre: cooking\nTags:\n  - food",
+        "Genre: non-fiction",
+    ]
+    RepairDriver.prompts = []
+    engine = StructEngine.from_template(template, driver=RepairDriver, repair_failed_keys=True)
+    context = RunContext()
+
+    output, metrics = engine.run({"book": "Cookbook"}, context=context)
+
+    assert output == {"summary": "A long summary.", "genre": "non-fiction", "tags": ["food"]}
+    assert metrics["keys_repaired"] == 1
+    assert metrics["token_usage"] == 20
+    assert context.n_run == 0
+
+    repair_messages = RepairDriver.prompts[-1]
+    assert "Genre" in repair_messages[0]["content"]
+    assert "Summary: <str>" not in repair_messages[0]["content"]
+
+
+def test_failing_keys_maps_errors(template):
+    engine = StructEngine.from_template(template, driver=RepairDriver)
+    missing = {"summary": "text", "genre": "fiction"}
+    errors = engine.validator.validate(missing, {})
+    assert engine._failing_keys(missing, {}, errors, engine.validator) == ["tags"]
+
+    invalid = {"summary": "text", "genre": "cooking", "tags": ["food"]}
+    errors = engine.validator.validate(invalid, {})
+    assert engine._failing_keys(invalid, {}, errors, engine.validator) == ["genre"]
+
+
+def test_repair_falls_back_to_retry(template):
+    RepairDriver.outputs = ["Genre: cooking"]
+    engine = StructEngine.from_template(template, driver=RepairDriver, repair_failed_keys=True)
+
+    with pytest.raises(ValidationError):
+        engine.repair_output(
+            {"summary": "A long summary.", "genre": "cooking", "tags": ["food"]}, {"book": "Cookbook"}
+        )
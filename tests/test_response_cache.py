@@ -0,0 +1,89 @@
+import pytest
+
+from structgenie.driver.cache import (
+    MemoryResponseCache,
+    SQLiteResponseCache,
+    TieredResponseCache,
+    cache_key,
+)
+from structgenie.driver.chat_driver import ChatDriver
+from structgenie.engine import StructEngine
+
+
+class FakeDriver(ChatDriver):
+    calls = 0
+
+    @classmethod
+    def load_driver(cls, prompt: str, model_name: str = "fake", llm_kwargs: dict = None, cache=None, **kwargs):
+        driver = cls()
+        driver.prompt = prompt
+        driver.model_name = model_name
+        driver.llm_kwargs = llm_kwargs or {}
+        driver.cache = cache
+        return driver
+
+    def completion(self, memory: list[dict] = None, **kwargs):
+        FakeDriver.calls += 1
+        return "Reasoning: cached\nInstruction: Do it.", {"token_usage": 42, "model_name": self.model_name}
+
+    async def async_completion(self, memory: list[dict] = None, **kwargs):
+        return self.completion(memory=memory, **kwargs)
+
+
+@pytest.fixture
+def template():
+    return """Reverse engineer the instruction of a task with following input and output models.
+
+# Input
+Input Model: {inp_model}
+Output Model: {out_model}
+---
+Reasoning: <str>
+Instruction: <str>
+"""
+
+
+def test_cache_key_is_content_addressed():
+    messages = [{"role": "user", "content": "hi"}]
+    assert cache_key("m", {"temperature": 0}, messages) == cache_key("m", {"temperature": 0}, list(messages))
+    assert cache_key("m", {"temperature": 0}, messages) != cache_key("m", {"temperature": 1}, messages)
+    assert cache_key("m", None, messages) != cache_key("n", None, messages)
+
+
+def test_memory_cache_ttl_and_size():
+    cache = MemoryResponseCache(max_size=2, ttl=60)
+    for key in "abc":
+        cache.set(key, {"text": key})
+    assert cache.get("a") is None
+    assert cache.get("c") == {"text": "c"}
+
+    expired = MemoryResponseCache(ttl=-1)
+    expired.set("a", {"text": "a"})
+    assert expired.get("a") is None
+
+
+def test_sqlite_tier_survives_restart(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    SQLiteResponseCache(path).set("key", {"text": "value", "token_usage": 3})
+
+    memory = MemoryResponseCache()
+    cache = TieredResponseCache(memory, SQLiteResponseCache(path))
+    assert cache.get("key") == {"text": "value", "token_usage": 3}
+    assert memory.get("key") == {"text": "value", "token_usage": 3}
+
+
+def test_engine_hits_report_metrics(template):
+    FakeDriver.calls = 0
+    engine = StructEngine.from_template(template, driver=FakeDriver, cache=MemoryResponseCache())
+    inputs = {"inp_model": "a", "out_model": "b"}
+
+    output, metrics = engine.run(inputs)
+    assert metrics["cache_misses"] == 1
+    assert metrics["token_usage"] == 42
+
+    cached_output, metrics = engine.run(inputs)
+    assert cached_output == output
+    assert FakeDriver.calls == 1
+    assert metrics["cache_hits"] == 1
+    assert metrics["tokens_saved"] == 42
+    assert metrics["token_usage"] == 0
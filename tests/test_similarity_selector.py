@@ -0,0 +1,84 @@
+import pytest
+
+from structgenie.components.examples import SimilarityExampleSelector
+from structgenie.components.examples.base import Example
+from structgenie.components.prompt.builder import PromptBuilder
+from structgenie.utils.tokenizer import DEFAULT_ENCODING, tokenizer_registry
+
+pytest.importorskip("numpy")
+
+EXAMPLES = [
+    {"input": {"title": "Dune", "blurb": "desert planet spice empire"}, "output": {"genre": "science fiction"}},
+    {"input": {"title": "Emma", "blurb": "matchmaking in a country village"}, "output": {"genre": "romance"}},
+    {"input": {"title": "Dracula", "blurb": "a vampire count in transylvania"}, "output": {"genre": "horror"}},
+    {"input": {"title": "Foundation", "blurb": "galactic empire falls, psychohistory"}, "output": {"genre": "science fiction"}},
+]
+
+
+class WordEncoding:
+    def encode(self, text: str) -> list[int]:
+        return list(range(len(text.split())))
+
+
+@pytest.fixture(autouse=True)
+def encoding():
+    tokenizer_registry.register(DEFAULT_ENCODING, WordEncoding())
+    yield
+    tokenizer_registry.clear()
+
+
+@pytest.fixture()
+def selector() -> SimilarityExampleSelector:
+    selector = SimilarityExampleSelector.from_list(EXAMPLES)
+    selector.k = 2
+    return selector
+
+
+def test_selects_most_similar_examples(selector):
+    examples = selector.select(title="Hyperion", blurb="a galactic empire and a desert planet")
+
+    assert {example.input["title"] for example in examples} == {"Foundation", "Dune"}
+
+
+def test_selection_within_token_budget(selector):
+    examples = selector.select(max_token=15, title="Salem", blurb="a vampire town")
+
+    assert [example.input["title"] for example in examples] == ["Dracula"]
+
+
+def test_add_example_updates_index(selector):
+    selector.select(blurb="pirates")
+    selector.add_example(Example(input={"title": "Treasure Island", "blurb": "pirates and treasure"}, output={"genre": "adventure"}))
+
+    assert len(selector.index) == 5
+    assert selector.select(blurb="pirates treasure")[0].input["title"] == "Treasure Island"
+
+
+def test_persisted_index(tmp_path, selector):
+    path = str(tmp_path / "index.npz")
+    selector.index_path = path
+    expected = selector.select(blurb="a vampire")
+
+    loaded = SimilarityExampleSelector.from_list(EXAMPLES)
+    loaded.k = 2
+    loaded.index_path = path
+
+    assert loaded.select(blurb="a vampire") == expected
+    # the index is rebuilt if it does not match the examples
+    changed = SimilarityExampleSelector.from_list(EXAMPLES[::-1])
+    changed.index_path = path
+    assert changed.select(blurb="a vampire")[0].input["title"] == "Dracula"
+
+
+def test_prompt_plan_selects_examples_per_inputs(selector):
+    builder = PromptBuilder(
+        instruction="Classify the genre of the book.",
+        input_model="Title: {title}\nBlurb: {blurb}",
+        output_model="Genre: <str>",
+        examples=selector,
+    )
+    plan = builder.compile()
+
+    assert "{examples}" in plan.template
+    assert "transylvania" in plan.build(title="Salem", blurb="a vampire town")
+    assert "transylvania" not in plan.build(title="Emma", blurb="matchmaking village")
@@ -0,0 +1,161 @@
+import asyncio
+
+import pytest
+
+from structgenie.components.output_parser.stream import StreamingOutputParser
+from structgenie.driver.chat_driver import ChatDriver
+from structgenie.engine import StructEngine, RunContext
+from structgenie.engine.async_engine import AsyncEngine
+
+TEXT = """Reasoning: I knew it all along.
+Family:
+  - name: Tom
+    age: 42
+  - name: Anna
+    age: 40
+Instruction: Do it again.
+"""
+
+
+class StreamingDriver(ChatDriver):
+    outputs = []
+
+    @classmethod
+    def load_driver(cls, prompt: str, model_name: str = "fake", **kwargs):
+        driver = cls()
+        driver.prompt = prompt
+        driver.model_name = model_name
+        driver.llm_kwargs = {}
+        return driver
+
+    def completion(self, memory: list[dict] = None, **kwargs):
+        return StreamingDriver.outputs.pop(0), {"token_usage": 10}
+
+    async def async_completion(self, memory: list[dict] = None, **kwargs):
+        return self.completion(memory=memory, **kwargs)
+
+    def stream_completion(self, memory: list[dict] = None, **kwargs):
+        text, self.stream_metrics = self.completion(memory=memory, **kwargs)
+        for i in range(0, len(text), 7):
+            yield text[i:i + 7]
+
+    async def async_stream_completion(self, memory: list[dict] = None, **kwargs):
+        for chunk in self.stream_completion(memory=memory, **kwargs):
+            yield chunk
+
+
+@pytest.fixture
+def template():
+    return """Reverse engineer the instruction of a task with following input and output models.
+
+# Input
+Input Model: {inp_model}
+---
+Reasoning: <str>
+Family: <list[dict]>
+Family.name: <str>
+Family.age: <int>
+Instruction: <str>
+"""
+
+
+def test_parser_emits_completed_keys(template):
+    engine = StructEngine.from_template(template)
+    parser = StreamingOutputParser(engine.output_model)
+
+    emitted = []
+    for i in range(0, len(TEXT), 5):
+        completed = parser.feed(TEXT[i:i + 5])
+        if completed:
+            emitted.append(completed)
+
+    assert emitted == [
+        {"reasoning": "I knew it all along."},
+        {"family": [{"name": "Tom", "age": 42}, {"name": "Anna", "age": 40}]},
+    ]
+    assert parser.close() == {"instruction": "Do it again."}
+    assert parser.text == TEXT
+
+
+def test_engine_stream_yields_partial_outputs(template):
+    StreamingDriver.outputs = [TEXT]
+    engine = StructEngine.from_template(template, driver=StreamingDriver)
+    context = RunContext()
+
+    outputs = list(engine.stream({"inp_model": "a"}, context=context))
+
+    assert outputs[0] == {"reasoning": "I knew it all along."}
+    assert outputs[-1]["instruction"] == "Do it again."
+    assert len(outputs[-1]["family"]) == 2
+    assert context.run_metrics["token_usage"] == 10
+
+
+def test_engine_stream_retries(template):
+    StreamingDriver.outputs = ["Reasoning: incomplete\n", TEXT]
+    engine = AsyncEngine.from_template(template, driver=StreamingDriver)
+    context = RunContext()
+
+    async def collect():
+        return [output async for output in engine.astream({"inp_model": "a"}, context=context)]
+
+    outputs = asyncio.run(collect())
+    assert outputs[-1]["instruction"] == "Do it again."
+    assert context.n_run == 1
+    assert context.run_metrics["failure_rate"] == 1
+
+
+class AbortingDriver(StreamingDriver):
+    chunks_sent = 0
+
+    def stream_completion(self, memory: list[dict] = None, **kwargs):
+        text, _ = self.completion(memory=memory, **kwargs)
+        for line in text.splitlines(keepends=True):
+            AbortingDriver.chunks_sent += 1
+            yield line
+        self.stream_metrics = {"token_usage": 10}
+
+
+def test_stream_aborts_on_invalid_key(template):
+    invalid = "Reasoning: <str>\nFamily:\n  - name: Tom\n    age: 42\nInstruction: Do it again.\n"
+    StreamingDriver.outputs = [invalid, TEXT]
+    AbortingDriver.chunks_sent = 0
+    engine = StructEngine.from_template(template, driver=AbortingDriver)
+    context = RunContext()
+
+    outputs = list(engine.stream({"inp_model": "a"}, context=context))
+
+    assert outputs[-1]["reasoning"] == "I knew it all along."
+    assert context.run_metrics["streams_aborted"] == 1
+    # aborted after the second line of the invalid output completed the first key
+    assert AbortingDriver.chunks_sent == 2 + len(TEXT.splitlines())
+    assert "placeholder" in context.last_error
+
+
+def test_stream_parser_closed_when_stream_ends(template, monkeypatch):
+    closed = []
+    close = StreamingOutputParser.close
+    monkeypatch.setattr(StreamingOutputParser, "close", lambda self: closed.append(self.text) or close(self))
+    engine = StructEngine.from_template(template, driver=StreamingDriver)
+
+    StreamingDriver.outputs = [TEXT]
+    list(engine.stream({"inp_model": "a"}))
+    assert closed == [TEXT]
+
+    # the consumer stops after the first partial output
+    StreamingDriver.outputs = [TEXT]
+    stream = engine.stream({"inp_model": "a"})
+    next(stream)
+    stream.close()
+    assert len(closed) == 2 and TEXT.startswith(closed[1])
+
+    StreamingDriver.outputs = [TEXT]
+    async_engine = AsyncEngine.from_template(template, driver=StreamingDriver)
+
+    async def first_output():
+        stream = async_engine.astream({"inp_model": "a"})
+        output = await stream.__anext__()
+        await stream.aclose()
+        return output
+
+    asyncio.run(first_output())
+    assert len(closed) == 3
@@ -0,0 +1,36 @@
+import pytest
+
+from structgenie.utils.parsing import prepare_inputs_placeholders, replace_placeholder
+from structgenie.utils.parsing.template import compile_template
+
+
+def test_compiled_template_resolves_lookups():
+    template = compile_template("Book: {title}\nAuthor: {inputs['author']}\nAll: {inputs}")
+
+    assert template.placeholders == {
+        "{title}": ("key", "title"),
+        "{inputs['author']}": ("item", "inputs", "author"),
+        "{inputs}": ("inputs",),
+    }
+    assert template is compile_template("Book: {title}\nAuthor: {inputs['author']}\nAll: {inputs}")
+
+
+def test_placeholders_after_last_output_are_not_loaded():
+    prompt = "Genre: {genre}\n<%last_output%>\n{last: output}\n</%last_output%>"
+
+    _, placeholder_map = prepare_inputs_placeholders(prompt, {"genre": "fiction"})
+
+    assert placeholder_map == {"{genre}": "fiction"}
+
+
+def test_missing_placeholder_raises():
+    with pytest.raises(ValueError, match="Placeholder author not found"):
+        prepare_inputs_placeholders("{title} by {author}", {"title": "Dune"})
+
+
+def test_render_replaces_given_keys_in_single_pass():
+    template = "{instruction}\n{{examples}}\n{remarks}\n{instruction}"
+
+    rendered = replace_placeholder(template, instruction="Do {remarks}", remarks=None)
+
+    assert rendered == "Do {remarks}\n{{examples}}\n\nDo {remarks}"
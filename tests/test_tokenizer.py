@@ -0,0 +1,64 @@
+import pytest
+
+from structgenie.components.examples import ExampleSelector
+from structgenie.components.examples.base import Example
+from structgenie.driver.utils import num_tokens_from_messages
+from structgenie.utils.tokenizer import DEFAULT_ENCODING, tokenizer_registry
+
+
+class WordEncoding:
+    """Offline encoding with a token per word."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def encode(self, text: str) -> list[int]:
+        self.calls += 1
+        return list(range(len(text.split())))
+
+
+@pytest.fixture()
+def encoding():
+    encoding = WordEncoding()
+    tokenizer_registry.register(DEFAULT_ENCODING, encoding, models=["gpt-3.5-turbo-0613", "gpt-4"])
+    yield encoding
+    tokenizer_registry.clear()
+
+
+def test_count_batch(encoding):
+    assert tokenizer_registry.count_batch(["one", "one two", ""], model="gpt-4") == [1, 2, 0]
+    assert tokenizer_registry.get_encoding(model="gpt-4") is encoding
+
+
+def test_num_tokens_from_messages(encoding):
+    messages = [
+        {"role": "system", "content": "be brief"},
+        {"role": "user", "name": "example_user", "content": "hello world"},
+    ]
+
+    # 2 messages * 4 + 7 words + name -1 + reply 2
+    assert num_tokens_from_messages(messages) == 16
+    # any model is supported now: 2 messages * 3 + 7 words + name 1 + reply 3
+    assert num_tokens_from_messages(messages, model="gpt-4") == 17
+
+
+def test_example_token_count_is_cached(encoding):
+    example = Example(input={"title": "Dune"}, output={"genre": "science fiction"})
+
+    assert example.token_count == example.token_count == 6
+    assert encoding.calls == 1
+    with pytest.raises(TypeError):
+        example.input = {"title": "Emma"}
+
+
+def test_selector_counts_examples_once(encoding):
+    selector = ExampleSelector.from_list([
+        {"input": {"title": "Dune"}, "output": {"genre": "science fiction"}},
+        {"input": {"title": "Emma"}, "output": {"genre": "romance"}},
+    ])
+
+    first = selector.to_prompt(max_token=100)
+    calls = encoding.calls
+
+    assert selector.to_prompt(max_token=100) == first
+    assert encoding.calls == calls
@@ -0,0 +1,48 @@
+import datetime
+
+import pytest
+
+from structgenie.components.validation._type import compile_type
+from structgenie.components.validation._type_checker import TypeResolutionError, matches, resolve_type
+
+
+@pytest.mark.parametrize("type_, value, valid", [
+    ("list[int]", [1, 2], True),
+    ("list[int]", [1, "2"], False),
+    ("Optional[list[str]]", None, True),
+    ("Optional[list[str]]", ["a", 1], False),
+    ("dict[str, int]", {"a": 1}, True),
+    ("dict[str, int]", {"a": "1"}, False),
+    ("dict[dict]", {"a": {"b": 1}}, True),
+    ("Union[int, str]", 2.5, False),
+    ("list[Member]", [{"name": "Tom"}], True),
+    ("tuple[int, ...]", (1, 2, 3), True),
+    ("tuple[int, str]", (1, 2), False),
+    ("list[datetime.datetime]", ["2022-10-10", datetime.datetime(2022, 10, 10)], True),
+    ("list[datetime]", ["tomorrow"], False),
+    ("str | None", None, True),
+    ("int | float", 2.5, True),
+    ("int | float", "2", False),
+    ("list[int | str]", [1, "2"], True),
+    ("dict[str, list[int] | None]", {"a": None, "b": [1.5]}, False),
+])
+def test_resolved_types_check_elements(type_, value, valid):
+    assert matches(value, resolve_type(type_)) is valid
+
+
+def test_resolve_type_is_cached():
+    assert resolve_type("list[Union[str, int]]") is resolve_type("list[Union[str, int]]")
+    assert resolve_type("Optional[str]") == (str, type(None))
+    with pytest.raises(TypeResolutionError):
+        resolve_type("list[int")
+    with pytest.raises(TypeResolutionError):
+        resolve_type("str |")
+
+
+def test_compiled_type_messages():
+    assert compile_type("list[int]")("ids", [1, "a"]) == (
+        "Wrong type for 'ids': '[1, 'a']'. Expected list[int], got list[int, str]"
+    )
+    assert compile_type("int")("count", None) is None
+    with pytest.raises(ValueError):
+        compile_type("Member")("member", "Tom")
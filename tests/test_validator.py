@@ -179,5 +179,132 @@ def test_instruction_validation():
     assert not errors
 
 
+def test_compiled_rules():
+    class Output(BaseModel):
+        genre: str = Field(options=["fiction", "non-fiction"])
+        score: int = Field(rule="min=0 max=10")
+        code: str = Field(rule="regex: ^[A-Z]+$")
+        tags: list[str] = Field(rule="one or more: ['a', 'b']")
+
+    validator = Validator.from_output_model(OutputModel.from_pydantic(Output))
+
+    assert not validator.validate({"genre": "fiction", "score": 3, "code": "ABC", "tags": ["a", "b"]}, {})
+    errors = validator.validate({"genre": "poetry", "score": 11, "code": "abc", "tags": ["c"]}, {})
+    assert [error.key for error in errors] == ["genre", "score", "code", "tags"]
+    assert all(isinstance(error, ValidationRuleError) for error in errors)
+    # configs without placeholders are compiled once and shared by all calls
+    assert validator._parse_inputs({}) is validator.compiled_config
+
+
+def test_compiled_placeholder_rule_is_cached():
+    class Output(BaseModel):
+        genre: str = Field(rule="one of: {genres}")
+
+    validator = Validator.from_output_model(OutputModel.from_pydantic(Output))
+
+    assert not validator.validate({"genre": "fiction"}, {"genres": ["fiction", "fantasy"]})
+    assert validator.validate({"genre": "fiction"}, {"genres": ["horror"]})
+    first = validator._parse_inputs({"genres": ["horror"]})["genre"]
+    assert validator._parse_inputs({"genres": ["horror"]})["genre"] is first
+
+
+def test_output_schema_built_once_per_inputs(output_model_nested_list, monkeypatch):
+    from structgenie.components.validation import validator as validator_module
+
+    calls = []
+    build_output_schema = validator_module.build_output_schema
+    monkeypatch.setattr(
+        validator_module, "build_output_schema", lambda *args, **kwargs: calls.append(1) or build_output_schema(*args, **kwargs)
+    )
+    output = {"family_name": "Smith", "family_members": [
+        {"father": {"name": "John", "role": "father", "age": 45}},
+        {"mother": {"name": "Jane", "role": "mother", "age": 42}},
+        {"son": {"name": "Jack", "role": "son", "age": 18}}
+    ]}
+    validator = Validator.from_output_model(output_model_nested_list)
+
+    assert not validator.validate(output, {"unrelated": 1})
+    assert not validator.validate(output, {"unrelated": 2})
+    assert len(calls) == 1
+
+
+def test_validate_many_matches_validate(output_model_nested_list):
+    class Member(BaseModel):
+        name: str
+        age: int
+
+    class Output(BaseModel):
+        genre: str = Field(options=["fiction", "non-fiction"])
+        score: int = Field(rule="min=0 max=10")
+        members: list[Member]
+
+    validator = Validator.from_output_model(OutputModel.from_pydantic(Output))
+    member = {"name": "Tom", "age": 3}
+    outputs = [
+        {"genre": "fiction", "score": 3, "members": [member]},
+        {"genre": "poetry", "score": 11, "members": [member]},
+        {"genre": "fiction", "score": 2.5, "members": [{"name": "Tom"}]},
+        {"genre": "fiction", "score": 0},
+    ] * 50
+
+    report = validator.validate_many(outputs)
+
+    assert sorted(report) == [i for i in range(len(outputs)) if i % 4]
+    for index, errors in report.items():
+        expected = validator.validate(outputs[index])
+        assert [(type(e), str(e), e.key) for e in errors] == [(type(e), str(e), e.key) for e in expected]
+
+    nested_validator = Validator.from_output_model(output_model_nested_list)
+    members = [
+        {"father": {"name": "John", "role": "father", "age": 45}},
+        {"mother": {"name": "Jane", "role": "mother", "age": 42}},
+        {"son": {"name": "Jack", "role": "son", "age": 18}},
+    ]
+    nested_outputs = [
+        {"family_name": "Smith", "family_members": members},
+        {"family_name": "Smith", "family_members": members[:2] + [{"son": {"name": "Jack", "role": "son"}}]},
+        {"family_name": "Smith", "family_members": members[:2]},
+    ] * 10
+
+    nested_report = nested_validator.validate_many(nested_outputs)
+
+    assert sorted(nested_report) == [i for i in range(len(nested_outputs)) if i % 3]
+    for index, errors in nested_report.items():
+        expected = nested_validator.validate(nested_outputs[index])
+        assert [(type(e), str(e), e.key) for e in errors] == [(type(e), str(e), e.key) for e in expected]
+
+
+def test_validate_many_with_options_and_bounds():
+    class Output(BaseModel):
+        level: int = Field(options=[1, 2, 3], rule="min=0 max=10")
+
+    validator = Validator.from_output_model(OutputModel.from_pydantic(Output))
+    outputs = [{"level": 5}, {"level": 2}, {"level": 11}] * 20
+
+    report = validator.validate_many(outputs)
+
+    assert sorted(report) == [i for i in range(len(outputs)) if i % 3 != 1]
+    for index, errors in report.items():
+        assert [str(e) for e in errors] == [str(e) for e in validator.validate(outputs[index])]
+
+
+def test_failed_validation_does_not_leak_into_next_call():
+    class Member(BaseModel):
+        name: str
+
+    class Output(BaseModel):
+        family: list[dict[str, Member]] = Field(rule="for each $role in {family_roles}")
+        score: int = Field(rule="min=0 max=10")
+
+    validator = Validator.from_output_model(OutputModel.from_pydantic(Output))
+
+    with pytest.raises(Exception):
+        validator.validate({"family": [], "score": "abc"}, {"family_roles": ["mother", "father"]})
+
+    output = {"family": [{"mother": {"name": "b"}}], "score": 3}
+    assert validator.validate(output, {"family_roles": ["mother"]}) == []
+    assert validator.error_log == [] and validator.inputs == {}
+
+
 if __name__ == '__main__':
     pytest.main()